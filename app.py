@@ -1,12 +1,35 @@
 import streamlit as st
-import pandas as pd
-from database.scraping_db import create_table, clear_table
-from scrapers.selenium_scraper import scrape_category_selenium
+from database.scraping_db import create_table
+from database.recherche import Filtres
+from database.doublons import marquer_doublons
+from database.fusion import fusionner_base
+from database.historique import rafraichir_agregats
+from database.import_csv import CSV_CATEGORIES, CSV_DIR, charger_csv, importer_dossier
+from database.snapshots import dates_snapshots, ecrire_snapshot
+from database.jobs import (
+    STATUTS, soumettre_job, demander_annulation, job_actif, dernier_job, progression
+)
+from scrapers.config import CATEGORIES
+from scrapers.runner import demarrer_runner
+from dashboard import tableau_annonces
 import os
 
-# Création DB si nécessaire
-os.makedirs("database", exist_ok=True)
-create_table()
+# Création DB si nécessaire, fusion unique de l'ancienne base du dashboard, import des
+# exports Web Scraper (ignorés s'ils n'ont pas changé) et marquage des quasi-doublons ;
+# l'instantané Parquet suit, et les agrégats de l'historique si l'import a ajouté des lignes.
+# Une fois par processus, pas à chaque réexécution du script : après un scraping,
+# c'est le runner qui marque les doublons et rafraîchit instantané et agrégats
+@st.cache_resource
+def preparer_base():
+    os.makedirs("database", exist_ok=True)
+    create_table()
+    ajoutees = fusionner_base() + sum(importer_dossier().values()) + marquer_doublons()
+    if ajoutees or not dates_snapshots():
+        ecrire_snapshot()
+    if ajoutees:
+        rafraichir_agregats()
+
+preparer_base()
 
 # -----------------------------
 # SIDEBAR
@@ -18,6 +41,18 @@ with st.sidebar:
 
     st.markdown("---")
     index_value = st.selectbox("Nombre de pages à scrapers", list(range(1, 101)))
+    incremental = st.checkbox(
+        "Scraping incrémental",
+        value=True,
+        help="Conserver les annonces déjà en base et arrêter chaque catégorie "
+             "à la première page sans nouvelle annonce."
+    )
+    images = st.checkbox(
+        "Télécharger les miniatures",
+        value=False,
+        help="Garder une copie locale des images des annonces, affichée ensuite "
+             "sans repasser par le CDN de CoinAfrique."
+    )
     menu_option = st.selectbox(
         "Menu",
         [
@@ -25,6 +60,7 @@ with st.sidebar:
             "Scraper en utilisant Selenium",
             "Télécharger des données déjà scrapées (Web Scraper) (à venir)",
             "Voir dashboard des données",
+            "Performance des scrapings",
             "Formulaire d'evaluation de l'application"
         ]
     )
@@ -39,9 +75,116 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Initialiser l'état si pas défini
-if "scraping" not in st.session_state:
-    st.session_state.scraping = False
+# -----------------------------
+# JOBS DE SCRAPING (ARRIÈRE-PLAN)
+# -----------------------------
+# Le scraping tourne dans un worker du processus serveur (scrapers/runner.py) ;
+# la page ne fait que soumettre le job puis suivre sa progression en base.
+@st.cache_resource
+def worker():
+    return demarrer_runner()
+
+worker()
+
+
+def lancer_job(methode):
+    job_id, nouveau = soumettre_job(methode, index_value, incremental, images)
+    if not nouveau:
+        st.warning(f"Un scraping est déjà en cours (job n°{job_id}) : affichage de sa progression.")
+
+
+def suivi_job(methode):
+    """
+    Progression du job actif (quelle que soit la session qui l'a lancé) ou du dernier job.
+    Seul un job en attente ou en cours est suivi en direct ; un job fini s'affiche une fois.
+    """
+    job = job_actif() or dernier_job(methode)
+    if job is None:
+        return
+    if job["statut"] in ("queued", "running"):
+        suivi_en_direct(methode)
+    else:
+        afficher_job(job)
+
+
+@st.fragment(run_every=2)
+def suivi_en_direct(methode):
+    job = job_actif() or dernier_job(methode)
+    afficher_job(job)
+    if job["statut"] not in ("queued", "running"):
+        st.rerun()  # réexécution complète : le job fini s'affiche sans rafraîchissement périodique
+
+
+def afficher_job(job):
+    libelle = "BeautifulSoup" if job["methode"] == "beautifulsoup" else "Selenium"
+    st.markdown(f"**Job n°{job['id']}** ({libelle}, {job['max_pages']} page(s)"
+                f"{', incrémental' if job['incremental'] else ''}) : {STATUTS[job['statut']]}")
+
+    avancement = progression(job["id"])
+    total_pages = len(CATEGORIES) * job["max_pages"]
+    pages_faites = int(avancement["Pages"].sum()) if not avancement.empty else 0
+    if job["statut"] in ("queued", "running"):
+        st.progress(min(pages_faites / total_pages, 1.0),
+                    text=f"Scraping en cours : {pages_faites} / {total_pages} pages")
+        if not avancement.empty:
+            st.dataframe(avancement, hide_index=True)
+        if st.button("Annuler le scraping", key=f"annuler_{job['id']}"):
+            demander_annulation(job["id"])
+    elif job["statut"] == "failed":
+        st.error(f"Le scraping a échoué : {job['erreur']}")
+    elif job["statut"] == "cancelled":
+        st.warning(f"Scraping annulé après {pages_faites} page(s).")
+    else:
+        st.success("Scraping terminé et données sauvegardées !")
+
+    export = job["resume"].get("export")
+    if export and os.path.exists(export):
+        with open(export, "rb") as f:
+            st.download_button("Télécharger les annonces du job (CSV)", f, file_name=os.path.basename(export),
+                               mime="text/csv", key=f"export_{job['id']}")
+
+    stats_cache = job["resume"].get("cache")
+    if stats_cache:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Cache : hits", stats_cache["hits"] + stats_cache["revalidated"],
+                    help=f"dont {stats_cache['revalidated']} revalidées par un 304")
+        col2.metric("Cache : misses", stats_cache["misses"])
+        col3.metric("Pages inchangées", stats_cache["unchanged"])
+        col4.metric("Taille du cache", f"{stats_cache['size_bytes'] / 1e6:.1f} Mo",
+                    help=f"{stats_cache['entries']} pages, {stats_cache['evictions']} évictions pendant ce run")
+
+    requetes = job["resume"].get("requetes")
+    if requetes:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Pages obtenues", requetes["fetched"])
+        col2.metric("Pages retentées", requetes["retried"],
+                    help=f"{requetes['retries']} nouvelles tentatives, {requetes['requeued']} passages en file de reprise")
+        col3.metric("Pages abandonnées", requetes["dropped"])
+        col4.metric("Requêtes", requetes["requests"],
+                    help=", ".join(f"{code} : {n}" for code, n in requetes["errors"].items()) or "aucune erreur")
+        coupes = [hote for hote, etat in requetes["hosts"].items() if etat["trips"]]
+        if requetes["dropped"] or coupes:
+            st.warning(f"{requetes['dropped']} page(s) abandonnée(s) après reprise"
+                       + (f" ; disjoncteur déclenché pour {', '.join(coupes)}" if coupes else ""))
+
+    stats_images = job["resume"].get("images")
+    if stats_images:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Miniatures téléchargées", stats_images["downloaded"],
+                    help=f"{stats_images['failed']} en échec")
+        col2.metric("Miniatures déjà en cache", stats_images["cached"])
+        col3.metric("Images identiques", stats_images["cache"]["deduplicated"],
+                    help="Liens différents servant le même fichier, enregistré une seule fois")
+        col4.metric("Cache d'images", f"{stats_images['cache']['size_bytes'] / 1e6:.1f} Mo",
+                    help=f"{stats_images['cache']['images']} images, "
+                         f"{stats_images['cache']['evictions']} évictions pendant ce run")
+
+    # Afficher les résultats (au fil des pages pendant le scraping), page par page
+    if not job["started_at"]:
+        return
+    for cat in CATEGORIES:
+        st.subheader(cat)
+        tableau_annonces(Filtres(categorie=cat, depuis=job["started_at"]), f"job_{job['id']}_{cat}")
 
 # -----------------------------
 # SCRAPING SELON MENU
@@ -56,91 +199,18 @@ if menu_option == "Scraper en utilisant Selenium":
         "et de l’exécuter localement en suivant les instructions du README."
     )
     # Bouton unique
-    if st.button("Lancer le scraping") and not st.session_state.scraping:
-        st.session_state.scraping = True
-        status_placeholder = st.empty()
-        status_placeholder.markdown("**Scraping en cours, veuillez patienter ...**")
-
-        # Vider la table avant nouveau scraping
-        clear_table()
-
-        categories = {
-            "Chiens": "https://sn.coinafrique.com/categorie/chiens",
-            "Moutons": "https://sn.coinafrique.com/categorie/moutons",
-            "Poules / Lapins / Pigeons": "https://sn.coinafrique.com/categorie/poules-lapins-et-pigeons",
-            "Autres animaux": "https://sn.coinafrique.com/categorie/autres-animaux"
-        }
-
-        all_data = {}
-        progress_bar = st.progress(0)
-
-        # Scraper chaque catégorie
-        with st.spinner("Scraping en cours, veuillez patienter ..."):
-            for i, (cat, url) in enumerate(categories.items(), 1):
-                data = scrape_category_selenium(cat, url, max_pages=index_value)
-                all_data[cat] = data
-                progress_bar.progress(i / len(categories))
-
-        st.success("Scraping terminé et données sauvegardées !")
-
-        # Afficher les résultats
-        for cat, data in all_data.items():
-            st.subheader(cat)
-            if data:
-                df = pd.DataFrame(data)
-                st.caption(f"Dataset : {len(df):,} lignes x {df.shape[1]} colonnes")
-                st.dataframe(df)
-            else:
-                st.caption("Dataset : 0 lignes x 0 colonnes")
-                st.write("Aucune donnée trouvée pour cette catégorie.")
-
-        # Réinitialiser le statut pour pouvoir relancer
-        st.session_state.scraping = False
-        status_placeholder.empty()
+    if st.button("Lancer le scraping"):
+        lancer_job("selenium")
+    suivi_job("selenium")
 
 # -----------------------------
-# OPTION BEAUTIFULSOUP (inchangée)
+# OPTION BEAUTIFULSOUP
 # -----------------------------
 elif menu_option == "Scraper en utilisant BeautifulSoup":
     st.info(f"Scraping {index_value} page(s) avec BeautifulSoup")
-    if st.button("Lancer le scraping") and not st.session_state.scraping:
-        st.session_state.scraping = True
-        status_placeholder = st.empty()
-        status_placeholder.markdown("**Scraping en cours, veuillez patienter ...**")
-
-        clear_table()
-
-        categories = {
-            "Chiens": "https://sn.coinafrique.com/categorie/chiens",
-            "Moutons": "https://sn.coinafrique.com/categorie/moutons",
-            "Poules / Lapins / Pigeons": "https://sn.coinafrique.com/categorie/poules-lapins-et-pigeons",
-            "Autres animaux": "https://sn.coinafrique.com/categorie/autres-animaux"
-        }
-
-        all_data = {}
-        progress_bar = st.progress(0)
-
-        with st.spinner("Scraping en cours, veuillez patienter ..."):
-            for i, (cat, url) in enumerate(categories.items(), 1):
-                from scrapers.beautifulsoup_scraper import scrape_category
-                data = scrape_category(cat, url, max_pages=index_value)
-                all_data[cat] = data
-                progress_bar.progress(i / len(categories))
-
-        st.success("Scraping terminé et données sauvegardées !")
-
-        for cat, data in all_data.items():
-            st.subheader(cat)
-            if data:
-                df = pd.DataFrame(data)
-                st.caption(f"Dataset : {len(df):,} lignes x {df.shape[1]} colonnes")
-                st.dataframe(df)
-            else:
-                st.caption("Dataset : 0 lignes x 0 colonnes")
-                st.write("Aucune donnée trouvée pour cette catégorie.")
-
-        st.session_state.scraping = False
-        status_placeholder.empty()
+    if st.button("Lancer le scraping"):
+        lancer_job("beautifulsoup")
+    suivi_job("beautifulsoup")
 # -----------------------------
 # AFFICHER TOUS LES CSV EXISTANTS
 # -----------------------------
@@ -151,7 +221,6 @@ elif menu_option == "Télécharger des données déjà scrapées (Web Scraper) (
     st.markdown("---")
 
     # Mapping des fichiers vers le label que tu veux afficher
-    csv_folder = "csv_data"
     csv_labels = {
         "chiens.csv": "Chiens 🐶",
         "moutons.csv": "Moutons 🐑",
@@ -159,19 +228,30 @@ elif menu_option == "Télécharger des données déjà scrapées (Web Scraper) (
         "autres.csv": "Autres animaux 🐓🐖"
     }
 
+    # Relu seulement si le fichier change (mtime dans la clé du cache)
+    @st.cache_data
+    def csv_normalise(csv_path, mtime):
+        return charger_csv(csv_path)
+
+    st.caption("Ces annonces sont aussi importées dans la base et prises en compte par le dashboard.")
     for file, label in csv_labels.items():
-        csv_path = os.path.join(csv_folder, file)
+        csv_path = os.path.join(CSV_DIR, file)
         if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
+            df = csv_normalise(csv_path, os.path.getmtime(csv_path))
             st.subheader(label)
-            st.caption(f"Dataset : {len(df):,} lignes x {df.shape[1]} colonnes")
+            st.caption(f"Dataset : {len(df):,} lignes x {df.shape[1]} colonnes (catégorie {CSV_CATEGORIES[file]})")
             st.dataframe(df)
+            with open(csv_path, "rb") as f:
+                st.download_button(f"Télécharger {file}", f, file_name=file, mime="text/csv", key=f"csv_{file}")
         else:
-            st.warning(f"Le fichier {file} est introuvable dans {csv_folder}/")
+            st.warning(f"Le fichier {file} est introuvable dans csv_data/")
 
 elif menu_option == "Voir dashboard des données":
     from dashboard import show_dashboard
     show_dashboard()
+elif menu_option == "Performance des scrapings":
+    from performance import show_performance
+    show_performance()
 
 elif menu_option == "Formulaire d'evaluation de l'application":
 
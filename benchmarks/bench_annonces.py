@@ -0,0 +1,72 @@
+"""
+Benchmark mémoire des annonces scrapées, par 100 000 annonces : liste de dicts
+(ancien format des scrapers), DataFrame construit depuis ces dicts, lot
+scrapers.annonces.Annonces et son to_frame(), plus la taille picklée (ce que
+les processus de scrapers/cli.py renvoient au processus principal).
+Chaque annonce reçoit ses propres chaînes, comme à la sortie du parser : les
+adresses répétées ne sont partagées que si le format les interne.
+
+    python -m benchmarks.bench_annonces --sizes 10000,100000
+"""
+import argparse
+import gc
+import pickle
+import random
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.fake_server import ADRESSES, TITRES
+from scrapers.annonces import Annonces
+
+FORMATS = ("dicts", "DataFrame (dicts)", "Annonces", "Annonces.to_frame()")
+
+
+def cartes(n, seed=0):
+    """(titre, prix, adresse, image) ; chaînes neuves à chaque carte, ~20 % de prix manquants."""
+    rng = random.Random(seed)
+    for i in range(n):
+        yield (f"{rng.choice(TITRES)} {rng.randint(1, 999)}",
+               None if rng.random() < 0.2 else float(rng.randint(1, 2000) * 500),
+               (rng.choice(ADRESSES) + " ")[:-1],
+               f"https://images.coinafrique.com/thumb_{2000000 + i}_uploaded_image1.jpg")
+
+
+def construire(format, n):
+    if format == "dicts":
+        return [{"Nom / Détails": nom, "Prix": prix, "Adresse": adresse, "Image": image}
+                for nom, prix, adresse, image in cartes(n)]
+    if format == "DataFrame (dicts)":
+        return pd.DataFrame(construire("dicts", n))
+    lot = Annonces()
+    for carte in cartes(n):
+        lot.ajouter(*carte)
+    return lot if format == "Annonces" else lot.to_frame()
+
+
+def mesurer(format, n):
+    """Octets encore alloués une fois l'objet construit (tracemalloc), et taille picklée."""
+    gc.collect()
+    tracemalloc.start()
+    objet = construire(format, n)
+    gc.collect()
+    occupe, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"octets": occupe, "pickle": len(pickle.dumps(objet))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000")
+    args = parser.parse_args()
+
+    print(f"{'annonces':>10} {'format':<22} {'mémoire':>12} {'/ 100k':>12} {'pickle':>12}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        for format in FORMATS:
+            r = mesurer(format, n)
+            print(f"{n:>10,} {format:<22} {r['octets'] / 1e6:>9.1f} Mo {r['octets'] / n * 1e5 / 1e6:>9.1f} Mo "
+                  f"{r['pickle'] / 1e6:>9.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark du chargement des agrégats du dashboard selon la taille de la table :
+requêtes d'agrégation sur animals (COUNT / AVG / GROUP BY, plus les lignes de
+l'histogramme) contre lecture des résumés tenus à jour par triggers
+(resume_categories, resume_adresses, resume_histogramme).
+
+    python -m benchmarks.bench_dashboard --sizes 10000,100000,1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_snapshot import remplir
+from database.scraping_db import (
+    _lire, annonces_par_categorie, create_connection, histogramme_prix, prix_moyen_par_categorie,
+    statistiques_globales, top_adresses
+)
+
+# Ancien calcul du dashboard, directement sur animals
+REQUETES_BRUTES = [
+    """SELECT COUNT(*), COUNT(DISTINCT categorie), AVG(prix), COUNT(DISTINCT adresse)
+       FROM animals WHERE prix IS NOT NULL""",
+    """SELECT adresse, COUNT(*) AS n FROM animals WHERE prix IS NOT NULL AND adresse IS NOT NULL
+       GROUP BY adresse ORDER BY n DESC LIMIT 7""",
+    """SELECT categorie, COUNT(*) AS n FROM animals WHERE prix IS NOT NULL AND categorie IS NOT NULL
+       GROUP BY categorie ORDER BY n DESC""",
+    """SELECT categorie, AVG(prix) FROM animals WHERE prix IS NOT NULL AND categorie IS NOT NULL
+       GROUP BY categorie ORDER BY categorie""",
+]
+
+
+def brut(db_path):
+    conn = create_connection(db_path)
+    try:
+        for sql in REQUETES_BRUTES:
+            conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+    _lire("SELECT categorie, prix FROM animals WHERE prix IS NOT NULL", db_path)
+
+
+def resumes(db_path):
+    statistiques_globales(db_path)
+    top_adresses(7, db_path)
+    annonces_par_categorie(db_path)
+    prix_moyen_par_categorie(db_path)
+    histogramme_prix(db_path)
+
+
+def chrono(fn, db_path, repeat):
+    fn(db_path)  # échauffement (cache de pages SQLite)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(db_path)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'annonces':>10} {'insertion':>10} {'agrégats bruts':>15} {'résumés':>10}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "animals.db")
+            start = time.perf_counter()
+            remplir(db_path, n)  # triggers actifs : les résumés sont tenus à jour à l'insertion
+            insertion = time.perf_counter() - start
+            t_brut = chrono(brut, db_path, args.repeat)
+            t_resume = chrono(resumes, db_path, args.repeat)
+            print(f"{n:>10,} {insertion:>9.2f}s {t_brut * 1000:>12.1f} ms {t_resume * 1000:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
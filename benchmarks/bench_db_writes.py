@@ -0,0 +1,63 @@
+"""
+Micro-benchmark : débit d'écriture (lignes/s) de save_to_db (une connexion
+et un commit par ligne) contre BatchWriter (connexion unique, WAL, executemany).
+
+Lancement depuis la racine du projet :
+    python -m benchmarks.bench_db_writes --rows 5000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from database import scraping_db
+from database.scraping_db import BatchWriter, create_table, save_to_db
+
+
+def fake_rows(n):
+    for i in range(n):
+        yield ("Chiens", f"Berger allemand {i}", float(50000 + i), "Dakar, Sénégal",
+               f"https://images.coinafrique.com/thumb_{2000000 + i}_uploaded_image1.jpg")
+
+
+def bench_save_to_db(db_path, n):
+    scraping_db.DB_PATH = db_path  # save_to_db utilise le chemin du module
+    start = time.perf_counter()
+    for row in fake_rows(n):
+        save_to_db(*row)
+    return time.perf_counter() - start
+
+
+def bench_batch_writer(db_path, n, batch_size):
+    start = time.perf_counter()
+    with BatchWriter(db_path, batch_size=batch_size) as writer:
+        for row in fake_rows(n):
+            writer.add(*row)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    original_path = scraping_db.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name in ("save_to_db", "BatchWriter"):
+            db_path = os.path.join(tmp, f"{name}.db")
+            create_table(db_path)
+            if name == "save_to_db":
+                elapsed = bench_save_to_db(db_path, args.rows)
+            else:
+                elapsed = bench_batch_writer(db_path, args.rows, args.batch_size)
+            results[name] = args.rows / elapsed
+            print(f"{name:<12} {args.rows} lignes en {elapsed:.3f}s -> {results[name]:,.0f} lignes/s")
+    scraping_db.DB_PATH = original_path
+
+    print(f"Accélération : x{results['BatchWriter'] / results['save_to_db']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark de la détection des quasi-doublons (database/doublons.py) sur des
+annonces synthétiques où une part des annonces est republiée quelques
+identifiants plus loin, avec des variantes de casse, d'accents et de
+ponctuation dans le titre et l'adresse. Mesure :
+- le calcul des clés de bloc (cle_doublon) ;
+- marquer_doublons() sur la table entière (tous les blocs à revoir) ;
+- précision et rappel par rapport aux republications injectées ;
+- la comparaison naïve deux à deux, sur un échantillon seulement (O(n²)).
+
+    python -m benchmarks.bench_doublons --size 1000000 --naive 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_snapshot import VILLES
+from database.doublons import ECART_MAX, cle_doublon, marquer_doublons, normaliser
+from database.scraping_db import create_connection, create_table
+from scrapers.config import CATEGORIES
+
+TITRES = ["Bélier Ladoum", "Mouton Tabaski", "Berger allemand", "Chiots Malinois", "Poulets de chair",
+          "Lapins géants", "Pigeons voyageurs", "Bœufs de trait", "Chèvres naines", "Chat persan"]
+
+
+def _variante(texte, rng):
+    """Même texte, saisi autrement : casse, accents ou ponctuation."""
+    choix = rng.integers(0, 3)
+    if choix == 0:
+        return texte.upper()
+    if choix == 1:
+        return normaliser(texte)
+    return texte.replace(" ", " - ") + " !"
+
+
+def generer(n, taux, seed=0):
+    """
+    Lignes (annonce_id, categorie, nom, prix, adresse) et ensemble des
+    republications injectées {annonce_id: annonce_id de l'originale}.
+    """
+    rng = np.random.default_rng(seed)
+    categories = list(CATEGORIES)
+    lignes, attendus = [], {}
+    annonce_id = 0
+    while len(lignes) < n:
+        annonce_id += int(rng.integers(1, 3))
+        if lignes and rng.random() < taux:
+            # Republication d'une annonce récente, quelques identifiants plus loin
+            source = lignes[-int(rng.integers(1, min(len(lignes), 20) + 1))]
+            if annonce_id - source[0] > ECART_MAX:
+                continue
+            originale = attendus.get(source[0], source[0])
+            lignes.append((annonce_id, source[1], _variante(source[2], rng), source[3],
+                           _variante(source[4], rng)))
+            attendus[annonce_id] = originale
+        else:
+            # Titre numéroté : deux annonces indépendantes ne partagent (presque) jamais de bloc
+            lignes.append((annonce_id, categories[rng.integers(0, len(categories))],
+                           f"{TITRES[rng.integers(0, len(TITRES))]} {rng.integers(0, 1_000_000)}",
+                           float(rng.integers(1, 2000) * 500), VILLES[rng.integers(0, len(VILLES))]))
+    return lignes, attendus
+
+
+def naif(lignes, ecart_max=ECART_MAX):
+    """Comparaison de chaque paire (titres et adresses normalisés) : référence O(n²)."""
+    normalisees = [(aid, cat, normaliser(nom), prix, normaliser(adresse))
+                   for aid, cat, nom, prix, adresse in lignes]
+    doublons = {}
+    for i, a in enumerate(normalisees):
+        for b in normalisees[:i]:
+            if a[1:] == b[1:] and 0 < a[0] - b[0] <= ecart_max:
+                doublons[a[0]] = doublons.get(b[0], b[0])
+                break
+    return doublons
+
+
+def scores(trouves, attendus):
+    vrais = sum(1 for aid, originale in trouves.items() if attendus.get(aid) == originale)
+    precision = vrais / len(trouves) if trouves else 1.0
+    rappel = vrais / len(attendus) if attendus else 1.0
+    return precision, rappel
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--rate", type=float, default=0.05, help="part des annonces republiées")
+    parser.add_argument("--naive", type=int, default=10_000, help="taille de l'échantillon naïf (0 : aucun)")
+    args = parser.parse_args()
+
+    lignes, attendus = generer(args.size, args.rate)
+    print(f"{len(lignes):,} annonces, {len(attendus):,} republications injectées")
+
+    start = time.perf_counter()
+    cles = [cle_doublon(cat, nom, prix, adresse) for _, cat, nom, prix, adresse in lignes]
+    print(f"clés de bloc         : {time.perf_counter() - start:.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "animals.db")
+        create_table(db_path)
+        conn = create_connection(db_path)
+        conn.executemany(
+            "INSERT INTO animals (annonce_id, categorie, nom, prix, adresse, cle_doublon) VALUES (?, ?, ?, ?, ?, ?)",
+            (ligne + (cle,) for ligne, cle in zip(lignes, cles))
+        )
+        conn.commit()
+        conn.close()
+
+        start = time.perf_counter()
+        changements = marquer_doublons(db_path)
+        print(f"marquer_doublons     : {time.perf_counter() - start:.2f}s ({changements:,} annonces marquées)")
+        start = time.perf_counter()
+        marquer_doublons(db_path)
+        print(f"second passage       : {time.perf_counter() - start:.3f}s (aucun bloc modifié)")
+
+        conn = create_connection(db_path)
+        trouves = dict(conn.execute(
+            "SELECT annonce_id, doublon_de FROM animals WHERE doublon_de IS NOT NULL"
+        ).fetchall())
+        conn.close()
+    precision, rappel = scores(trouves, attendus)
+    print(f"précision {precision:.4f}, rappel {rappel:.4f}")
+
+    if args.naive:
+        echantillon = lignes[:args.naive]
+        start = time.perf_counter()
+        reference = naif(echantillon)
+        naive = time.perf_counter() - start
+        limite = echantillon[-1][0]
+        bloc = {aid: o for aid, o in trouves.items() if aid <= limite}
+        print(f"naïf sur {len(echantillon):,} annonces : {naive:.2f}s, "
+              f"accord avec les blocs : {'oui' if reference == bloc else 'non'}")
+
+
+if __name__ == "__main__":
+    main()
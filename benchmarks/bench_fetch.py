@@ -0,0 +1,67 @@
+"""
+Benchmark : scraping BeautifulSoup contre le serveur local (benchmarks/fake_server.py),
+en séquentiel (une catégorie après l'autre, un fetcher mono-thread)
+puis en parallèle (toutes les pages de toutes les catégories via un PageFetcher partagé).
+Avec --failures, le serveur répond 503 (ou --status) à cette part des requêtes et
+le rapport du FetchController (pages obtenues, retentées, abandonnées) est affiché.
+
+    python -m benchmarks.bench_fetch --pages 10
+    python -m benchmarks.bench_fetch --pages 10 --failures 0.3 --status 429
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.fake_server import FakeCoinAfrique
+from database.scraping_db import BatchWriter, create_table
+from scrapers.beautifulsoup_scraper import scrape_categories, scrape_category
+from scrapers.fetcher import PageFetcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--failures", type=float, default=0.0, help="part des requêtes en erreur")
+    parser.add_argument("--status", type=int, default=503, help="code des erreurs simulées")
+    args = parser.parse_args()
+
+    with FakeCoinAfrique(failure_rate=args.failures, failure_status=args.status) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        categories = server.categories()
+        db_path = os.path.join(tmp, "bench.db")
+        create_table(db_path)
+
+        with BatchWriter(db_path) as writer, \
+                PageFetcher(max_workers=1, per_host=1, min_interval=0) as fetcher:
+            start = time.perf_counter()
+            sequentiel = {
+                cat: scrape_category(cat, url, args.pages, writer=writer, fetcher=fetcher)
+                for cat, url in categories.items()
+            }
+            t_seq = time.perf_counter() - start
+
+        with BatchWriter(db_path) as writer, \
+                PageFetcher(max_workers=args.workers, per_host=args.workers, min_interval=0) as fetcher:
+            start = time.perf_counter()
+            parallele = scrape_categories(categories, args.pages, writer=writer, fetcher=fetcher)
+            t_par = time.perf_counter() - start
+
+            rapport = fetcher.controller.report()
+
+        if args.failures:
+            print(f"{server.failures_count} erreurs simulées ; rapport du run parallèle : "
+                  f"{rapport['fetched']} obtenues, {rapport['retried']} retentées, "
+                  f"{rapport['dropped']} abandonnées, {rapport['requests']} requêtes")
+        elif sequentiel != parallele:
+            raise AssertionError("les deux modes doivent retourner les mêmes annonces")
+        n_pages = len(categories) * args.pages
+        n_annonces = sum(len(v) for v in parallele.values())
+        print(f"{n_pages} pages, {n_annonces} annonces")
+        print(f"séquentiel : {t_seq:.3f}s ({n_pages / t_seq:,.1f} pages/s)")
+        print(f"parallèle  : {t_par:.3f}s ({n_pages / t_par:,.1f} pages/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark du téléchargement des miniatures (scrapers/images.py) contre le
+serveur local (benchmarks/fake_server.py, local_images) :
+- scraping BeautifulSoup avec l'étape precharger_images, selon la taille du pool ;
+- second passage : miniatures servies par le cache, aucune requête d'image ;
+- cache plafonné : évictions LRU.
+
+    python -m benchmarks.bench_images --pages 5 --workers 1,4,8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.fake_server import FakeCoinAfrique
+from database.scraping_db import BatchWriter, create_table
+from scrapers.beautifulsoup_scraper import iter_categories
+from scrapers.fetch_control import FetchController
+from scrapers.fetcher import PageFetcher
+from scrapers.images import ImageCache, ImagePrefetcher
+from scrapers.pipeline import precharger_images, sauvegarder
+
+
+def scraper(server, pages, db_path, cache, workers):
+    """Scraping complet avec téléchargement des miniatures ; retourne (durée, stats du prefetcher)."""
+    images_avant = server.images_count
+    start = time.perf_counter()
+    with BatchWriter(db_path) as writer, PageFetcher(min_interval=0) as fetcher, \
+            ImagePrefetcher(cache, max_workers=workers, controller=FetchController(rate=None)) as prefetcher:
+        for _ in precharger_images(sauvegarder(iter_categories(server.categories(), pages, fetcher), writer),
+                                   prefetcher):
+            pass
+    return time.perf_counter() - start, dict(prefetcher.summary(), requetes=server.images_count - images_avant)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--workers", default="1,4,8")
+    args = parser.parse_args()
+
+    with FakeCoinAfrique(local_images=True) as server, tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        create_table(db_path)
+
+        print(f"{'pool':>5} {'temps':>8} {'téléchargées':>13} {'en cache':>9} {'requêtes':>9}")
+        for workers in (int(w) for w in args.workers.split(",")):
+            cache = ImageCache(os.path.join(tmp, f"images_{workers}"))
+            for passage in ("1er", "2e"):
+                duree, stats = scraper(server, args.pages, db_path, cache, workers)
+                print(f"{workers:>5} {duree:>7.3f}s {stats['downloaded']:>13} {stats['cached']:>9} "
+                      f"{stats['requetes']:>9}  ({passage} passage)")
+            print(f"      cache : {cache.summary()}")
+            cache.close()
+
+        # Plafond de 20 Kio : les miniatures les moins récemment lues sont évincées
+        cache = ImageCache(os.path.join(tmp, "images_plafond"), max_bytes=20 * 1024)
+        scraper(server, args.pages, db_path, cache, 4)
+        print(f"cache plafonné à 20 Kio : {cache.summary()}")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
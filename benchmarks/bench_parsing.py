@@ -0,0 +1,69 @@
+"""
+Benchmark des backends de parsing (scrapers/parsing.py) sur les pages de
+benchmarks/fixtures/ : cartes/s, pic mémoire Python (tracemalloc) et
+croissance du pic RSS. Chaque backend tourne dans un processus neuf pour
+que les pics mémoire ne se mélangent pas.
+
+    python -m benchmarks.bench_parsing --repeat 50
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import resource
+import time
+import tracemalloc
+
+from benchmarks.fake_server import FIXTURES_DIR
+from scrapers.parsing import BACKENDS, extract_cards
+
+
+def load_pages():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages
+
+
+def run_backend(backend, repeat):
+    pages = load_pages()
+    extract_cards(pages[0], backend)  # échauffement (imports, caches)
+    rss_avant = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    cartes = 0
+    for _ in range(repeat):
+        for html in pages:
+            cartes += len(extract_cards(html, backend))
+    elapsed = time.perf_counter() - start
+    _, pic_python = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rss_apres = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "backend": backend,
+        "cartes": cartes,
+        "cartes_par_s": cartes / elapsed,
+        "pic_python_kio": pic_python / 1024,
+        "pic_rss_kio": rss_apres - rss_avant,  # ru_maxrss est en Kio sous Linux
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'backend':<12} {'cartes/s':>10} {'pic Python':>12} {'pic RSS':>10}")
+    for backend in BACKENDS:
+        with ctx.Pool(1) as pool:
+            r = pool.apply(run_backend, (backend, args.repeat))
+        print(f"{r['backend']:<12} {r['cartes_par_s']:>10,.0f} "
+              f"{r['pic_python_kio']:>8,.0f} Kio {r['pic_rss_kio']:>6,} Kio")
+
+
+if __name__ == "__main__":
+    main()
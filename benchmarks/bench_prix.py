@@ -0,0 +1,66 @@
+"""
+Benchmark de la normalisation des prix sur des valeurs synthétiques au format
+CoinAfrique : nettoyer_prix appliqué valeur par valeur, contre
+nettoyer_prix_series (pandas / Arrow) et nettoyer_prix_arrow (pyarrow.compute).
+
+    python -m benchmarks.bench_prix --n 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from scrapers.prix import nettoyer_prix, nettoyer_prix_arrow, nettoyer_prix_series
+
+
+def prix_synthetiques(n, seed=0):
+    rng = np.random.default_rng(seed)
+    montants = rng.integers(1, 2000, n) * 500
+    formats = rng.integers(0, 5, n)
+    valeurs = []
+    for montant, fmt in zip(montants.tolist(), formats.tolist()):
+        if fmt == 0:
+            valeurs.append("Prix sur demande")
+        elif fmt == 1:
+            valeurs.append(f"{montant:,}".replace(",", " ") + "CFA")   # "350 000CFA"
+        elif fmt == 2:
+            valeurs.append(f"{montant:,} CFA")                         # "1,500 CFA"
+        elif fmt == 3:
+            valeurs.append(f" {montant} ")
+        else:
+            valeurs.append(None)
+    return pd.Series(valeurs, dtype=object)
+
+
+def chrono(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    serie = prix_synthetiques(args.n)
+    tableau = pa.array(serie, type=pa.string())
+
+    reference, t_scalaire = chrono(lambda: serie.map(nettoyer_prix))
+    vect, t_series = chrono(lambda: nettoyer_prix_series(serie))
+    arrow, t_arrow = chrono(lambda: nettoyer_prix_arrow(tableau))
+
+    assert np.allclose(reference.to_numpy(float), vect.to_numpy(float), equal_nan=True)
+    assert np.allclose(reference.to_numpy(float), arrow.to_numpy(zero_copy_only=False), equal_nan=True)
+
+    print(f"{args.n:,} prix")
+    for nom, t in (("nettoyer_prix (map)", t_scalaire),
+                   ("nettoyer_prix_series", t_series),
+                   ("nettoyer_prix_arrow", t_arrow)):
+        print(f"{nom:<22} {t:.3f}s  {args.n / t:>12,.0f} prix/s  x{t_scalaire / t:.1f}")
+
+
+if __name__ == "__main__":
+    main()
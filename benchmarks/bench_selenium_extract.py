@@ -0,0 +1,42 @@
+"""
+Benchmark des modes d'extraction Selenium ("elements", "js", "source") sur une
+page enregistrée servie par le serveur local. Nécessite Chrome installé.
+
+    python -m benchmarks.bench_selenium_extract --repeat 20
+"""
+import argparse
+import time
+
+from benchmarks.fake_server import FakeCoinAfrique
+from scrapers.driver_pool import DriverPool
+from scrapers.selenium_scraper import EXTRACTION_MODES, scrape_page_selenium
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--category", default="Chiens")
+    args = parser.parse_args()
+
+    with FakeCoinAfrique() as server, DriverPool(size=1) as pool:
+        url = server.categories()[args.category] + "?page=1"
+        reference = None
+        with pool.acquire() as driver:
+            for mode in EXTRACTION_MODES:
+                scrape_page_selenium(driver, url, mode=mode)  # échauffement
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    annonces = scrape_page_selenium(driver, url, mode=mode)
+                elapsed = (time.perf_counter() - start) / args.repeat
+                print(f"{mode:<9} {len(annonces)} cartes : {elapsed * 1000:.1f} ms/page")
+
+                # Les trois modes doivent extraire les mêmes titres, adresses et images
+                cles = [(a.nom, a.adresse, a.image) for a in annonces]
+                if reference is None:
+                    reference = cles
+                elif cles != reference:
+                    print(f"  attention : le mode {mode} diffère du mode {EXTRACTION_MODES[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark de chargement des données du dashboard : SQLite contre instantané
+Parquet (database/snapshots.py), sur des annonces synthétiques. Pour chaque
+taille, mesure le temps de chargement, la croissance du RSS (DataFrame encore
+en mémoire) et celle du pic RSS de :
+- sqlite *        : SELECT * FROM animals (ancien chargement du dashboard)
+- sqlite colonnes : prix_par_categorie (catégorie, prix)
+- parquet         : charger_snapshot(["categorie", "prix"]) en mémoire mappée
+Chaque chargement tourne dans un processus neuf pour que les pics RSS ne se
+mélangent pas.
+
+    python -m benchmarks.bench_snapshot --sizes 10000,100000,1000000
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from database.scraping_db import _lire, create_connection, create_table, prix_par_categorie
+from database.snapshots import charger_snapshot, ecrire_snapshot
+from scrapers.config import CATEGORIES
+
+VILLES = ["Dakar, Sénégal", "Fann, Dakar, Sénégal", "Yoff, Dakar, Sénégal", "Louga, Sénégal",
+          "Thiès, Sénégal", "Mbao, Dakar, Sénégal", "Guediawaye, Dakar, Sénégal"]
+
+
+def remplir(db_path, n, seed=0):
+    """n annonces synthétiques (dont ~20 % sans prix) dans une base neuve."""
+    rng = np.random.default_rng(seed)
+    categories = list(CATEGORIES)
+    cats = rng.integers(0, len(categories), n).tolist()
+    villes = rng.integers(0, len(VILLES), n).tolist()
+    prix = (rng.integers(1, 2000, n) * 500).astype(float)
+    prix[rng.random(n) < 0.2] = np.nan
+    create_table(db_path)
+    conn = create_connection(db_path)
+    conn.executemany(
+        "INSERT INTO animals (annonce_id, categorie, nom, prix, adresse, image_lien) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (i, categories[c], f"Annonce {i}", None if np.isnan(p) else p, VILLES[v],
+             f"https://images.coinafrique.com/thumb_{i}_uploaded_image1.jpg")
+            for i, (c, v, p) in enumerate(zip(cats, villes, prix.tolist()))
+        )
+    )
+    conn.commit()
+    conn.close()
+
+
+def charger(methode, db_path, snapshot_dir):
+    if methode == "sqlite *":
+        return _lire("SELECT * FROM animals", db_path)
+    if methode == "sqlite colonnes":
+        return prix_par_categorie(db_path)
+    return charger_snapshot(["categorie", "prix"], prix_connu=True, directory=snapshot_dir)
+
+
+def rss_kio():
+    """RSS courant du processus (Linux : /proc/self/statm)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def mesurer(methode, db_path, snapshot_dir):
+    rss_avant = rss_kio()
+    pic_avant = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    df = charger(methode, db_path, snapshot_dir)
+    elapsed = time.perf_counter() - start
+    return {
+        "lignes": len(df),
+        "secondes": elapsed,
+        "rss_kio": rss_kio() - rss_avant,  # DataFrame chargé encore en mémoire
+        "pic_rss_kio": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - pic_avant,  # Kio sous Linux
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'annonces':>10} {'méthode':<18} {'lignes':>10} {'temps':>9} {'RSS':>12} {'pic RSS':>12}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "animals.db")
+            snapshot_dir = os.path.join(tmp, "snapshots")
+            remplir(db_path, n)
+            start = time.perf_counter()
+            ecrire_snapshot(db_path, snapshot_dir)
+            print(f"{n:>10,} {'(écriture parquet)':<18} {'':>10} {time.perf_counter() - start:>8.3f}s")
+            for methode in ("sqlite *", "sqlite colonnes", "parquet"):
+                with ctx.Pool(1) as pool:
+                    r = pool.apply(mesurer, (methode, db_path, snapshot_dir))
+                print(f"{n:>10,} {methode:<18} {r['lignes']:>10,} {r['secondes']:>8.3f}s "
+                      f"{r['rss_kio']:>8,} Kio {r['pic_rss_kio']:>8,} Kio")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Serveur HTTP local qui imite CoinAfrique à partir des pages enregistrées
+dans benchmarks/fixtures/ : GET /categorie/<slug>?page=N renvoie <slug>.html.
+Les réponses portent ETag et Last-Modified ; une requête conditionnelle
+qui correspond reçoit un 304 sans corps. failure_rate simule un site
+surchargé : cette part des requêtes reçoit failure_status (503 par défaut,
+429 avec Retry-After).
+Avec local_images, les liens d'images des pages pointent vers le serveur :
+GET /images/<nom> renvoie une miniature PNG générée à partir du nom (la même
+à chaque requête), de quoi tester le cache d'images sans le CDN.
+Avec cartes, les pages ne viennent plus des fixtures : chaque page
+/categorie/<slug>?page=N est générée avec ce nombre de cartes (annonces
+toutes différentes, déterministes pour un même slug et un même numéro),
+jusqu'à pages_max ; au-delà, la page est vide. latency retarde chaque
+réponse de page (secondes), comme un site distant.
+
+Utilisation :
+    with FakeCoinAfrique() as server:
+        categories = server.categories()   # mêmes libellés que scrapers.config.CATEGORIES
+        scrape_categories(categories, max_pages=3)
+
+Ou en serveur autonome, pour faire tourner l'application ou scrapers/cli.py hors ligne :
+    python -m benchmarks.fake_server --port 8000 --cartes 84 --latence 0.2
+    COINAFRIQUE_URL=http://127.0.0.1:8000 streamlit run app.py
+"""
+import argparse
+import hashlib
+import io
+import os
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from html import escape
+from urllib.parse import parse_qs, urlsplit
+
+from PIL import Image
+
+from scrapers.config import CATEGORIES
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, comme le vrai site
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests_count += 1
+        if server.failure_rate and server.random.random() < server.failure_rate:
+            with server.lock:
+                server.failures_count += 1
+            self.send_response(server.failure_status)
+            if server.failure_status == 429:
+                self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        url = urlsplit(self.path)
+        path = url.path
+        if path.startswith("/images/"):
+            self._image(path[len("/images/"):])
+            return
+        body = None
+        if path.startswith("/categorie/"):
+            slug = path[len("/categorie/"):]
+            if server.cards is None:
+                body = server.pages.get(slug)
+            else:
+                page = int(parse_qs(url.query).get("page", ["1"])[0])
+                n = server.cards if server.pages_max is None or page <= server.pages_max else 0
+                body = page_synthetique(slug, page, n, server.image_base)
+        if body is None:
+            self.send_error(404)
+            return
+
+        # Validateurs HTTP : ETag = empreinte du contenu, Last-Modified = démarrage du serveur
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if (self.headers.get("If-None-Match") == etag
+                or self.headers.get("If-Modified-Since") == server.last_modified):
+            with server.lock:
+                server.not_modified_count += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        if server.latency:
+            time.sleep(server.latency)
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", server.last_modified)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _image(self, nom):
+        with self.server.lock:
+            self.server.images_count += 1
+        body = miniature(nom)
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def miniature(nom, taille=64):
+    """PNG déterministe : dégradé et bandes dont l'orientation et les couleurs dépendent du nom."""
+    graine = hashlib.sha1(nom.encode()).digest()
+    image = Image.new("RGB", (taille, taille))
+    pas = 4 + graine[3] % 12
+    image.putdata([
+        (graine[0] ^ (x * 4), graine[1] ^ (y * 4), 255 if ((x if graine[4] % 2 else y) // pas) % 2 else graine[2])
+        for y in range(taille) for x in range(taille)
+    ])
+    sortie = io.BytesIO()
+    image.save(sortie, format="PNG")
+    return sortie.getvalue()
+
+
+# Matière des pages synthétiques
+TITRES = ["Bélier Ladoum", "Mouton Tabaski", "Berger allemand", "Chiots Malinois", "Poulets de chair",
+          "Lapins géants", "Pigeons voyageurs", "Chèvres naines", "Chat persan", "Pékinois"]
+ADRESSES = ["Dakar, Sénégal", "Fann, Dakar, Sénégal", "Yoff, Dakar, Sénégal", "Louga, Sénégal",
+            "Thiès, Sénégal", "Mbao, Dakar, Sénégal", "Guediawaye, Dakar, Sénégal"]
+
+_CARTE = """      <div class="col s6 m4 l3">
+        <div class="card ad__card round small hoverable">
+          <div class="card-image ad__card-image">
+            <a class="card-image ad__card-image waves-block waves-light" href="/annonce/{slug}/{id}" title="{titre}">
+              <img class="ad__card-img" src="{image_base}thumb_{id}_uploaded_image1.png" alt="{titre}">
+            </a>
+          </div>
+          <div class="card-content ad__card-content">
+            <p class="ad__card-price"><a href="/annonce/{slug}/{id}">{prix}</a></p>
+            <p class="ad__card-description"><a href="/annonce/{slug}/{id}" title="{titre}">{titre}</a></p>
+            <p class="ad__card-location"><span>{adresse}</span></p>
+          </div>
+        </div>
+      </div>
+"""
+
+
+def page_synthetique(slug, page, cartes, image_base="https://images.coinafrique.com/"):
+    """
+    Page de catégorie au format des fixtures avec cartes annonces : identifiants
+    décroissants d'une page à l'autre (les plus récentes d'abord), titres, prix
+    (formats variés, dont "Prix sur demande") et adresses tirés du slug et du numéro.
+    """
+    rng = random.Random(f"{slug}:{page}")
+    # Bloc d'identifiants propre au slug, puis à la page
+    premier = 10_000_000 * (1 + int(hashlib.sha1(slug.encode()).hexdigest(), 16) % 90) - page * cartes
+    corps = []
+    for i in range(cartes):
+        montant = rng.randint(1, 2000) * 500
+        prix = rng.choice([f"{montant:,}".replace(",", " ") + " CFA", f"{montant:,} CFA", "Prix sur demande"])
+        corps.append(_CARTE.format(
+            slug=slug, id=premier - i, image_base=image_base, prix=prix,
+            titre=escape(f"{rng.choice(TITRES)} {rng.randint(1, 999)}"), adresse=rng.choice(ADRESSES)
+        ))
+    return (
+        '<!DOCTYPE html>\n<html lang="fr">\n<head>\n  <meta charset="utf-8">\n'
+        f"  <title>{slug} - CoinAfrique Sénégal</title>\n</head>\n<body>\n"
+        '  <main class="container">\n    <div class="row adcard__listing">\n'
+        + "".join(corps)
+        + "    </div>\n  </main>\n</body>\n</html>\n"
+    ).encode("utf-8")
+
+
+class FakeCoinAfrique:
+    """Démarre le serveur dans un thread sur un port libre de 127.0.0.1."""
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR, failure_rate=0.0, failure_status=503, seed=0,
+                 local_images=False, cards=None, pages_max=None, latency=0.0, port=0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.lock = threading.Lock()
+        self.httpd.requests_count = 0
+        self.httpd.not_modified_count = 0
+        self.httpd.failures_count = 0
+        self.httpd.failure_rate = failure_rate
+        self.httpd.failure_status = failure_status
+        self.httpd.random = random.Random(seed)
+        self.httpd.images_count = 0
+        self.httpd.cards = cards
+        self.httpd.pages_max = pages_max
+        self.httpd.latency = latency
+        self.httpd.image_base = f"{self.base_url}/images/" if local_images else "https://images.coinafrique.com/"
+        self.httpd.last_modified = formatdate(usegmt=True)
+        self.httpd.pages = {}
+        for name in os.listdir(fixtures_dir):
+            if name.endswith(".html"):
+                with open(os.path.join(fixtures_dir, name), "rb") as f:
+                    body = f.read()
+                if local_images:
+                    body = body.replace(b"https://images.coinafrique.com/", f"{self.base_url}/images/".encode())
+                self.httpd.pages[name[:-len(".html")]] = body
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests_count(self):
+        return self.httpd.requests_count
+
+    @property
+    def not_modified_count(self):
+        """Nombre de réponses 304 envoyées (requêtes conditionnelles satisfaites)."""
+        return self.httpd.not_modified_count
+
+    @property
+    def failures_count(self):
+        """Nombre de réponses en erreur simulées (failure_rate)."""
+        return self.httpd.failures_count
+
+    @property
+    def images_count(self):
+        """Nombre de miniatures servies (local_images)."""
+        return self.httpd.images_count
+
+    def categories(self):
+        """CATEGORIES avec les URLs réécrites vers le serveur local."""
+        return {
+            cat: self.base_url + urlsplit(url).path
+            for cat, url in CATEGORIES.items()
+        }
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur local qui imite CoinAfrique.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--cartes", type=int, default=None, help="pages synthétiques de N cartes (défaut : fixtures)")
+    parser.add_argument("--pages-max", type=int, default=None, help="dernière page non vide (pages synthétiques)")
+    parser.add_argument("--latence", type=float, default=0.0, help="délai de chaque page (secondes)")
+    parser.add_argument("--failures", type=float, default=0.0, help="part des requêtes en erreur")
+    parser.add_argument("--images", action="store_true", help="servir aussi les miniatures")
+    args = parser.parse_args()
+
+    server = FakeCoinAfrique(failure_rate=args.failures, local_images=args.images, cards=args.cartes,
+                             pages_max=args.pages_max, latency=args.latence, port=args.port)
+    print(f"Serveur sur {server.base_url} (Ctrl+C pour arrêter)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Suite de benchmarks hors ligne, résultats en JSON pour suivre les régressions
+d'une version à l'autre. Mesures (chacune à plusieurs tailles) :
+- scraping  : scrape_category de bout en bout contre le serveur local en pages
+              synthétiques (benchmarks/fake_server.py), par nombre de cartes par page ;
+- parsing   : cartes/s de chaque backend sur les pages de benchmarks/fixtures/ ;
+- prix      : normalisation des prix (valeur par valeur, pandas, Arrow) ;
+- db        : écriture BatchWriter ;
+- dashboard : chargement (SQLite, instantané Parquet) et agrégats (requêtes brutes, résumés) ;
+- annonces  : mémoire par annonce, liste de dicts contre lot Annonces (benchmarks/bench_annonces.py).
+
+    python -m benchmarks.suite --tailles 10000,100000 --sortie avant.json
+    python -m benchmarks.suite --tailles 10000,100000 --comparer avant.json
+
+Chaque mesure garde le meilleur de --repeat passages (5 par défaut). Avec
+--comparer, chaque mesure est comparée à celle du fichier donné ; le code de
+sortie vaut 1 si l'une se dégrade de plus de --seuil (10 % par défaut).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pyarrow as pa
+
+from benchmarks.bench_annonces import mesurer as mesurer_memoire
+from benchmarks.bench_dashboard import brut, resumes
+from benchmarks.bench_db_writes import bench_batch_writer
+from benchmarks.bench_parsing import load_pages
+from benchmarks.bench_prix import prix_synthetiques
+from benchmarks.bench_snapshot import remplir
+from benchmarks.fake_server import FakeCoinAfrique
+from database.scraping_db import BatchWriter, create_table, prix_par_categorie
+from database.snapshots import charger_snapshot, ecrire_snapshot
+from scrapers.beautifulsoup_scraper import scrape_category
+from scrapers.fetch_control import FetchController
+from scrapers.fetcher import PageFetcher
+from scrapers.parsing import BACKENDS, extract_cards
+from scrapers.prix import nettoyer_prix, nettoyer_prix_arrow, nettoyer_prix_series
+
+BENCHS = ("scraping", "parsing", "prix", "db", "dashboard", "annonces")
+RESULTATS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultats")
+
+
+def mesure(bench, variante, taille, valeur, unite):
+    """Une ligne de résultat ; unite en "/s" : plus c'est haut, mieux c'est, sinon l'inverse."""
+    return {"bench": bench, "variante": variante, "taille": taille, "valeur": valeur, "unite": unite}
+
+
+def meilleur(fn, repeat):
+    """
+    (durée la plus courte de fn() sur repeat exécutions, résultat de la dernière) :
+    le meilleur passage est le moins perturbé par le reste de la machine.
+    """
+    durees = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        resultat = fn()
+        durees.append(time.perf_counter() - start)
+    return min(durees), resultat
+
+
+def bench_scraping(tmp, cartes, pages, latence, repeat):
+    resultats = []
+    for n in cartes:
+        essais = iter(range(repeat))
+
+        def scraper():
+            # Base neuve à chaque passage : pas d'upsert sur les annonces du précédent
+            db_path = os.path.join(tmp, f"scraping_{n}_{next(essais)}.db")
+            create_table(db_path)
+            with BatchWriter(db_path) as writer, \
+                    PageFetcher(min_interval=0, controller=FetchController(rate=None)) as fetcher:
+                return sum(len(scrape_category(cat, url, pages, writer=writer, fetcher=fetcher))
+                           for cat, url in server.categories().items())
+
+        with FakeCoinAfrique(cards=n, latency=latence) as server:
+            elapsed, annonces = meilleur(scraper, repeat)
+            n_pages = pages * len(server.categories())
+        resultats.append(mesure("scraping", f"{n} cartes/page", n_pages, n_pages / elapsed, "pages/s"))
+        resultats.append(mesure("scraping", f"{n} cartes/page", n_pages, annonces / elapsed, "annonces/s"))
+    return resultats
+
+
+def bench_parsing(repeat):
+    pages = load_pages()
+    resultats = []
+    for backend in BACKENDS:
+        extract_cards(pages[0], backend)  # échauffement
+        elapsed, cartes = meilleur(lambda: sum(len(extract_cards(html, backend)) for html in pages), repeat)
+        resultats.append(mesure("parsing", backend, cartes, cartes / elapsed, "cartes/s"))
+    return resultats
+
+
+def bench_prix(tailles, repeat):
+    resultats = []
+    for n in tailles:
+        serie = prix_synthetiques(n)
+        tableau = pa.array(serie, type=pa.string())
+        for variante, fn in (("nettoyer_prix (map)", lambda: serie.map(nettoyer_prix)),
+                             ("nettoyer_prix_series", lambda: nettoyer_prix_series(serie)),
+                             ("nettoyer_prix_arrow", lambda: nettoyer_prix_arrow(tableau))):
+            elapsed, _ = meilleur(fn, repeat)
+            resultats.append(mesure("prix", variante, n, n / elapsed, "prix/s"))
+    return resultats
+
+
+def bench_db(tmp, tailles, repeat):
+    resultats = []
+    for n in tailles:
+        durees = []
+        for essai in range(repeat):
+            # Base neuve à chaque passage : des insertions, pas des mises à jour
+            db_path = os.path.join(tmp, f"db_{n}_{essai}.db")
+            create_table(db_path)
+            durees.append(bench_batch_writer(db_path, n, 500))
+        resultats.append(mesure("db", "BatchWriter", n, n / min(durees), "lignes/s"))
+    return resultats
+
+
+def bench_dashboard(tmp, tailles, repeat):
+    resultats = []
+    for n in tailles:
+        db_path = os.path.join(tmp, f"dashboard_{n}.db")
+        snapshot_dir = os.path.join(tmp, f"snapshots_{n}")
+        remplir(db_path, n)
+        elapsed, _ = meilleur(lambda: ecrire_snapshot(db_path, snapshot_dir), repeat)
+        resultats.append(mesure("dashboard", "écriture parquet", n, elapsed, "s"))
+        for variante, fn in (
+            ("chargement sqlite", lambda: prix_par_categorie(db_path)),
+            ("chargement parquet", lambda: charger_snapshot(["categorie", "prix"], prix_connu=True,
+                                                            directory=snapshot_dir)),
+            ("agrégats bruts", lambda: brut(db_path)),
+            ("agrégats résumés", lambda: resumes(db_path)),
+        ):
+            fn()  # échauffement (cache de pages SQLite)
+            resultats.append(mesure("dashboard", variante, n, meilleur(fn, repeat)[0], "s"))
+    return resultats
+
+
+def bench_annonces(tailles):
+    resultats = []
+    for n in tailles:
+        for variante in ("dicts", "Annonces"):
+            resultats.append(mesure("annonces", variante, n, mesurer_memoire(variante, n)["octets"] / n,
+                                    "octets/annonce"))
+    return resultats
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparer(resultats, reference, seuil):
+    """Affiche l'écart de chaque mesure avec la référence ; retourne les mesures dégradées au-delà de seuil."""
+    cle = lambda r: (r["bench"], r["variante"], r["taille"], r["unite"])
+    anciens = {cle(r): r["valeur"] for r in reference["resultats"]}
+    regressions = []
+    print(f"\nComparaison avec {reference['meta'].get('commit') or '?'} ({reference['meta']['date']}) :")
+    for r in resultats:
+        ancien = anciens.get(cle(r))
+        if not ancien:
+            continue
+        # Gain relatif, positif si la mesure s'améliore
+        gain = r["valeur"] / ancien - 1 if r["unite"].endswith("/s") else ancien / r["valeur"] - 1
+        marque = "  RÉGRESSION" if gain < -seuil else ""
+        print(f"{r['bench']:<10} {r['variante']:<22} {r['taille']:>9,} {gain:>+8.1%}{marque}")
+        if marque:
+            regressions.append(r)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--benchs", default=",".join(BENCHS), help="sous-ensemble de " + ",".join(BENCHS))
+    parser.add_argument("--tailles", default="10000,100000", help="tailles de prix, db, dashboard et annonces")
+    parser.add_argument("--cartes", default="24,84", help="cartes par page synthétique (scraping)")
+    parser.add_argument("--pages", type=int, default=10, help="pages par catégorie (scraping)")
+    parser.add_argument("--latence", type=float, default=0.02, help="délai de chaque page du serveur (s)")
+    parser.add_argument("--repeat", type=int, default=5, help="passages par mesure, la meilleure est gardée")
+    parser.add_argument("--sortie", default=None, help="fichier JSON (défaut : benchmarks/resultats/<commit>.json)")
+    parser.add_argument("--comparer", default=None, help="résultats JSON d'une version précédente")
+    parser.add_argument("--seuil", type=float, default=0.1, help="dégradation tolérée avant régression")
+    args = parser.parse_args()
+
+    benchs = args.benchs.split(",")
+    inconnus = set(benchs) - set(BENCHS)
+    if inconnus:
+        parser.error(f"benchmarks inconnus : {', '.join(sorted(inconnus))}")
+    tailles = [int(t) for t in args.tailles.split(",")]
+    cartes = [int(c) for c in args.cartes.split(",")]
+
+    commit = _commit()
+    resultats = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for bench in benchs:
+            start = time.perf_counter()
+            if bench == "scraping":
+                resultats += bench_scraping(tmp, cartes, args.pages, args.latence, args.repeat)
+            elif bench == "parsing":
+                resultats += bench_parsing(args.repeat)
+            elif bench == "prix":
+                resultats += bench_prix(tailles, args.repeat)
+            elif bench == "db":
+                resultats += bench_db(tmp, tailles, args.repeat)
+            elif bench == "dashboard":
+                resultats += bench_dashboard(tmp, tailles, args.repeat)
+            else:
+                resultats += bench_annonces(tailles)
+            print(f"{bench} : {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    print(f"{'bench':<10} {'variante':<22} {'taille':>9} {'valeur':>14}")
+    for r in resultats:
+        valeur = f"{r['valeur']:,.1f}" if r["unite"].endswith("/s") else f"{r['valeur']:.4f}"
+        print(f"{r['bench']:<10} {r['variante']:<22} {r['taille']:>9,} {valeur:>14} {r['unite']}")
+
+    nom = commit or f"{datetime.now():%Y%m%d_%H%M%S}"
+    sortie = args.sortie or os.path.join(RESULTATS_DIR, f"{nom}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(sortie)), exist_ok=True)
+    meta = {"date": datetime.now().isoformat(timespec="seconds"), "commit": commit,
+            "python": platform.python_version(), "plateforme": platform.platform(), "parametres": vars(args)}
+    with open(sortie, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "resultats": resultats}, f, indent=2, ensure_ascii=False)
+    print(f"Résultats : {sortie}")
+
+    if args.comparer:
+        with open(args.comparer, encoding="utf-8") as f:
+            regressions = comparer(resultats, json.load(f), args.seuil)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,54 @@
 import streamlit as st
-import pandas as pd
-import sqlite3
+from database.scraping_db import (
+    generation, statistiques_globales, top_adresses, annonces_par_categorie,
+    prix_moyen_par_categorie, histogramme_prix
+)
+from database.historique import TOUTES_VILLES, prix_journaliers, villes_suivies
+from database.recherche import Filtres, TRIS, compter, rechercher
+from database.snapshots import charger_snapshot
+from scrapers.config import CATEGORIES
+from scrapers.images import images_locales
 import plotly.express as px
-from datetime import datetime, timedelta
-import numpy as np
+
+LIBELLES_TRIS = {
+    "recent": "Plus récentes",
+    "prix_croissant": "Prix croissant",
+    "prix_decroissant": "Prix décroissant"
+}
+
+
+def tableau_annonces(filtres, key, tri="recent"):
+    """
+    Affiche les annonces correspondant aux filtres, une page à la fois
+    (database/recherche.py) ; seule la page visible est lue et envoyée au navigateur.
+    Les curseurs des pages déjà vues sont gardés en session sous key, avec le total
+    des annonces filtrées, recompté seulement quand la base a changé (generation()).
+    """
+    etat = st.session_state.get(key)
+    if etat is None or etat["requete"] != (filtres, tri):
+        etat = st.session_state[key] = {"requete": (filtres, tri), "curseurs": [None]}
+    curseurs = etat["curseurs"]
+
+    page, suivant = rechercher(filtres, tri, apres=curseurs[-1])
+    gen = generation()
+    if etat.get("generation") != gen:
+        etat["total"], etat["generation"] = compter(filtres, tri), gen
+    numero = len(curseurs)
+    st.caption(f"Dataset : {etat['total']:,} lignes — page {numero}")
+    if page.empty:
+        st.write("Aucune donnée trouvée pour cette catégorie." if filtres.categorie else "Aucune annonce trouvée.")
+        return
+    # Miniatures servies depuis le cache local quand elles y sont (scrapers/images.py)
+    page["Image"] = images_locales(page["Image"])
+    st.dataframe(page, hide_index=True, column_config={"Image": st.column_config.ImageColumn("Image")})
+
+    # Callbacks : le curseur change avant la réexécution (de la page, ou du seul fragment)
+    col_prec, col_suiv = st.columns(2)
+    col_prec.button("◀ Page précédente", key=f"{key}_prec", disabled=numero == 1,
+                    on_click=curseurs.pop)
+    col_suiv.button("Page suivante ▶", key=f"{key}_suiv", disabled=suivant is None,
+                    on_click=curseurs.append, args=(suivant,))
+
 
 def show_dashboard():
 
@@ -48,24 +93,33 @@ def show_dashboard():
     # -----------------------------
     # CHARGEMENT DES DONNÉES
     # -----------------------------
-    @st.cache_data
-    def load_data():
-        conn = sqlite3.connect("database/annoncesanimaux.db")
-        df = pd.read_sql("SELECT * FROM annonces", conn)
-        conn.close()
+    # Les agrégats sont lus dans les résumés tenus à jour à chaque écriture
+    # (database/scraping_db.py) : le chargement ne dépend pas du nombre d'annonces.
+    # La génération de la base est dans la clé du cache, qui est donc invalidé
+    # dès qu'un scraping ou un import a écrit.
+    gen = generation()
 
-        df['prix'] = pd.to_numeric(df['prix'], errors='coerce')
-        df = df.dropna(subset=['prix'])
+    @st.cache_data
+    def load_stats(gen):
+        return (
+            statistiques_globales(),
+            top_adresses(7),
+            annonces_par_categorie(),
+            prix_moyen_par_categorie(),
+            histogramme_prix()
+        )
 
-        if 'date' not in df.columns:
-            end = datetime.now()
-            start = end - timedelta(days=30)
-            dates = pd.date_range(start, end, periods=len(df))
-            df['date'] = np.random.choice(dates, len(df))
+    # Séries quotidiennes précalculées (database/historique.py)
+    @st.cache_data
+    def load_historique(ville, gen):
+        return prix_journaliers(ville), villes_suivies()
 
-        return df
+    # Distribution détaillée : lignes (catégorie, prix) du dernier instantané Parquet
+    @st.cache_data
+    def load_distribution(gen):
+        return charger_snapshot(["categorie", "prix"], prix_connu=True, sans_doublons=True)
 
-    df = load_data()
+    metriques, top_villes, cat_counts, prix_moy, histogramme = load_stats(gen)
 
     # -----------------------------
     # HEADER
@@ -81,16 +135,16 @@ def show_dashboard():
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric("📦 Total annonces", f"{len(df):,}")
+        st.metric("📦 Total annonces", f"{metriques['total']:,}")
 
     with col2:
-        st.metric("📊 Catégories représentées", df['categories'].nunique())
+        st.metric("📊 Catégories représentées", metriques['categories'])
 
     with col3:
-        st.metric("💰 Prix moyen (FCFA)", f"{df['prix'].mean():,.0f}")
+        st.metric("💰 Prix moyen (FCFA)", f"{metriques['prix_moyen']:,.0f}")
 
     with col4:
-        st.metric("🏙️ Adresses actives", df['adresse'].nunique())
+        st.metric("🏙️ Adresses actives", metriques['adresses'])
 
     st.markdown("---")
 
@@ -101,23 +155,42 @@ def show_dashboard():
 
     with col_left:
         st.subheader("📉 Distribution des prix par catégorie")
-        fig_dist = px.histogram(
-            df,
-            x='prix',
-            nbins=40,
-            color='categories',
+        # Classes précalculées : 9 par puissance de 10 (100-200, 200-300, ...)
+        histogramme['Tranche'] = [
+            f"{basse:,.0f} – {haute:,.0f}".replace(",", " ")
+            for basse, haute in zip(histogramme['Borne basse'], histogramme['Borne haute'])
+        ]
+        fig_dist = px.bar(
+            histogramme,
+            x='Tranche',
+            y='Nombre',
+            color='Catégorie',
             color_discrete_sequence=px.colors.qualitative.Set3,
-            labels={'prix': 'Prix (FCFA)', 'categories': 'Catégorie'},
-            marginal='box'
+            category_orders={'Tranche': list(dict.fromkeys(histogramme['Tranche']))},
+            labels={'Tranche': 'Prix (FCFA)'}
         )
-        fig_dist.update_layout(barmode='overlay', bargap=0.05)
+        fig_dist.update_layout(barmode='stack', bargap=0.05)
         st.plotly_chart(fig_dist, use_container_width=True, key="distribution_prix")
 
+        if st.toggle("Distribution détaillée (instantané Parquet)", key="distribution_detaillee"):
+            df = load_distribution(gen)
+            if df is None:
+                st.info("Aucun instantané : il est écrit à la fin de chaque scraping.")
+            else:
+                fig_detail = px.histogram(
+                    df,
+                    x='prix',
+                    nbins=40,
+                    color='categorie',
+                    color_discrete_sequence=px.colors.qualitative.Set3,
+                    labels={'prix': 'Prix (FCFA)', 'categorie': 'Catégorie'},
+                    marginal='box'
+                )
+                fig_detail.update_layout(barmode='overlay', bargap=0.05)
+                st.plotly_chart(fig_detail, use_container_width=True, key="distribution_detaillee_prix")
+
     with col_right:
         st.subheader("🏆 Top adresses")
-        top_villes = df['adresse'].value_counts().head(7).reset_index()
-        top_villes.columns = ['Ville', 'Nombre']
-
         for idx, row in top_villes.iterrows():
             st.markdown(
                 f"""
@@ -136,9 +209,6 @@ def show_dashboard():
 
     with col_chart1:
         st.subheader("📊 Annonces par catégorie")
-        cat_counts = df['categories'].value_counts().reset_index()
-        cat_counts.columns = ['Catégorie', 'Nombre']
-
         fig_cat = px.bar(
             cat_counts,
             x='Catégorie',
@@ -153,9 +223,6 @@ def show_dashboard():
 
     with col_chart2:
         st.subheader("💰 Prix moyen par catégorie")
-        prix_moy = df.groupby('categories')['prix'].mean().reset_index()
-        prix_moy.columns = ['Catégorie', 'Prix moyen']
-
         fig_prix = px.bar(
             prix_moy,
             x='Catégorie',
@@ -166,4 +233,54 @@ def show_dashboard():
         )
         fig_prix.update_traces(textposition='outside')
         fig_prix.update_layout(showlegend=False, xaxis_tickangle=-45)
-        st.plotly_chart(fig_prix, use_container_width=True, key="prix_moyen_categorie")
\ No newline at end of file
+        st.plotly_chart(fig_prix, use_container_width=True, key="prix_moyen_categorie")
+
+    # -----------------------------
+    # ÉVOLUTION DES PRIX
+    # -----------------------------
+    st.markdown("---")
+    st.subheader("📈 Évolution du prix médian")
+    _, villes = load_historique(TOUTES_VILLES, gen)
+    choix = st.selectbox("Ville", ["Toutes les villes"] + villes, key="ville_historique")
+    historique, _ = load_historique(TOUTES_VILLES if choix == "Toutes les villes" else choix, gen)
+    if historique.empty:
+        st.info("Pas encore d'historique : il se construit à chaque scraping.")
+    else:
+        fig_hist = px.line(
+            historique,
+            x='Jour',
+            y='Médiane',
+            color='Catégorie',
+            markers=True,
+            hover_data=['P10', 'P90', 'Annonces'],
+            color_discrete_sequence=px.colors.qualitative.Set2,
+            labels={'Médiane': 'Prix médian (FCFA)'}
+        )
+        st.plotly_chart(fig_hist, use_container_width=True, key="evolution_prix")
+        st.caption("Une annonce compte une fois par jour ; P10 / P90 au survol.")
+
+
+    # -----------------------------
+    # RECHERCHE D'ANNONCES
+    # -----------------------------
+    st.markdown("---")
+    st.subheader("🔎 Rechercher des annonces")
+    col_cat, col_ville, col_tri = st.columns(3)
+    categorie = col_cat.selectbox("Catégorie", ["Toutes"] + list(CATEGORIES), key="recherche_categorie")
+    ville = col_ville.selectbox("Ville", ["Toutes les villes"] + villes, key="recherche_ville")
+    tri = col_tri.selectbox("Tri", list(TRIS), format_func=LIBELLES_TRIS.get, key="recherche_tri")
+    col_texte, col_min, col_max = st.columns([2, 1, 1])
+    texte = col_texte.text_input("Titre contient", key="recherche_texte")
+    prix_min = col_min.number_input("Prix min (FCFA)", min_value=0, value=None, step=5000, key="recherche_prix_min")
+    prix_max = col_max.number_input("Prix max (FCFA)", min_value=0, value=None, step=5000, key="recherche_prix_max")
+    masquer = st.checkbox("Masquer les quasi-doublons (même annonce republiée)", value=True,
+                          key="recherche_doublons")
+    filtres = Filtres(
+        categorie=None if categorie == "Toutes" else categorie,
+        prix_min=prix_min,
+        prix_max=prix_max,
+        ville=None if ville == "Toutes les villes" else ville,
+        texte=texte.strip() or None,
+        doublons=not masquer
+    )
+    tableau_annonces(filtres, "recherche_annonces", tri)
@@ -0,0 +1,82 @@
+"""
+Détection des annonces quasi identiques (même vendeur qui republie la même annonce).
+
+Blocage : chaque annonce reçoit une clé, empreinte de (catégorie, titre normalisé,
+prix, adresse normalisée) ; seules les annonces d'un même bloc sont comparées.
+Dans un bloc, les annonces triées par identifiant forment un groupe tant que
+deux identifiants consécutifs sont à moins de ECART_MAX l'un de l'autre (les
+republications ont des identifiants très proches). La plus ancienne annonce
+du groupe est l'originale ; les autres sont marquées doublon_de = son annonce_id.
+
+La clé est calculée à l'écriture (cle_doublon) et un trigger note les blocs
+modifiés (migration 9) : marquer_doublons() ne revoit que ces blocs, en une
+seule lecture triée sur l'index (cle_doublon, annonce_id).
+"""
+import hashlib
+import itertools
+import re
+import unicodedata
+
+from database.scraping_db import create_connection
+
+ECART_MAX = 100  # écart maximal d'identifiants entre deux republications
+
+_SEPARATEURS = re.compile(r"[^a-z0-9]+")
+
+
+def normaliser(texte):
+    """Minuscules, sans accents ni ponctuation : "Bœufs !" -> "boeufs"."""
+    texte = unicodedata.normalize("NFKD", (texte or "").lower().replace("œ", "oe").replace("æ", "ae"))
+    texte = "".join(c for c in texte if not unicodedata.combining(c))
+    return _SEPARATEURS.sub(" ", texte).strip()
+
+
+def cle_doublon(categorie, nom, prix, adresse):
+    """Clé de bloc (entier 64 bits signé, stockable dans SQLite)."""
+    prix = "" if prix is None or prix != prix else f"{float(prix):.0f}"  # prix != prix : NaN
+    empreinte = hashlib.blake2b(
+        "|".join((categorie or "", normaliser(nom), prix, normaliser(adresse))).encode(),
+        digest_size=8
+    ).digest()
+    return int.from_bytes(empreinte, "big", signed=True)
+
+
+def grouper(identifiants, ecart_max=ECART_MAX):
+    """
+    identifiants : annonce_id triés d'un même bloc.
+    Retourne {annonce_id: annonce_id de l'originale} pour les doublons.
+    """
+    doublons = {}
+    originale = precedent = None
+    for aid in identifiants:
+        if precedent is not None and aid - precedent <= ecart_max:
+            doublons[aid] = originale
+        else:
+            originale = aid
+        precedent = aid
+    return doublons
+
+
+def marquer_doublons(db_path=None, ecart_max=ECART_MAX):
+    """Regroupe les blocs modifiés depuis le dernier passage ; retourne le nombre d'annonces dont le marquage a changé."""
+    conn = create_connection(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        lignes = conn.execute("""
+            SELECT cle_doublon, annonce_id, doublon_de FROM animals
+            WHERE cle_doublon IN (SELECT cle FROM blocs_doublons_a_verifier) AND annonce_id IS NOT NULL
+            ORDER BY cle_doublon, annonce_id
+        """)
+        changements = []
+        for _, bloc in itertools.groupby(lignes, key=lambda r: r[0]):
+            bloc = list(bloc)
+            doublons = grouper([r[1] for r in bloc], ecart_max)
+            changements += [
+                (doublons.get(aid), aid) for _, aid, actuel in bloc if doublons.get(aid) != actuel
+            ]
+        conn.executemany("UPDATE animals SET doublon_de = ? WHERE annonce_id = ?", changements)
+        conn.execute("DELETE FROM blocs_doublons_a_verifier")
+        conn.commit()
+        return len(changements)
+    finally:
+        conn.close()
@@ -0,0 +1,90 @@
+"""
+Fusion unique de l'ancienne base du dashboard (database/annoncesanimaux.db,
+table annonces) dans la base des scrapers (database/animals.db, table animals).
+
+    python -m database.fusion [chemin/vers/annoncesanimaux.db]
+
+La copie se fait en une seule requête INSERT ... SELECT sur la base attachée.
+Les annonces déjà présentes (même annonce_id) sont conservées telles quelles
+mais toutes rejoignent l'historique des observations, et une base déjà fusionnée (même taille, même date de modification) est ignorée.
+"""
+import os
+import sys
+from datetime import datetime, timezone
+
+from database.doublons import cle_doublon
+from database.scraping_db import (
+    BASE_DIR, annonce_id, create_connection, deja_importe, marquer_importe, migrate, ville
+)
+
+ANCIENNE_BASE = os.path.join(BASE_DIR, "database", "annoncesanimaux.db")
+
+# Catégories de l'ancienne base -> libellés utilisés par les scrapers (scrapers/config.py)
+ANCIENNES_CATEGORIES = {
+    "chiens": "Chiens",
+    "moutons": "Moutons",
+    "poules_pigeons_et_lapins": "Poules / Lapins / Pigeons",
+    "autres": "Autres animaux"
+}
+
+
+def fusionner_base(source=ANCIENNE_BASE, db_path=None):
+    """Retourne le nombre d'annonces ajoutées (0 si source absente ou déjà fusionnée)."""
+    if not os.path.exists(source):
+        return 0
+    stat = os.stat(source)
+    signature = f"{stat.st_size}-{int(stat.st_mtime)}"
+    # Date d'observation inconnue : on prend la dernière modification du fichier
+    date_source = datetime.fromtimestamp(stat.st_mtime, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+    conn = create_connection(db_path)
+    try:
+        migrate(conn)
+        if deja_importe(conn, os.path.abspath(source), signature):
+            return 0
+
+        conn.create_function("annonce_id_image", 1, annonce_id, deterministic=True)
+        conn.create_function("cle_doublon", 4, cle_doublon, deterministic=True)
+        conn.execute("ATTACH DATABASE ? AS ancienne", (source,))
+        cas = " ".join("WHEN ? THEN ?" for _ in ANCIENNES_CATEGORIES)
+        params = [v for paire in ANCIENNES_CATEGORIES.items() for v in paire]
+
+        conn.execute("BEGIN")
+        # "WHERE true" : requis par SQLite pour un upsert sur INSERT ... SELECT
+        ajoutees = conn.execute(f"""
+            INSERT INTO animals (annonce_id, categorie, nom, prix, adresse, image_lien, scraped_at, cle_doublon)
+            SELECT annonce_id, categorie, nom, prix, adresse, image_lien, ?,
+                   cle_doublon(categorie, nom, prix, adresse)
+            FROM (
+                SELECT annonce_id_image(image_lien) AS annonce_id,
+                       CASE categories {cas} ELSE categories END AS categorie,
+                       nom,
+                       CASE WHEN typeof(prix) IN ('integer', 'real') THEN prix END AS prix,
+                       adresse, image_lien
+                FROM ancienne.annonces
+            )
+            WHERE true
+            ON CONFLICT (annonce_id) DO NOTHING
+        """, [date_source] + params).rowcount
+        # Toutes les annonces de l'ancienne base sont des observations datées de la source
+        conn.create_function("ville", 1, ville, deterministic=True)
+        conn.execute(f"""
+            INSERT INTO observations (annonce_id, categorie, ville, prix, observed_at)
+            SELECT annonce_id_image(image_lien),
+                   CASE categories {cas} ELSE categories END,
+                   ville(adresse),
+                   CASE WHEN typeof(prix) IN ('integer', 'real') THEN prix END,
+                   ?
+            FROM ancienne.annonces
+        """, params + [date_source])
+        marquer_importe(conn, os.path.abspath(source), signature, ajoutees)
+        conn.commit()
+        conn.execute("DETACH DATABASE ancienne")
+        return ajoutees
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else ANCIENNE_BASE
+    print(f"{fusionner_base(source)} annonces fusionnées depuis {source}")
@@ -0,0 +1,115 @@
+"""
+Historique des prix : agrégats quotidiens tirés de la table observations.
+
+Chaque passage (scraping, import CSV, fusion) ajoute une observation par annonce.
+rafraichir_agregats() ne recalcule que les jours ayant reçu des observations
+depuis son dernier passage (repère noté dans la table meta) et remplace leurs
+lignes de prix_journaliers : nombre d'annonces, médiane, p10 et p90 du prix par
+catégorie et par ville, plus une ligne toutes villes confondues (ville = "").
+Une annonce vue plusieurs fois le même jour n'y compte qu'une fois, avec sa
+dernière observation ; les quasi-doublons marqués au moment du calcul
+(database/doublons.py) n'y comptent pas.
+"""
+import pandas as pd
+
+from database.scraping_db import _lire, create_connection
+
+TOUTES_VILLES = ""
+QUANTILES = [0.1, 0.5, 0.9]
+REPERE = "observations_agregees"  # dernier id d'observation pris en compte
+
+
+def _agreger(obs, cles):
+    groupes = obs.groupby(cles, sort=False)
+    # reindex : sans aucun groupe (jour sans ville, ou vidé par les doublons), unstack() n'a pas de colonnes
+    quantiles = groupes["prix"].quantile(QUANTILES).unstack().reindex(columns=QUANTILES)
+    return pd.DataFrame({
+        "annonces": groupes.size(),
+        "avec_prix": groupes["prix"].count(),
+        "mediane": quantiles[0.5],
+        "p10": quantiles[0.1],
+        "p90": quantiles[0.9]
+    }).reset_index()
+
+
+def _agregats_du_jour(obs):
+    """Lignes de prix_journaliers pour les observations d'une journée."""
+    # Dernière observation de chaque annonce ; les annonces sans identifiant comptent toutes
+    obs = pd.concat([
+        obs[obs["annonce_id"].notna()].drop_duplicates("annonce_id", keep="last"),
+        obs[obs["annonce_id"].isna()]
+    ])
+    par_ville = _agreger(obs[obs["ville"].notna()], ["categorie", "ville"])
+    toutes = _agreger(obs, ["categorie"]).assign(ville=TOUTES_VILLES)
+    return pd.concat([par_ville, toutes], ignore_index=True)
+
+
+def rafraichir_agregats(db_path=None):
+    """Met à jour prix_journaliers pour les nouvelles observations ; retourne le nombre de jours recalculés."""
+    conn = create_connection(db_path)
+    try:
+        # BEGIN IMMEDIATE avant de lire le repère : on attend (busy timeout) qu'un
+        # BatchWriter ait fini son commit, et les lectures se font dans la transaction d'écriture
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT valeur FROM meta WHERE cle = ?", (REPERE,)).fetchone()
+        repere = row[0] if row else 0
+        dernier = conn.execute("SELECT MAX(id) FROM observations").fetchone()[0]
+        if dernier is None or dernier <= repere:
+            conn.rollback()
+            return 0
+
+        jours = [r[0] for r in conn.execute(
+            "SELECT DISTINCT date(observed_at) FROM observations WHERE id > ? AND id <= ?", (repere, dernier)
+        )]
+        for jour in jours:
+            # Plage sur observed_at (indexée) : toutes les observations du jour, anciennes comprises
+            obs = pd.read_sql("""
+                SELECT annonce_id, categorie, ville, prix FROM observations
+                WHERE observed_at >= ? AND observed_at < date(?, '+1 day') AND id <= ?
+                  AND (annonce_id IS NULL
+                       OR annonce_id NOT IN (SELECT annonce_id FROM animals WHERE doublon_de IS NOT NULL))
+                ORDER BY id
+            """, conn, params=(jour, jour, dernier))
+            conn.execute("DELETE FROM prix_journaliers WHERE jour = ?", (jour,))
+            if obs.empty:
+                continue  # jour dont toutes les annonces sont des quasi-doublons
+            lignes = _agregats_du_jour(obs)
+            conn.executemany("""
+                INSERT INTO prix_journaliers (jour, categorie, ville, annonces, avec_prix, mediane, p10, p90)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (jour, r.categorie, r.ville, int(r.annonces), int(r.avec_prix),
+                 *(None if pd.isna(v) else float(v) for v in (r.mediane, r.p10, r.p90)))
+                for r in lignes.itertuples(index=False)
+            ])
+        conn.execute("""
+            INSERT INTO meta (cle, valeur) VALUES (?, ?)
+            ON CONFLICT (cle) DO UPDATE SET valeur = excluded.valeur
+        """, (REPERE, dernier))
+        # Invalide le cache du dashboard comme une écriture dans animals
+        conn.execute("UPDATE meta SET valeur = valeur + 1 WHERE cle = 'generation'")
+        conn.commit()
+        return len(jours)
+    finally:
+        conn.close()
+
+
+# -----------------------------
+# REQUÊTES (dashboard)
+# -----------------------------
+def prix_journaliers(ville=TOUTES_VILLES, db_path=None):
+    """Série quotidienne par catégorie pour une ville (par défaut toutes villes confondues)."""
+    return _lire("""
+        SELECT jour AS Jour, categorie AS Catégorie, annonces AS Annonces,
+               mediane AS Médiane, p10 AS P10, p90 AS P90
+        FROM prix_journaliers WHERE ville = ?
+        ORDER BY jour, categorie
+    """, db_path, (ville,))
+
+
+def villes_suivies(limit=20, db_path=None):
+    """Villes ayant le plus d'annonces observées, pour le choix de la série."""
+    return _lire("""
+        SELECT ville FROM prix_journaliers WHERE ville <> ''
+        GROUP BY ville ORDER BY SUM(annonces) DESC LIMIT ?
+    """, db_path, (limit,))["ville"].tolist()
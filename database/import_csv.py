@@ -0,0 +1,192 @@
+"""
+Import des exports Web Scraper (csv_data/*.csv) dans la base des scrapers
+(database/animals.db, table animals).
+
+    python -m database.import_csv [dossier]
+
+Chaque fichier est lu en flux, par blocs Arrow (pyarrow.csv.open_csv) : les
+en-têtes sont normalisés (pigeonslapins.csv nomme "image" la colonne
+image_lien), les prix nettoyés par nettoyer_prix_arrow et les doublons écartés
+sur annonce_id, puis les blocs sont chargés par executemany dans une seule
+transaction, avec une observation par annonce dans l'historique. Un fichier inchangé depuis le dernier import (même taille et même
+date de modification, ou à défaut même empreinte sha256) est ignoré.
+"""
+import csv
+import hashlib
+import os
+import sys
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from database.doublons import cle_doublon
+from database.scraping_db import (
+    BASE_DIR, OBSERVATION_SQL, create_connection, marquer_importe, migrate, signature_importee, ville
+)
+from scrapers.prix import nettoyer_prix_arrow
+
+CSV_DIR = os.path.join(BASE_DIR, "csv_data")
+
+# Fichiers exportés -> libellés utilisés par les scrapers (scrapers/config.py)
+CSV_CATEGORIES = {
+    "chiens.csv": "Chiens",
+    "moutons.csv": "Moutons",
+    "pigeonslapins.csv": "Poules / Lapins / Pigeons",
+    "autres.csv": "Autres animaux"
+}
+
+# En-têtes rencontrés dans les exports -> colonnes de la table
+COLONNES_CSV = {
+    "nom": "nom",
+    "prix": "prix",
+    "adresse": "adresse",
+    "image_lien": "image_lien",
+    "image": "image_lien"
+}
+COLONNES = ["annonce_id", "nom", "prix", "adresse", "image_lien"]
+
+TAILLE_BLOC = 1 << 20  # octets lus par bloc Arrow
+
+# Au-delà, le "prix" est une saisie aberrante (numéro de téléphone, fourchette
+# "200 000 350 000", "111 111 111 ...") : il est importé comme manquant
+PRIX_MAX = 50_000_000
+
+# Même motif que scraping_db.annonce_id, avec le groupe nommé exigé par extract_regex
+_ID_IMAGE = r"thumb_(?P<id>\d+)_uploaded_image"
+
+# Une annonce déjà en base n'est remplacée que par une observation plus récente
+IMPORT_SQL = """
+    INSERT INTO animals (annonce_id, categorie, nom, prix, adresse, image_lien, scraped_at, cle_doublon)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (annonce_id) DO UPDATE SET
+        categorie = excluded.categorie,
+        nom = excluded.nom,
+        prix = excluded.prix,
+        adresse = excluded.adresse,
+        image_lien = excluded.image_lien,
+        scraped_at = excluded.scraped_at,
+        cle_doublon = excluded.cle_doublon
+    WHERE excluded.scraped_at > animals.scraped_at
+"""
+
+
+def _entetes(chemin):
+    """Colonnes du fichier -> nom normalisé, pour celles que l'import utilise."""
+    with open(chemin, newline="", encoding="utf-8-sig") as f:
+        entetes = next(csv.reader(f), [])
+    colonnes = {c: COLONNES_CSV[c.strip().lower()] for c in entetes if c.strip().lower() in COLONNES_CSV}
+    manquantes = set(COLONNES_CSV.values()) - set(colonnes.values())
+    if manquantes:
+        raise ValueError(f"{os.path.basename(chemin)} : colonnes manquantes {sorted(manquantes)}")
+    return colonnes
+
+
+def lire_blocs(chemin, taille_bloc=TAILLE_BLOC):
+    """
+    Génère le fichier par pa.RecordBatch normalisés (COLONNES) : prix en float64
+    (null si absent, sur demande ou au-delà de PRIX_MAX), annonce_id en int64 (null si l'image n'en
+    porte pas). Les doublons ne sont pas retirés ici.
+    """
+    colonnes = _entetes(chemin)
+    lecteur = pacsv.open_csv(
+        chemin,
+        read_options=pacsv.ReadOptions(block_size=taille_bloc),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=list(colonnes),
+            column_types={c: pa.string() for c in colonnes}
+        )
+    )
+    for bloc in lecteur:
+        champs = {colonnes[nom]: bloc.column(nom) for nom in bloc.schema.names}
+        images = champs["image_lien"]
+        ids = pc.struct_field(pc.extract_regex(images, _ID_IMAGE), "id")
+        prix = nettoyer_prix_arrow(champs["prix"])
+        prix = pc.if_else(pc.greater(prix, PRIX_MAX), pa.scalar(None, pa.float64()), prix)
+        yield pa.record_batch([
+            pc.cast(ids, pa.int64()),
+            champs["nom"],
+            prix,
+            champs["adresse"],
+            images
+        ], names=COLONNES)
+
+
+def charger_csv(chemin):
+    """Tout le fichier normalisé en DataFrame (un export ne tient que quelques milliers de lignes)."""
+    table = pa.Table.from_batches(list(lire_blocs(chemin)))
+    return table.to_pandas() if table.num_rows else pd.DataFrame(columns=COLONNES)
+
+
+def _sha256(chemin):
+    h = hashlib.sha256()
+    with open(chemin, "rb") as f:
+        for morceau in iter(lambda: f.read(1 << 20), b""):
+            h.update(morceau)
+    return h.hexdigest()
+
+
+def importer_csv(chemin, categorie, db_path=None):
+    """Retourne le nombre d'annonces ajoutées ou mises à jour (0 si fichier absent ou inchangé)."""
+    if not os.path.exists(chemin):
+        return 0
+    source = os.path.abspath(chemin)
+    stat = os.stat(chemin)
+    empreinte_rapide = f"{stat.st_size}-{int(stat.st_mtime)}"
+    # Date d'observation inconnue : on prend la dernière modification du fichier
+    date_source = datetime.fromtimestamp(stat.st_mtime, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+    conn = create_connection(db_path)
+    try:
+        migrate(conn)
+        # Signature "taille-mtime:sha256" ; le hash n'est calculé que si taille ou mtime ont bougé
+        precedente = signature_importee(conn, source) or ""
+        if precedente.split(":")[0] == empreinte_rapide:
+            return 0
+        signature = f"{empreinte_rapide}:{_sha256(chemin)}"
+        if precedente.split(":")[-1] == signature.split(":")[-1]:
+            # Fichier touché mais contenu identique : on ne note que la nouvelle signature
+            conn.execute("UPDATE imports SET signature = ? WHERE source = ?", (signature, source))
+            conn.commit()
+            return 0
+
+        conn.execute("BEGIN")
+        vus = set()
+        ecrites = 0
+        for bloc in lire_blocs(chemin):
+            lignes = []
+            for aid, nom, prix, adresse, image in zip(*(c.to_pylist() for c in bloc.columns)):
+                # Sans identifiant, une annonce ne peut pas être dédoublonnée : elle est ignorée
+                if aid is None or aid in vus:
+                    continue
+                vus.add(aid)
+                lignes.append((aid, categorie, nom, prix, adresse, image, date_source,
+                               cle_doublon(categorie, nom, prix, adresse)))
+            # rowcount : lignes écrites par l'upsert seul, sans celles des triggers
+            ecrites += conn.executemany(IMPORT_SQL, lignes).rowcount
+            # Chaque annonce de l'export est une observation, même si la table garde plus récent
+            conn.executemany(OBSERVATION_SQL, [
+                (aid, cat, ville(adresse), prix, observed_at)
+                for aid, cat, nom, prix, adresse, image, observed_at, cle in lignes
+            ])
+        marquer_importe(conn, source, signature, ecrites)
+        conn.commit()
+        return ecrites
+    finally:
+        conn.close()
+
+
+def importer_dossier(dossier=CSV_DIR, db_path=None):
+    """Importe les exports connus de CSV_CATEGORIES ; retourne {fichier: annonces écrites}."""
+    return {
+        fichier: importer_csv(os.path.join(dossier, fichier), categorie, db_path)
+        for fichier, categorie in CSV_CATEGORIES.items()
+    }
+
+
+if __name__ == "__main__":
+    dossier = sys.argv[1] if len(sys.argv) > 1 else CSV_DIR
+    for fichier, ecrites in importer_dossier(dossier).items():
+        print(f"{fichier} : {ecrites} annonces importées")
@@ -0,0 +1,222 @@
+"""
+File de jobs de scraping stockée dans SQLite (tables jobs et job_pages).
+
+L'interface soumet un job, suit sa progression page par page et peut demander
+son annulation ; un worker (scrapers/runner.py) prend les jobs un par un.
+Un seul job peut être actif (en attente ou en cours) à la fois : soumettre
+pendant qu'un job est actif renvoie ce job au lieu d'en créer un second.
+Tout l'état étant en base, n'importe quelle session Streamlit peut suivre
+le job en cours.
+"""
+import json
+
+import pandas as pd
+
+from database.scraping_db import create_connection
+
+STATUTS_ACTIFS = ("queued", "running")
+STATUTS = {
+    "queued": "En attente",
+    "running": "En cours",
+    "done": "Terminé",
+    "failed": "En échec",
+    "cancelled": "Annulé"
+}
+
+# Un job en cours dont le heartbeat a plus de DELAI_ORPHELIN secondes est considéré
+# comme abandonné (serveur ou crawl arrêté pendant le scraping)
+DELAI_ORPHELIN = 600
+
+_COLONNES = ("id, methode, max_pages, incremental, images, statut, annulation, erreur, resume, "
+             "created_at, started_at, finished_at, heartbeat")
+
+
+class JobAnnule(Exception):
+    """Levée dans le worker quand l'annulation du job a été demandée."""
+
+
+def _job(row):
+    if row is None:
+        return None
+    job = dict(zip([c.strip() for c in _COLONNES.split(",")], row))
+    job["incremental"] = bool(job["incremental"])
+    job["images"] = bool(job["images"])
+    job["resume"] = json.loads(job["resume"]) if job["resume"] else {}
+    return job
+
+
+def soumettre_job(methode, max_pages, incremental, images=False, en_cours=False, db_path=None):
+    """
+    Crée un job, sauf si un job est déjà actif.
+    images : télécharger aussi les miniatures des annonces dans le cache local
+    en_cours : job exécuté par l'appelant lui-même (ex. scrapers/cli.py), créé
+               directement à l'état en cours pour que le worker ne le prenne pas
+    Retourne (job_id, nouveau) ; nouveau vaut False si le job actif existant est renvoyé.
+    """
+    conn = create_connection(db_path)
+    try:
+        # BEGIN IMMEDIATE : deux sessions qui cliquent en même temps sont sérialisées
+        conn.execute("BEGIN IMMEDIATE")
+        # Un job orphelin ne doit pas bloquer la file indéfiniment
+        _marquer_orphelins(conn, DELAI_ORPHELIN)
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE statut IN (?, ?) ORDER BY id LIMIT 1", STATUTS_ACTIFS
+        ).fetchone()
+        if row is not None:
+            conn.commit()
+            return row[0], False
+        cursor = conn.execute("""
+            INSERT INTO jobs (methode, max_pages, incremental, images, statut, started_at, heartbeat)
+            VALUES (?, ?, ?, ?, ?, CASE WHEN ? THEN CURRENT_TIMESTAMP END, CASE WHEN ? THEN CURRENT_TIMESTAMP END)
+        """, (methode, max_pages, int(incremental), int(images), "running" if en_cours else "queued",
+              en_cours, en_cours))
+        conn.commit()
+        return cursor.lastrowid, True
+    finally:
+        conn.close()
+
+
+def prendre_job(db_path=None):
+    """
+    Passe le plus ancien job en attente à l'état en cours et le retourne (ou None).
+    Appelée à chaque tour du worker : les jobs orphelins sont marqués en échec au passage.
+    """
+    conn = create_connection(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        _marquer_orphelins(conn, DELAI_ORPHELIN)
+        row = conn.execute(
+            f"SELECT {_COLONNES} FROM jobs WHERE statut = 'queued' ORDER BY id LIMIT 1"
+        ).fetchone()
+        if row is None:
+            conn.commit()
+            return None
+        conn.execute("""
+            UPDATE jobs SET statut = 'running', started_at = CURRENT_TIMESTAMP,
+                            heartbeat = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, (row[0],))
+        conn.commit()
+        job = _job(row)
+        job["statut"] = "running"
+        return job
+    finally:
+        conn.close()
+
+
+def enregistrer_page(job_id, categorie, page, annonces, db_path=None):
+    """
+    Note une page traitée et rafraîchit le heartbeat du job.
+    Retourne True si l'annulation du job a été demandée.
+    """
+    conn = create_connection(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_pages (job_id, categorie, page, annonces) VALUES (?, ?, ?, ?)",
+                (job_id, categorie, page, annonces)
+            )
+            conn.execute("UPDATE jobs SET heartbeat = CURRENT_TIMESTAMP WHERE id = ?", (job_id,))
+        return bool(conn.execute("SELECT annulation FROM jobs WHERE id = ?", (job_id,)).fetchone()[0])
+    finally:
+        conn.close()
+
+
+def pouls(job_id, db_path=None):
+    """
+    Rafraîchit le heartbeat d'un job qui n'a pas fini de page depuis un moment
+    (ex. lots en cours dans scrapers/cli.py). Retourne True si l'annulation a été demandée.
+    """
+    conn = create_connection(db_path)
+    try:
+        with conn:
+            conn.execute("UPDATE jobs SET heartbeat = CURRENT_TIMESTAMP WHERE id = ?", (job_id,))
+        return bool(conn.execute("SELECT annulation FROM jobs WHERE id = ?", (job_id,)).fetchone()[0])
+    finally:
+        conn.close()
+
+
+def demander_annulation(job_id, db_path=None):
+    """Un job en attente est annulé tout de suite ; un job en cours s'arrête à sa prochaine page."""
+    conn = create_connection(db_path)
+    with conn:
+        conn.execute("UPDATE jobs SET annulation = 1 WHERE id = ?", (job_id,))
+        conn.execute("""
+            UPDATE jobs SET statut = 'cancelled', finished_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND statut = 'queued'
+        """, (job_id,))
+    conn.close()
+
+
+def terminer_job(job_id, statut, erreur=None, resume=None, db_path=None):
+    conn = create_connection(db_path)
+    with conn:
+        conn.execute("""
+            UPDATE jobs SET statut = ?, erreur = ?, resume = ?, finished_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, (statut, erreur, json.dumps(resume) if resume else None, job_id))
+    conn.close()
+
+
+def _marquer_orphelins(conn, delai):
+    return conn.execute("""
+        UPDATE jobs SET statut = 'failed', erreur = 'Interrompu (worker arrêté)',
+                        finished_at = CURRENT_TIMESTAMP
+        WHERE statut = 'running' AND heartbeat < datetime('now', ?)
+    """, (f"-{int(delai)} seconds",)).rowcount
+
+
+def recuperer_orphelins(delai=DELAI_ORPHELIN, db_path=None):
+    """
+    Marque en échec les jobs en cours dont le heartbeat date de plus de delai secondes
+    (serveur arrêté pendant le scraping), pour qu'ils ne bloquent plus la file.
+    """
+    conn = create_connection(db_path)
+    with conn:
+        n = _marquer_orphelins(conn, delai)
+    conn.close()
+    return n
+
+
+def job_actif(db_path=None):
+    conn = create_connection(db_path)
+    row = conn.execute(
+        f"SELECT {_COLONNES} FROM jobs WHERE statut IN (?, ?) ORDER BY id LIMIT 1", STATUTS_ACTIFS
+    ).fetchone()
+    conn.close()
+    return _job(row)
+
+
+def dernier_job(methode=None, db_path=None):
+    conn = create_connection(db_path)
+    if methode is None:
+        row = conn.execute(f"SELECT {_COLONNES} FROM jobs ORDER BY id DESC LIMIT 1").fetchone()
+    else:
+        row = conn.execute(
+            f"SELECT {_COLONNES} FROM jobs WHERE methode = ? ORDER BY id DESC LIMIT 1", (methode,)
+        ).fetchone()
+    conn.close()
+    return _job(row)
+
+
+def derniers_jobs(limit=20, db_path=None):
+    """Jobs terminés les plus récents (du plus récent au plus ancien), résumé compris."""
+    conn = create_connection(db_path)
+    rows = conn.execute(
+        f"SELECT {_COLONNES} FROM jobs WHERE statut = 'done' ORDER BY id DESC LIMIT ?", (limit,)
+    ).fetchall()
+    conn.close()
+    return [_job(row) for row in rows]
+
+
+def progression(job_id, db_path=None):
+    """Pages traitées et annonces trouvées par catégorie pour un job."""
+    conn = create_connection(db_path)
+    df = pd.read_sql("""
+        SELECT categorie AS "Catégorie", COUNT(*) AS Pages, SUM(annonces) AS Annonces,
+               MAX(page) AS "Dernière page"
+        FROM job_pages WHERE job_id = ?
+        GROUP BY categorie ORDER BY categorie
+    """, conn, params=(job_id,))
+    conn.close()
+    return df
@@ -0,0 +1,111 @@
+"""
+Recherche d'annonces avec filtres et pagination par clé (keyset).
+
+Les filtres (catégorie, fourchette de prix, ville, texte du titre, date
+d'écriture) sont traduits en SQL sur les index de animals ; la ville et le
+texte passent par l'index plein texte animals_fts (migration 8), insensible
+aux accents. Une page est lue à partir du curseur de la précédente (valeur
+de tri et id de la dernière annonce) : le coût d'une page ne dépend pas de
+sa position, contrairement à OFFSET.
+
+    page, suivant = rechercher(Filtres(categorie="Chiens", texte="berger"))
+    page2, suivant = rechercher(Filtres(categorie="Chiens", texte="berger"), apres=suivant)
+"""
+import re
+from collections import namedtuple
+
+from database.scraping_db import _lire, create_connection
+
+# doublons : False pour masquer les quasi-doublons (database/doublons.py)
+Filtres = namedtuple("Filtres", "categorie prix_min prix_max ville texte depuis doublons",
+                     defaults=(None,) * 6 + (True,))
+
+# Tri -> (colonne de tri, sens) ; les tris par prix ne portent que sur les annonces ayant un prix
+TRIS = {
+    "recent": (None, "DESC"),
+    "prix_croissant": ("prix", "ASC"),
+    "prix_decroissant": ("prix", "DESC")
+}
+TAILLE_PAGE = 50
+
+COLONNES = ('id, nom AS "Nom / Détails", prix AS Prix, adresse AS Adresse, '
+            'image_lien AS Image, categorie AS "Catégorie"')
+
+
+def _requete_fts(filtres):
+    """Requête MATCH FTS5 pour la ville et le texte, ou None."""
+    termes = []
+    if filtres.texte:
+        # Chaque mot du texte, en préfixe : "berg" trouve "Berger"
+        mots = re.findall(r"\w+", filtres.texte)
+        termes += [f'nom : "{mot}" *' for mot in mots]
+    if filtres.ville:
+        mots = re.findall(r"\w+", filtres.ville)
+        if mots:
+            termes.append('adresse : "' + " ".join(mots) + '"')
+    return " AND ".join(termes) or None
+
+
+def _where(filtres, tri):
+    conditions, params = [], []
+    if filtres.categorie:
+        conditions.append("categorie = ?")
+        params.append(filtres.categorie)
+    if filtres.prix_min is not None:
+        conditions.append("prix >= ?")
+        params.append(filtres.prix_min)
+    if filtres.prix_max is not None:
+        conditions.append("prix <= ?")
+        params.append(filtres.prix_max)
+    if filtres.depuis:
+        conditions.append("scraped_at >= ?")
+        params.append(filtres.depuis)
+    if not filtres.doublons:
+        conditions.append("doublon_de IS NULL")
+    if TRIS[tri][0] == "prix":
+        conditions.append("prix IS NOT NULL")
+    fts = _requete_fts(filtres)
+    if fts:
+        conditions.append("id IN (SELECT rowid FROM animals_fts WHERE animals_fts MATCH ?)")
+        params.append(fts)
+    return conditions, params
+
+
+def rechercher(filtres=Filtres(), tri="recent", apres=None, limite=TAILLE_PAGE, db_path=None):
+    """
+    Retourne (page, curseur) : page est un DataFrame d'au plus limite annonces,
+    curseur la valeur à passer en apres pour la page suivante (None si c'est la dernière).
+    """
+    colonne, sens = TRIS[tri]
+    conditions, params = _where(filtres, tri)
+    comparaison = "<" if sens == "DESC" else ">"
+    if apres is not None:
+        if colonne is None:
+            conditions.append(f"id {comparaison} ?")
+            params.append(apres[-1])
+        else:
+            conditions.append(f"({colonne}, id) {comparaison} (?, ?)")
+            params += list(apres)
+    ordre = f"{colonne} {sens}, id {sens}" if colonne else f"id {sens}"
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    # Une ligne de plus que la page pour savoir s'il en reste
+    page = _lire(f"SELECT {COLONNES} FROM animals {where} ORDER BY {ordre} LIMIT ?",
+                 db_path, params + [limite + 1])
+    if len(page) <= limite:
+        return page.drop(columns="id"), None
+    page = page.iloc[:limite]
+    derniere = page.iloc[-1]
+    curseur = (int(derniere["id"]),) if colonne is None else (float(derniere["Prix"]), int(derniere["id"]))
+    return page.drop(columns="id"), curseur
+
+
+def compter(filtres=Filtres(), tri="recent", db_path=None):
+    """Nombre d'annonces correspondant aux filtres (et au tri, qui peut écarter les prix manquants)."""
+    conditions, params = _where(filtres, tri)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    conn = create_connection(db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM animals {where}", params).fetchone()[0]
+    finally:
+        conn.close()
@@ -1,17 +1,38 @@
 import sqlite3
 import os
+import re
+import time
+import pandas as pd
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, "database", "animals.db")
 
-def create_connection():
-    conn = sqlite3.connect(DB_PATH)
+# Identifiant stable d'une annonce : https://images.coinafrique.com/thumb_<id>_uploaded_image1_...
+_ID_IMAGE = re.compile(r"thumb_(\d+)_uploaded_image")
+
+def annonce_id(image_lien):
+    """Identifiant numérique CoinAfrique extrait du lien de l'image, ou None."""
+    m = _ID_IMAGE.search(image_lien or "")
+    return int(m.group(1)) if m else None
+
+def ville(adresse):
+    """Ville d'une adresse CoinAfrique ("Fann, Dakar, Sénégal" -> "Dakar"), ou None."""
+    parties = [p.strip() for p in (adresse or "").split(",") if p.strip()]
+    return parties[-2] if len(parties) >= 2 else None
+
+def create_connection(db_path=None):
+    conn = sqlite3.connect(db_path or DB_PATH)
     return conn
 
-def create_table():
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
+# -----------------------------
+# SCHÉMA VERSIONNÉ
+# -----------------------------
+# PRAGMA user_version contient le numéro de la dernière migration appliquée ;
+# create_table() applique dans l'ordre celles qui manquent, chacune dans sa transaction.
+
+def _migration_1(conn):
+    # Table d'origine
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS animals (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             categorie TEXT,
@@ -21,13 +42,358 @@ def create_table():
             image_lien TEXT
         )
     """)
-    conn.commit()
+
+def _migration_2(conn):
+    # Identifiant CoinAfrique de l'annonce (mode incrémental)
+    colonnes = [row[1] for row in conn.execute("PRAGMA table_info(animals)")]
+    if "annonce_id" not in colonnes:
+        conn.execute("ALTER TABLE animals ADD COLUMN annonce_id INTEGER")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_animals_annonce_id ON animals (annonce_id)")
+
+def _prix_reel(prix):
+    # Ancienne colonne TEXT : "200000.0", "200000" ou NULL ; tout le reste devient NULL
+    try:
+        return float(prix) if prix is not None else None
+    except ValueError:
+        return None
+
+def _migration_3(conn):
+    # Colonnes typées (prix REAL), date de scraping, clé unique et index de requête.
+    # SQLite ne sait pas changer le type d'une colonne : la table est reconstruite.
+    # Les identifiants manquants sont déduits du lien de l'image ; en cas de doublon
+    # la ligne la plus récente l'emporte.
+    conn.create_function("annonce_id_image", 1, annonce_id, deterministic=True)
+    conn.create_function("prix_reel", 1, _prix_reel, deterministic=True)
+    conn.execute("""
+        CREATE TABLE animals_v3 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            annonce_id INTEGER UNIQUE,
+            categorie TEXT,
+            nom TEXT,
+            prix REAL,
+            adresse TEXT,
+            image_lien TEXT,
+            scraped_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        INSERT OR REPLACE INTO animals_v3 (id, annonce_id, categorie, nom, prix, adresse, image_lien)
+        SELECT id, COALESCE(annonce_id, annonce_id_image(image_lien)), categorie, nom,
+               prix_reel(prix), adresse, image_lien
+        FROM animals
+        ORDER BY id
+    """)
+    conn.execute("DROP TABLE animals")
+    conn.execute("ALTER TABLE animals_v3 RENAME TO animals")
+    conn.execute("CREATE INDEX idx_animals_categorie_prix ON animals (categorie, prix)")
+    conn.execute("CREATE INDEX idx_animals_adresse ON animals (adresse)")
+    conn.execute("CREATE INDEX idx_animals_prix ON animals (prix)")
+
+def _migration_4(conn):
+    # Sources déjà importées (bases historiques, exports CSV) et leur signature,
+    # pour ne pas réimporter un fichier inchangé
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS imports (
+            source TEXT PRIMARY KEY,
+            signature TEXT NOT NULL,
+            lignes INTEGER,
+            imported_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def _migration_5(conn):
+    # File de jobs de scraping exécutés en arrière-plan (database/jobs.py)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            methode TEXT NOT NULL,
+            max_pages INTEGER NOT NULL,
+            incremental INTEGER NOT NULL,
+            statut TEXT NOT NULL DEFAULT 'queued',
+            annulation INTEGER NOT NULL DEFAULT 0,
+            erreur TEXT,
+            resume TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            started_at TEXT,
+            finished_at TEXT,
+            heartbeat TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_statut ON jobs (statut)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_pages (
+            job_id INTEGER NOT NULL REFERENCES jobs (id),
+            categorie TEXT NOT NULL,
+            page INTEGER NOT NULL,
+            annonces INTEGER NOT NULL,
+            PRIMARY KEY (job_id, categorie, page)
+        )
+    """)
+
+def _migration_6(conn):
+    # Historique des prix : une observation par annonce et par passage (ajout seul),
+    # agrégats quotidiens par catégorie et ville (database/historique.py) et état interne
+    conn.create_function("ville", 1, ville, deterministic=True)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS observations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            annonce_id INTEGER,
+            categorie TEXT NOT NULL,
+            ville TEXT,
+            prix REAL,
+            observed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_observations_observed_at ON observations (observed_at)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS prix_journaliers (
+            jour TEXT NOT NULL,
+            categorie TEXT NOT NULL,
+            ville TEXT NOT NULL,
+            annonces INTEGER NOT NULL,
+            avec_prix INTEGER NOT NULL,
+            mediane REAL,
+            p10 REAL,
+            p90 REAL,
+            PRIMARY KEY (jour, categorie, ville)
+        )
+    """)
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (cle TEXT PRIMARY KEY, valeur INTEGER NOT NULL)")
+    # Les annonces déjà en base forment la première observation
+    conn.execute("""
+        INSERT INTO observations (annonce_id, categorie, ville, prix, observed_at)
+        SELECT annonce_id, categorie, ville(adresse), prix, scraped_at
+        FROM animals WHERE categorie IS NOT NULL
+        ORDER BY scraped_at
+    """)
+
+# Classe d'histogramme d'un prix, en SQL pur (utilisable dans les triggers) :
+# chiffre de tête et nombre de chiffres, 350000 -> 53 = [300 000, 400 000[ ;
+# 9 classes par puissance de 10, 0 pour les prix inférieurs à 1
+def _classe_prix_sql(prix):
+    entier = f"CAST(CAST({prix} AS INTEGER) AS TEXT)"
+    return (f"CASE WHEN {prix} >= 1 THEN (length({entier}) - 1) * 10 "
+            f"+ CAST(substr({entier}, 1, 1) AS INTEGER) ELSE 0 END")
+
+def borne_classe(classe):
+    """Bornes [basse, haute[ d'une classe d'histogramme (voir _classe_prix_sql)."""
+    if classe <= 0:
+        return 0.0, 1.0
+    chiffres, tete = divmod(classe, 10)
+    return float(tete * 10 ** chiffres), float((tete + 1) * 10 ** chiffres)
+
+def _maj_resume_sql(ligne, signe):
+    # Ajoute (signe +1, ligne NEW) ou retire (signe -1, ligne OLD) une annonce des résumés ;
+    # les clés NULL sont rangées sous '' et exclues des requêtes
+    return f"""
+        INSERT INTO resume_categories (categorie, annonces, somme_prix)
+        VALUES (COALESCE({ligne}.categorie, ''), {signe}, {signe} * {ligne}.prix)
+        ON CONFLICT (categorie) DO UPDATE SET
+            annonces = annonces + excluded.annonces, somme_prix = somme_prix + excluded.somme_prix;
+        INSERT INTO resume_adresses (adresse, annonces)
+        VALUES (COALESCE({ligne}.adresse, ''), {signe})
+        ON CONFLICT (adresse) DO UPDATE SET annonces = annonces + excluded.annonces;
+        INSERT INTO resume_histogramme (categorie, classe, annonces)
+        VALUES (COALESCE({ligne}.categorie, ''), {_classe_prix_sql(f"{ligne}.prix")}, {signe})
+        ON CONFLICT (categorie, classe) DO UPDATE SET annonces = annonces + excluded.annonces;
+    """
+
+def _migration_7(conn):
+    # Résumés du dashboard (annonces ayant un prix) tenus à jour par triggers à chaque
+    # écriture dans animals, et compteur de génération de la base (meta "generation")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resume_categories (
+            categorie TEXT PRIMARY KEY,
+            annonces INTEGER NOT NULL,
+            somme_prix REAL NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resume_adresses (
+            adresse TEXT PRIMARY KEY,
+            annonces INTEGER NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_resume_adresses_annonces ON resume_adresses (annonces)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resume_histogramme (
+            categorie TEXT NOT NULL,
+            classe INTEGER NOT NULL,
+            annonces INTEGER NOT NULL,
+            PRIMARY KEY (categorie, classe)
+        )
+    """)
+    conn.execute("""
+        INSERT INTO resume_categories (categorie, annonces, somme_prix)
+        SELECT COALESCE(categorie, ''), COUNT(*), SUM(prix) FROM animals
+        WHERE prix IS NOT NULL GROUP BY 1
+    """)
+    conn.execute("""
+        INSERT INTO resume_adresses (adresse, annonces)
+        SELECT COALESCE(adresse, ''), COUNT(*) FROM animals
+        WHERE prix IS NOT NULL GROUP BY 1
+    """)
+    conn.execute(f"""
+        INSERT INTO resume_histogramme (categorie, classe, annonces)
+        SELECT COALESCE(categorie, ''), {_classe_prix_sql("prix")}, COUNT(*) FROM animals
+        WHERE prix IS NOT NULL GROUP BY 1, 2
+    """)
+    conn.execute("INSERT OR IGNORE INTO meta (cle, valeur) VALUES ('generation', 0)")
+
+    conn.execute(f"""
+        CREATE TRIGGER resume_animals_insert AFTER INSERT ON animals WHEN NEW.prix IS NOT NULL
+        BEGIN {_maj_resume_sql("NEW", 1)} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER resume_animals_delete AFTER DELETE ON animals WHEN OLD.prix IS NOT NULL
+        BEGIN {_maj_resume_sql("OLD", -1)} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER resume_animals_update_old AFTER UPDATE OF categorie, prix, adresse ON animals
+        WHEN OLD.prix IS NOT NULL
+        BEGIN {_maj_resume_sql("OLD", -1)} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER resume_animals_update_new AFTER UPDATE OF categorie, prix, adresse ON animals
+        WHEN NEW.prix IS NOT NULL
+        BEGIN {_maj_resume_sql("NEW", 1)} END
+    """)
+    for operation in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(f"""
+            CREATE TRIGGER generation_animals_{operation.lower()} AFTER {operation} ON animals
+            BEGIN UPDATE meta SET valeur = valeur + 1 WHERE cle = 'generation'; END
+        """)
+
+def _migration_8(conn):
+    # Recherche (database/recherche.py) : index plein texte FTS5 des titres et adresses
+    # (contenu lu dans animals, synchronisé par triggers) et index de pagination par catégorie
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS animals_fts USING fts5(
+            nom, adresse,
+            content = 'animals', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER animals_fts_insert AFTER INSERT ON animals
+        BEGIN
+            INSERT INTO animals_fts (rowid, nom, adresse) VALUES (NEW.id, NEW.nom, NEW.adresse);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER animals_fts_delete AFTER DELETE ON animals
+        BEGIN
+            INSERT INTO animals_fts (animals_fts, rowid, nom, adresse) VALUES ('delete', OLD.id, OLD.nom, OLD.adresse);
+        END
+    """)
+    # Un upsert réécrit nom et adresse même inchangés : on ne réindexe que s'ils changent
+    conn.execute("""
+        CREATE TRIGGER animals_fts_update AFTER UPDATE OF nom, adresse ON animals
+        WHEN OLD.nom IS NOT NEW.nom OR OLD.adresse IS NOT NEW.adresse
+        BEGIN
+            INSERT INTO animals_fts (animals_fts, rowid, nom, adresse) VALUES ('delete', OLD.id, OLD.nom, OLD.adresse);
+            INSERT INTO animals_fts (rowid, nom, adresse) VALUES (NEW.id, NEW.nom, NEW.adresse);
+        END
+    """)
+    conn.execute("INSERT INTO animals_fts (animals_fts) VALUES ('rebuild')")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_animals_categorie ON animals (categorie)")
+
+def _migration_9(conn):
+    # Quasi-doublons (database/doublons.py) : clé de bloc, annonce originale, blocs à revoir
+    # (notés par trigger) ; les doublons sortent des résumés du dashboard
+    from database.doublons import cle_doublon
+
+    conn.execute("ALTER TABLE animals ADD COLUMN cle_doublon INTEGER")
+    conn.execute("ALTER TABLE animals ADD COLUMN doublon_de INTEGER")
+    conn.create_function("cle_doublon", 4, cle_doublon, deterministic=True)
+    conn.execute("UPDATE animals SET cle_doublon = cle_doublon(categorie, nom, prix, adresse)")
+    conn.execute("CREATE INDEX idx_animals_cle_doublon ON animals (cle_doublon, annonce_id)")
+    conn.execute("CREATE INDEX idx_animals_doublon_de ON animals (doublon_de)")
+    conn.execute("CREATE TABLE IF NOT EXISTS blocs_doublons_a_verifier (cle INTEGER PRIMARY KEY)")
+    conn.execute("""
+        INSERT OR IGNORE INTO blocs_doublons_a_verifier (cle)
+        SELECT cle_doublon FROM animals WHERE cle_doublon IS NOT NULL
+    """)
+    for declencheur, ligne in (("INSERT", "NEW"), ("DELETE", "OLD")):
+        conn.execute(f"""
+            CREATE TRIGGER doublons_animals_{declencheur.lower()} AFTER {declencheur} ON animals
+            WHEN {ligne}.cle_doublon IS NOT NULL
+            BEGIN INSERT OR IGNORE INTO blocs_doublons_a_verifier (cle) VALUES ({ligne}.cle_doublon); END
+        """)
+    conn.execute("""
+        CREATE TRIGGER doublons_animals_update AFTER UPDATE OF cle_doublon ON animals
+        WHEN OLD.cle_doublon IS NOT NEW.cle_doublon
+        BEGIN
+            INSERT OR IGNORE INTO blocs_doublons_a_verifier (cle) SELECT OLD.cle_doublon WHERE OLD.cle_doublon IS NOT NULL;
+            INSERT OR IGNORE INTO blocs_doublons_a_verifier (cle) SELECT NEW.cle_doublon WHERE NEW.cle_doublon IS NOT NULL;
+        END
+    """)
+
+    # Résumés : mêmes triggers qu'à la migration 7, limités aux annonces originales
+    for nom in ("insert", "delete", "update_old", "update_new"):
+        conn.execute(f"DROP TRIGGER resume_animals_{nom}")
+    conn.execute(f"""
+        CREATE TRIGGER resume_animals_insert AFTER INSERT ON animals
+        WHEN NEW.prix IS NOT NULL AND NEW.doublon_de IS NULL
+        BEGIN {_maj_resume_sql("NEW", 1)} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER resume_animals_delete AFTER DELETE ON animals
+        WHEN OLD.prix IS NOT NULL AND OLD.doublon_de IS NULL
+        BEGIN {_maj_resume_sql("OLD", -1)} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER resume_animals_update_old AFTER UPDATE OF categorie, prix, adresse, doublon_de ON animals
+        WHEN OLD.prix IS NOT NULL AND OLD.doublon_de IS NULL
+        BEGIN {_maj_resume_sql("OLD", -1)} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER resume_animals_update_new AFTER UPDATE OF categorie, prix, adresse, doublon_de ON animals
+        WHEN NEW.prix IS NOT NULL AND NEW.doublon_de IS NULL
+        BEGIN {_maj_resume_sql("NEW", 1)} END
+    """)
+
+def _migration_10(conn):
+    # Option des jobs : téléchargement des miniatures (scrapers/images.py)
+    conn.execute("ALTER TABLE jobs ADD COLUMN images INTEGER NOT NULL DEFAULT 0")
+
+def _migration_11(conn):
+    # Annonces écrites par un job (filtre catégorie + scraped_at >= début du job, app.py)
+    conn.execute("CREATE INDEX idx_animals_categorie_scraped_at ON animals (categorie, scraped_at)")
+
+MIGRATIONS = [_migration_1, _migration_2, _migration_3, _migration_4, _migration_5, _migration_6,
+              _migration_7, _migration_8, _migration_9, _migration_10, _migration_11]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def migrate(conn):
+    """Amène la base à SCHEMA_VERSION ; retourne la version de départ."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for numero in range(version + 1, SCHEMA_VERSION + 1):
+        conn.execute("BEGIN")
+        try:
+            MIGRATIONS[numero - 1](conn)
+            conn.execute(f"PRAGMA user_version = {numero}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return version
+
+def create_table(db_path=None):
+    conn = create_connection(db_path)
+    migrate(conn)
     conn.close()
 
-def clear_table():
-    conn = create_connection()
+def clear_table(db_path=None):
+    """
+    Vide la table animals. Les repères d'import partent avec elle : l'ancienne base
+    et les exports CSV, dont les annonces viennent d'être supprimées, seront réimportés
+    (fusionner_base, importer_dossier) au lieu d'être ignorés comme déjà faits.
+    """
+    conn = create_connection(db_path)
     cursor = conn.cursor()
     cursor.execute("DELETE FROM animals")
+    cursor.execute("DELETE FROM imports")
     conn.commit()
     conn.close()
 
@@ -39,4 +405,198 @@ def save_to_db(categorie, nom, prix, adresse, image_lien):
         VALUES (?, ?, ?, ?, ?)
     """, (categorie, nom, prix, adresse, image_lien))
     conn.commit()
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+
+# Une annonce déjà connue (même annonce_id) est mise à jour au lieu d'être dupliquée ;
+# les lignes sans identifiant (NULL) sont toujours insérées
+UPSERT_SQL = """
+    INSERT INTO animals (annonce_id, categorie, nom, prix, adresse, image_lien, cle_doublon)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (annonce_id) DO UPDATE SET
+        categorie = excluded.categorie,
+        nom = excluded.nom,
+        prix = excluded.prix,
+        adresse = excluded.adresse,
+        image_lien = excluded.image_lien,
+        cle_doublon = excluded.cle_doublon,
+        scraped_at = excluded.scraped_at
+"""
+
+# Une observation par annonce écrite ; observed_at NULL = maintenant
+OBSERVATION_SQL = """
+    INSERT INTO observations (annonce_id, categorie, ville, prix, observed_at)
+    VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+"""
+
+
+class BatchWriter:
+    """
+    Écriture bufferisée dans la table animals.
+    Garde une seule connexion ouverte (journal WAL), accumule les lignes
+    et les insère par paquets avec executemany. Le buffer est vidé dès que
+    batch_size lignes sont en attente ou que flush_interval secondes se sont
+    écoulées depuis le dernier commit, et à la fermeture.
+
+    Les lignes portant un annonce_id sont upsertées (voir UPSERT_SQL), et chaque
+    ligne est aussi notée dans l'historique des observations.
+
+    Utilisation :
+        with BatchWriter() as writer:
+            writer.add(categorie, nom, prix, adresse, image_lien, annonce_id=annonce_id,
+                       cle_doublon=cle_doublon)
+    """
+
+    def __init__(self, db_path=None, batch_size=500, flush_interval=5.0, metrics=None):
+        self.batch_size = batch_size
+        self.metrics = metrics  # RunMetrics optionnel (scrapers/metrics.py) : étape db, compteur rows
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self.conn = create_connection(db_path)
+        # WAL : les lecteurs (dashboard) ne bloquent pas l'écriture,
+        # et synchronous=NORMAL évite un fsync à chaque commit
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+    def add(self, categorie, nom, prix, adresse, image_lien, annonce_id=None, cle_doublon=None):
+        self._buffer.append((annonce_id, categorie, nom, prix, adresse, image_lien, cle_doublon))
+        if (len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            start = time.perf_counter()
+            with self.conn:  # une transaction par paquet
+                self.conn.executemany(UPSERT_SQL, self._buffer)
+                self.conn.executemany(OBSERVATION_SQL, [
+                    (aid, categorie, ville(adresse), prix, None)
+                    for aid, categorie, nom, prix, adresse, image_lien, cle in self._buffer
+                ])
+            if self.metrics is not None:
+                self.metrics.observe("db", time.perf_counter() - start)
+                self.metrics.add("rows", len(self._buffer))
+            self.rows_written += len(self._buffer)
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def known_ids(self):
+        """Identifiants d'annonces déjà en base (buffer compris)."""
+        self.flush()
+        return {row[0] for row in self.conn.execute(
+            "SELECT annonce_id FROM animals WHERE annonce_id IS NOT NULL"
+        )}
+
+    def close(self):
+        if self.conn is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+# -----------------------------
+# SOURCES IMPORTÉES
+# -----------------------------
+def signature_importee(conn, source):
+    row = conn.execute("SELECT signature FROM imports WHERE source = ?", (source,)).fetchone()
+    return row[0] if row else None
+
+def deja_importe(conn, source, signature):
+    return signature_importee(conn, source) == signature
+
+def marquer_importe(conn, source, signature, lignes):
+    conn.execute("""
+        INSERT INTO imports (source, signature, lignes) VALUES (?, ?, ?)
+        ON CONFLICT (source) DO UPDATE SET
+            signature = excluded.signature,
+            lignes = excluded.lignes,
+            imported_at = CURRENT_TIMESTAMP
+    """, (source, signature, lignes))
+
+
+# -----------------------------
+# REQUÊTES (dashboard)
+# -----------------------------
+# Les agrégats portent sur les annonces ayant un prix et sont lus dans les
+# tables resume_* (migration 7), tenues à jour par triggers : leur coût ne
+# dépend pas de la taille de la table animals.
+
+def _lire(sql, db_path=None, params=()):
+    conn = create_connection(db_path)
+    try:
+        return pd.read_sql(sql, conn, params=params)
+    finally:
+        conn.close()
+
+def generation(db_path=None):
+    """Compteur incrémenté à chaque écriture dans animals (clé de cache du dashboard)."""
+    conn = create_connection(db_path)
+    try:
+        row = conn.execute("SELECT valeur FROM meta WHERE cle = 'generation'").fetchone()
+        return row[0] if row else 0
+    finally:
+        conn.close()
+
+def statistiques_globales(db_path=None):
+    """Total d'annonces, catégories, prix moyen et adresses distinctes."""
+    conn = create_connection(db_path)
+    total, categories, somme = conn.execute("""
+        SELECT SUM(annonces), COUNT(*) FILTER (WHERE categorie <> '' AND annonces > 0), SUM(somme_prix)
+        FROM resume_categories
+    """).fetchone()
+    adresses = conn.execute(
+        "SELECT COUNT(*) FROM resume_adresses WHERE adresse <> '' AND annonces > 0"
+    ).fetchone()[0]
+    conn.close()
+    total = total or 0
+    return {"total": total, "categories": categories, "prix_moyen": somme / total if total else 0,
+            "adresses": adresses}
+
+def top_adresses(limit=7, db_path=None):
+    return _lire("""
+        SELECT adresse AS Ville, annonces AS Nombre
+        FROM resume_adresses WHERE adresse <> '' AND annonces > 0
+        ORDER BY annonces DESC LIMIT ?
+    """, db_path, (limit,))
+
+def annonces_par_categorie(db_path=None):
+    return _lire("""
+        SELECT categorie AS "Catégorie", annonces AS Nombre
+        FROM resume_categories WHERE categorie <> '' AND annonces > 0
+        ORDER BY Nombre DESC
+    """, db_path)
+
+def prix_moyen_par_categorie(db_path=None):
+    return _lire("""
+        SELECT categorie AS "Catégorie", somme_prix / annonces AS "Prix moyen"
+        FROM resume_categories WHERE categorie <> '' AND annonces > 0
+        ORDER BY categorie
+    """, db_path)
+
+def histogramme_prix(db_path=None):
+    """Histogramme des prix par catégorie (classes de resume_histogramme, bornes en FCFA)."""
+    df = _lire("""
+        SELECT categorie AS "Catégorie", classe AS Classe, annonces AS Nombre
+        FROM resume_histogramme WHERE categorie <> '' AND annonces > 0
+        ORDER BY classe, categorie
+    """, db_path)
+    bornes = [borne_classe(c) for c in df["Classe"]]
+    df["Borne basse"] = [b[0] for b in bornes]
+    df["Borne haute"] = [b[1] for b in bornes]
+    return df
+
+def prix_par_categorie(db_path=None):
+    """Couples (categorie, prix) pour la distribution des prix."""
+    return _lire("SELECT categorie, prix FROM animals WHERE prix IS NOT NULL", db_path)
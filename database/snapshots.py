@@ -0,0 +1,138 @@
+"""
+Instantanés Parquet de la table animals pour l'analyse (dashboard).
+
+Après chaque scraping terminé, toute la table est écrite en Parquet, partitionnée
+par date d'instantané puis par catégorie (partitionnement Hive) :
+
+    snapshots/date=2026-10-18/categorie=Chiens/part-0.parquet
+
+Un nouvel instantané du même jour remplace le précédent ; seuls les GARDER_JOURS
+derniers jours sont conservés. charger_snapshot() ne lit que les colonnes et les
+partitions demandées, en mémoire mappée.
+"""
+import itertools
+import os
+import shutil
+import sqlite3
+from datetime import date as Date
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from database import scraping_db
+from database.scraping_db import BASE_DIR
+
+SNAPSHOT_DIR = os.path.join(BASE_DIR, "snapshots")
+GARDER_JOURS = 30
+TAILLE_LOT = 100_000  # lignes lues dans SQLite par RecordBatch
+
+SCHEMA = pa.schema([
+    ("annonce_id", pa.int64()),
+    ("categorie", pa.string()),
+    ("nom", pa.string()),
+    ("prix", pa.float64()),
+    ("adresse", pa.string()),
+    ("image_lien", pa.string()),
+    ("scraped_at", pa.string()),
+    ("doublon_de", pa.int64()),
+    ("date", pa.string())
+])
+PARTITIONNEMENT = ds.partitioning(pa.schema([("date", pa.string()), ("categorie", pa.string())]), flavor="hive")
+
+
+def _lots(conn, jour):
+    """La table animals en pa.RecordBatch de TAILLE_LOT lignes, colonne date ajoutée."""
+    curseur = conn.execute(
+        "SELECT annonce_id, categorie, nom, prix, adresse, image_lien, scraped_at, doublon_de FROM animals"
+    )
+    while True:
+        lignes = curseur.fetchmany(TAILLE_LOT)
+        if not lignes:
+            return
+        colonnes = list(zip(*lignes)) + [[jour] * len(lignes)]
+        yield pa.record_batch([pa.array(c, type=f.type) for c, f in zip(colonnes, SCHEMA)], schema=SCHEMA)
+
+
+def dates_snapshots(directory=SNAPSHOT_DIR):
+    """Dates (AAAA-MM-JJ) des instantanés présents, de la plus ancienne à la plus récente."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(nom[len("date="):] for nom in os.listdir(directory) if nom.startswith("date="))
+
+
+def ecrire_snapshot(db_path=None, directory=SNAPSHOT_DIR, jour=None):
+    """Écrit l'instantané du jour ; retourne son dossier, ou None si la table est vide."""
+    jour = jour or Date.today().isoformat()
+    final = os.path.join(directory, f"date={jour}")
+    # Écrit à côté (préfixe "_" : ignoré par la découverte des datasets) puis remplace
+    # l'instantané du jour d'un coup, pour ne jamais exposer un instantané partiel
+    temporaire = os.path.join(directory, f"_en_cours-{jour}-{os.getpid()}")
+    shutil.rmtree(temporaire, ignore_errors=True)
+
+    # Les lots sont consommés par un thread d'écriture Arrow, un seul à la fois
+    conn = sqlite3.connect(db_path or scraping_db.DB_PATH, check_same_thread=False)
+    try:
+        lots = _lots(conn, jour)
+        premier = next(lots, None)
+        if premier is None:
+            return None
+        ds.write_dataset(
+            itertools.chain([premier], lots),
+            temporaire,
+            schema=SCHEMA,
+            format="parquet",
+            partitioning=PARTITIONNEMENT,
+            basename_template="part-{i}.parquet"
+        )
+    finally:
+        conn.close()
+
+    # L'instantané précédent du jour est mis de côté par un renommage, pas supprimé avant
+    # la bascule : un lecteur ne trouve jamais un dossier à moitié effacé
+    ancien = os.path.join(directory, f"_ancien-{jour}-{os.getpid()}")
+    shutil.rmtree(ancien, ignore_errors=True)
+    if os.path.isdir(final):
+        os.replace(final, ancien)
+    os.replace(os.path.join(temporaire, f"date={jour}"), final)
+    shutil.rmtree(ancien, ignore_errors=True)
+    shutil.rmtree(temporaire, ignore_errors=True)
+
+    for ancienne in dates_snapshots(directory)[:-GARDER_JOURS]:
+        shutil.rmtree(os.path.join(directory, f"date={ancienne}"), ignore_errors=True)
+    return final
+
+
+def charger_snapshot(colonnes, categories=None, jour=None, prix_connu=False, sans_doublons=False,
+                     directory=SNAPSHOT_DIR):
+    """
+    Lit l'instantané du jour demandé (par défaut le plus récent) en DataFrame.
+    colonnes : colonnes à lire (les autres ne sont pas décodées)
+    categories : liste de catégories à lire (les autres partitions ne sont pas ouvertes)
+    prix_connu : ne garder que les annonces ayant un prix
+    sans_doublons : écarter les quasi-doublons marqués (database/doublons.py)
+    Retourne None s'il n'existe aucun instantané.
+    """
+    dates = dates_snapshots(directory)
+    if not dates:
+        return None
+    jour = jour or dates[-1]
+
+    # Seul le dossier du jour est parcouru ; les catégories écartées sont élaguées
+    # sur leur nom de partition, sans ouvrir leurs fichiers
+    dataset = ds.dataset(
+        os.path.join(directory, f"date={jour}"), format="parquet",
+        partitioning=ds.partitioning(pa.schema([("categorie", pa.string())]), flavor="hive"),
+        filesystem=pafs.LocalFileSystem(use_mmap=True)
+    )
+    filtre = None
+    if categories is not None:
+        filtre = ds.field("categorie").isin(list(categories))
+    conditions = []
+    if prix_connu:
+        conditions.append(ds.field("prix").is_valid())
+    if sans_doublons and "doublon_de" in dataset.schema.names:
+        conditions.append(ds.field("doublon_de").is_null())
+    for condition in conditions:
+        filtre = condition if filtre is None else filtre & condition
+    return dataset.to_table(columns=list(colonnes), filter=filtre).to_pandas()
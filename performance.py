@@ -0,0 +1,91 @@
+import json
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from database.jobs import derniers_jobs
+from scrapers.metrics import BUCKETS, prometheus, quantile
+
+LIBELLES_ETAPES = {
+    "attente": "Attente (débit, backoff)",
+    "fetch": "Téléchargement",
+    "parse": "Parsing",
+    "prix": "Normalisation des prix",
+    "db": "Écriture en base",
+    "image": "Miniatures",
+    "doublons": "Quasi-doublons",
+    "snapshot": "Instantané Parquet",
+    "agregats": "Agrégats quotidiens"
+}
+
+
+def tableau_etapes(metriques):
+    """Une ligne par étape : nombre de passages, temps cumulé, moyenne, p50 / p95 / max (ms)."""
+    lignes = []
+    for etape, s in metriques["stages"].items():
+        lignes.append({
+            "Étape": LIBELLES_ETAPES.get(etape, etape),
+            "Passages": s["count"],
+            "Temps cumulé (s)": round(s["sum"], 3),
+            "Moyenne (ms)": round(s["sum"] / s["count"] * 1000, 1),
+            "p50 (ms)": round(quantile(s, 0.5) * 1000, 1),
+            "p95 (ms)": round(quantile(s, 0.95) * 1000, 1),
+            "Max (ms)": round(s["max"] * 1000, 1)
+        })
+    return pd.DataFrame(lignes).sort_values("Temps cumulé (s)", ascending=False)
+
+
+def show_performance():
+    st.subheader("Performance des scrapings")
+    jobs = [job for job in derniers_jobs(20) if job["resume"].get("metriques")]
+    if not jobs:
+        st.info("Aucun scraping mesuré pour l'instant : lancez un scraping pour voir ses performances.")
+        return
+
+    # Évolution des derniers runs
+    historique = pd.DataFrame([{
+        "Job": job["id"],
+        "Méthode": job["methode"],
+        "Durée (s)": job["resume"]["metriques"]["elapsed"],
+        "Pages": job["resume"]["metriques"]["counters"].get("pages", 0),
+        "Cartes / s": job["resume"]["metriques"]["rates"].get("cards_per_s"),
+        "Lignes DB / s": job["resume"]["metriques"]["rates"].get("rows_per_s")
+    } for job in jobs]).round(2)
+    st.dataframe(historique, hide_index=True)
+
+    job = st.selectbox("Run", jobs, format_func=lambda j: f"Job n°{j['id']} ({j['methode']}, {j['finished_at']})")
+    metriques = job["resume"]["metriques"]
+    compteurs, debits = metriques["counters"], metriques["rates"]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Durée totale", f"{metriques['elapsed']:.1f} s")
+    col2.metric("Téléchargé", f"{compteurs.get('bytes', 0) / 1e6:.2f} Mo",
+                help=f"{compteurs.get('pages', 0)} pages")
+    col3.metric("Cartes parsées / s", f"{debits.get('cards_per_s', 0):,.0f}",
+                help=f"{compteurs.get('cards', 0)} cartes")
+    col4.metric("Lignes écrites / s", f"{debits.get('rows_per_s', 0):,.0f}",
+                help=f"{compteurs.get('rows', 0)} lignes")
+
+    # Répartition du temps par étape (les étapes du scraping se chevauchent entre threads)
+    etapes = tableau_etapes(metriques)
+    st.dataframe(etapes, hide_index=True)
+    st.plotly_chart(px.bar(etapes, x="Étape", y="Temps cumulé (s)", color="Étape",
+                           title="Temps cumulé par étape"), use_container_width=True)
+
+    # Histogramme de latence d'une étape
+    etape = st.selectbox("Histogramme de latence", list(metriques["stages"]),
+                         format_func=lambda e: LIBELLES_ETAPES.get(e, e))
+    classes = [f"≤ {b * 1000:g} ms" for b in BUCKETS] + [f"> {BUCKETS[-1] * 1000:g} ms"]
+    histogramme = pd.DataFrame({"Latence": classes, "Passages": metriques["stages"][etape]["buckets"]})
+    histogramme = histogramme[histogramme["Passages"].cumsum() > 0]  # sans les classes vides du début
+    st.plotly_chart(px.bar(histogramme, x="Latence", y="Passages",
+                           title=f"Latence : {LIBELLES_ETAPES.get(etape, etape)}"), use_container_width=True)
+
+    # Exports
+    col_json, col_prom = st.columns(2)
+    col_json.download_button("Exporter en JSON", json.dumps(metriques, indent=2),
+                             file_name=f"metriques_job_{job['id']}.json", mime="application/json")
+    col_prom.download_button("Exporter au format Prometheus",
+                             prometheus(metriques, {"job": job["id"], "methode": job["methode"]}),
+                             file_name=f"metriques_job_{job['id']}.prom", mime="text/plain")
@@ -0,0 +1,104 @@
+"""
+Lot compact d'annonces, de l'extraction (scrapers/parsing.py, scraper Selenium)
+jusqu'à la base et au DataFrame affiché.
+
+Une annonce y est une ligne de quatre colonnes plutôt qu'un dict à clés
+françaises : titres et liens d'images dans des listes, prix dans un
+array("d") (8 octets par prix, NaN si manquant), adresses internées : les
+quelques dizaines d'adresses distinctes ("Dakar, Sénégal"...) ne sont
+gardées qu'une fois, quel que soit le nombre d'annonces. to_frame() construit
+le DataFrame directement depuis les colonnes, adresses en Categorical.
+
+    lot = Annonces()
+    lot.ajouter("Bélier Ladoum", 350000.0, "Dakar, Sénégal", "https://images.coinafrique.com/...")
+    for annonce in lot:          # Annonce(nom, prix, adresse, image), créée à la volée
+        ...
+    lot.to_frame()               # colonnes COLONNES
+"""
+import math
+import sys
+from array import array
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Libellés des colonnes affichées et exportées
+COLONNES = ["Nom / Détails", "Prix", "Adresse", "Image"]
+
+Annonce = namedtuple("Annonce", "nom prix adresse image")
+
+
+def _interner(texte):
+    return sys.intern(texte) if isinstance(texte, str) else texte
+
+
+class Annonces:
+    """Annonces d'une page ou d'une catégorie, rangées en colonnes (voir le module)."""
+
+    __slots__ = ("noms", "prix", "adresses", "images")
+
+    def __init__(self, noms=(), prix=(), adresses=(), images=()):
+        self.noms = list(noms)
+        self.prix = prix if isinstance(prix, array) else array("d", (math.nan if p is None else p for p in prix))
+        self.adresses = [_interner(a) for a in adresses]
+        self.images = list(images)
+
+    def ajouter(self, nom, prix, adresse, image):
+        self.noms.append(nom)
+        self.prix.append(math.nan if prix is None else prix)
+        self.adresses.append(_interner(adresse))
+        self.images.append(image)
+
+    def etendre(self, autre):
+        """Ajoute les annonces d'un autre lot à la suite."""
+        self.noms.extend(autre.noms)
+        self.prix.extend(autre.prix)
+        self.adresses.extend(autre.adresses)
+        self.images.extend(autre.images)
+
+    def __len__(self):
+        return len(self.noms)
+
+    def __iter__(self):
+        return map(Annonce, self.noms, self.prix, self.adresses, self.images)
+
+    def __getitem__(self, i):
+        return Annonce(self.noms[i], self.prix[i], self.adresses[i], self.images[i])
+
+    def __eq__(self, autre):
+        if not isinstance(autre, Annonces):
+            return NotImplemented
+        # Prix comparés octet à octet : deux NaN sont égaux
+        return (self.noms == autre.noms and self.prix.tobytes() == autre.prix.tobytes()
+                and self.adresses == autre.adresses and self.images == autre.images)
+
+    def __repr__(self):
+        return f"<Annonces : {len(self)} annonces>"
+
+    def __reduce__(self):
+        # Pickle (pool de processus de scrapers/cli.py) : adresses réinternées au chargement
+        return Annonces, (self.noms, self.prix, self.adresses, self.images)
+
+    def mediane(self):
+        """Médiane des prix connus, ou None s'il n'y en a aucun."""
+        prix = np.frombuffer(self.prix, dtype=np.float64)
+        connus = prix[~np.isnan(prix)]
+        return float(np.median(connus)) if connus.size else None
+
+    def remplir_prix(self, valeur):
+        """Copie du lot où les prix manquants valent valeur."""
+        prix = np.frombuffer(self.prix, dtype=np.float64)
+        lot = Annonces.__new__(Annonces)
+        lot.noms, lot.adresses, lot.images = list(self.noms), list(self.adresses), list(self.images)
+        lot.prix = array("d", np.where(np.isnan(prix), valeur, prix).tobytes())
+        return lot
+
+    def to_frame(self):
+        """DataFrame aux colonnes COLONNES ; prix en float64 (copie du tableau), adresses en Categorical."""
+        return pd.DataFrame({
+            "Nom / Détails": self.noms,
+            "Prix": np.array(self.prix, dtype=np.float64),
+            "Adresse": pd.Categorical(self.adresses),
+            "Image": self.images
+        })
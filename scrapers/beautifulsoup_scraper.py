@@ -1,90 +1,74 @@
-import requests
-from bs4 import BeautifulSoup
-from database.scraping_db import save_to_db
-import pandas as pd
-import numpy as np
-
-def nettoyer_prix(val):
-    """
-    Nettoie la valeur du prix : supprime espaces, virgules, texte non numérique et convertit en float.
-    Retourne np.nan si valeur invalide.
-    """
-    if pd.isna(val):
-        return np.nan
-    val = str(val).strip()
-    if 'Prix sur demande' in val:
-        return np.nan
-    # Supprimer espaces et virgules
-    val = val.replace(' ', '').replace(',', '')
-    # Ne garder que les chiffres et éventuellement un point
-    chiffres = ''.join(c for c in val if c.isdigit() or c == '.')
-    if chiffres == '':
-        return np.nan
-    return float(chiffres)
+from database.scraping_db import BatchWriter
+from scrapers.annonces import Annonces
+from scrapers.fetcher import PageFetcher
+from scrapers.parsing import extract_cards
+from scrapers.pipeline import flux, notifier, regrouper, sauvegarder
 
 
-def scrape_category(categorie, base_url, max_pages=1, remplir_nan=True):
+def iter_categories(categories, max_pages=1, fetcher=None, backend=None, incremental=False,
+                    deja_vus=None, metrics=None, premiere_page=1):
     """
-    Scraper une catégorie sur CoinAfrique avec BeautifulSoup
-    et nettoyer automatiquement les prix.
+    Version en flux du scraping BeautifulSoup : génère une pipeline.Page par page
+    extraite, dès son arrivée. Les pages de toutes les catégories sont téléchargées
+    en parallèle par un PageFetcher partagé ; en mode incrémental, une page que le
+    cache HTTP du fetcher reconnaît comme inchangée n'est pas parsée.
+    categories : dict {nom de catégorie: url de base}
+    backend : backend de parsing de scrapers.parsing (défaut : le plus rapide installé)
+    incremental / deja_vus / premiere_page : voir pipeline.flux
+    metrics : RunMetrics optionnel (scrapers/metrics.py) pour le parsing ; celui du
+              téléchargement se passe au PageFetcher
+    Rien n'est écrit en base : brancher pipeline.sauvegarder sur le flux pour cela.
     """
-    data = []  # liste pour affichage / Streamlit
-
-    for page in range(1, max_pages + 1):
-        url = f"{base_url}?page={page}"
-        response = requests.get(url)
-        if response.status_code != 200:
-            print(f"Page {page} inaccessible, code {response.status_code}")
-            continue
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        annonces = soup.find_all("div", class_="col s6 m4 l3")  # adapte selon ton site
-
-        for ann in annonces:
-            # Titre / nom
-            a_tag = ann.find("a")
-            titre = a_tag['title'] if a_tag and 'title' in a_tag.attrs else "N/A"
-
-            # Localisation
-            loc_tag = ann.find("p", class_="ad__card-location")
-            location = loc_tag.span.text.strip() if loc_tag and loc_tag.span else "N/A"
+    if fetcher is None:
+        with PageFetcher() as fetcher:
+            yield from iter_categories(categories, max_pages, fetcher, backend, incremental, deja_vus,
+                                       metrics, premiere_page)
+        return
 
-            # Prix
-            prix_tag = ann.find("p", class_="ad__card-price")
-            prix_raw = prix_tag.text.strip() if prix_tag else "N/A"
-            prix = nettoyer_prix(prix_raw)
-
-            # Image
-            img_tag = ann.find("img")
-            if img_tag:
-                src = img_tag.get("src", "")
-                if src.startswith("//"):
-                    image_lien = "https:" + src
-                elif src.startswith("/"):
-                    image_lien = "https://sn.coinafrique.com" + src
-                else:
-                    image_lien = src
+    def charger(taches):
+        urls = {url: (categorie, page) for categorie, page, url in taches}
+        for url, html, inchangee in fetcher.fetch_many(urls):
+            if inchangee and incremental:
+                # Page identique au dernier passage : ni parsing ni écriture en base
+                yield urls[url], None
             else:
-                image_lien = "N/A"
+                yield urls[url], extract_cards(html, backend, metrics) if html is not None else Annonces()
+
+    yield from flux(categories, max_pages, charger, incremental, deja_vus, premiere_page)
 
-            # Sauvegarde dans la DB
-            save_to_db(categorie, titre, prix, location, image_lien)
 
-            # Ajouter à la liste pour affichage
-            data.append({
-                "Nom / Détails": titre,
-                "Prix": prix,
-                "Adresse": location,
-                "Image": image_lien
-            })
+def scrape_categories(categories, max_pages=1, remplir_nan=True, writer=None,
+                      fetcher=None, on_page=None, backend=None, incremental=False):
+    """
+    Scraper plusieurs catégories en parallèle et sauvegarder les annonces au fil de l'eau
+    (iter_categories + pipeline.sauvegarder + pipeline.regrouper).
+    on_page : callback optionnel on_page(categorie, page, nb_annonces) appelé à chaque page traitée
+    backend : backend de parsing de scrapers.parsing (défaut : le plus rapide installé)
+    incremental : ne parcourir que les pages contenant des annonces nouvelles (voir pipeline.flux)
+    Retourne un dict {catégorie: Annonces}, chaque lot dans l'ordre des pages.
+    """
+    if writer is None:
+        with BatchWriter() as writer:
+            return scrape_categories(categories, max_pages, remplir_nan, writer, fetcher, on_page,
+                                     backend, incremental)
 
-    # Transformer en DataFrame pour traitement final
-    df = pd.DataFrame(data)
+    deja_vus = writer.known_ids() if incremental else None
+    pages = sauvegarder(iter_categories(categories, max_pages, fetcher, backend, incremental, deja_vus), writer)
+    if on_page is not None:
+        pages = notifier(pages, on_page)
+    return regrouper(pages, categories, remplir_nan)
 
-    # Remplir les prix manquants par la médiane si demandé
-    if remplir_nan and not df.empty:
-        median_prix = df['Prix'].median()
-        df['Prix'] = df['Prix'].fillna(median_prix)
-        # print(f"Médiane du prix pour {categorie} : {median_prix:,.0f} FCFA")
 
-    return df.to_dict(orient="records")  # retourne la liste de dicts pour Streamlit
\ No newline at end of file
+def scrape_category(categorie, base_url, max_pages=1, remplir_nan=True, writer=None, fetcher=None,
+                    backend=None, incremental=False):
+    """
+    Scraper une catégorie sur CoinAfrique avec BeautifulSoup
+    et nettoyer automatiquement les prix.
+    writer : BatchWriter partagé entre catégories ; si absent, un writer
+    dédié est ouvert puis fermé à la fin de la catégorie.
+    fetcher : PageFetcher partagé ; si absent, un fetcher dédié est utilisé.
+    backend : backend de parsing ("html.parser", "lxml" ou "selectolax")
+    incremental : s'arrêter à la première page sans annonce nouvelle
+    """
+    return scrape_categories({categorie: base_url}, max_pages, remplir_nan, writer, fetcher,
+                             backend=backend, incremental=incremental)[categorie]
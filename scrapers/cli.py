@@ -0,0 +1,303 @@
+"""
+Scraping sans interface, pour cron ou un ordonnanceur :
+
+    python -m scrapers.cli --config crawl.toml [--db chemin.db] [--processus 4] [--sortie resume.json]
+
+Avec --db, l'export CSV, l'instantané Parquet et les caches (pages HTTP,
+miniatures) du run vont dans exports/, snapshots/ et cache/ à côté de cette
+base (--exports, --snapshots et --cache pour les placer ailleurs), et non
+dans ceux de l'application.
+
+Le fichier TOML (voir crawl.example.toml) décrit la méthode, les catégories et
+leurs plages de pages, sans plafond. Le travail est découpé en lots
+(catégorie, pages debut..fin) répartis sur un pool de processus ; chaque
+processus télécharge et parse ses lots avec son propre FetchController, le
+débit configuré étant partagé entre les processus. Les pages reviennent au
+processus principal, seul à écrire dans la base (BatchWriter), dans l'export
+CSV du job et, si demandé, dans le cache des miniatures ; suivent les mêmes
+traitements qu'un job lancé depuis l'application (runner.apres_run).
+
+Le run est enregistré dans la table jobs (suivi de progression, annulation et
+page Performance de l'application). Un résumé JSON est écrit sur la sortie
+standard, les messages de progression sur la sortie d'erreur. Codes de sortie :
+0 run complet, 1 run partiel, en échec ou annulé, 2 configuration invalide,
+3 un autre job est déjà actif.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tomllib
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext, redirect_stdout
+
+from database.jobs import JobAnnule, enregistrer_page, pouls, recuperer_orphelins, soumettre_job, terminer_job
+from database.scraping_db import BatchWriter, create_table
+from database.snapshots import SNAPSHOT_DIR
+from scrapers.config import CATEGORIES
+from scrapers.fetch_control import FetchController, merge_reports
+from scrapers.http_cache import CACHE_DIR, HttpCache
+from scrapers.images import IMAGE_DIR, ImageCache, ImagePrefetcher
+from scrapers.metrics import RunMetrics
+from scrapers.runner import EXPORT_DIR, METHODES, _consommer, apres_run
+
+# Secondes sans lot terminé au bout desquelles le heartbeat du job est rafraîchi
+# (recuperer_orphelins marquerait sinon le job en échec pendant un long lot)
+HEARTBEAT = 60
+
+SORTIE_OK, SORTIE_ECHEC, SORTIE_CONFIG, SORTIE_OCCUPE = 0, 1, 2, 3
+
+
+class ConfigInvalide(ValueError):
+    """Fichier de configuration illisible ou incohérent."""
+
+
+def _entier(valeur):
+    # En Python, True et False sont des int : un booléen du TOML ne vaut pas un nombre
+    return isinstance(valeur, int) and not isinstance(valeur, bool)
+
+
+def _plage(valeur, ou):
+    if (not isinstance(valeur, list) or len(valeur) != 2
+            or not all(_entier(v) and v >= 1 for v in valeur) or valeur[0] > valeur[1]):
+        raise ConfigInvalide(f"{ou} : pages doit valoir [debut, fin] avec 1 <= debut <= fin")
+    return tuple(valeur)
+
+
+def lire_config(chemin):
+    """
+    Lit et valide le fichier TOML. Retourne un dict avec methode, incremental,
+    images, processus, pages_par_lot, debit, cache_http et categories :
+    {nom: (url, debut, fin)}. Lève ConfigInvalide.
+    """
+    try:
+        with open(chemin, "rb") as f:
+            brut = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        raise ConfigInvalide(f"{chemin} : {e}") from e
+
+    config = {
+        "methode": brut.get("methode", "beautifulsoup"),
+        "incremental": brut.get("incremental", False),
+        "images": brut.get("images", False),
+        "processus": brut.get("processus", os.cpu_count() or 1),
+        "pages_par_lot": brut.get("pages_par_lot", 10),
+        "debit": brut.get("debit", 5.0),
+        "cache_http": brut.get("cache_http", True)
+    }
+    if config["methode"] not in METHODES:
+        raise ConfigInvalide(f"methode : {config['methode']!r} inconnue ({', '.join(METHODES)})")
+    for cle in ("incremental", "images", "cache_http"):
+        if not isinstance(config[cle], bool):
+            raise ConfigInvalide(f"{cle} : true ou false attendu")
+    for cle in ("processus", "pages_par_lot"):
+        if not _entier(config[cle]) or config[cle] < 1:
+            raise ConfigInvalide(f"{cle} : entier positif attendu")
+    if isinstance(config["debit"], bool) or not isinstance(config["debit"], (int, float)) or config["debit"] <= 0:
+        raise ConfigInvalide("debit : nombre de requêtes par seconde positif attendu")
+
+    pages = _plage(brut.get("pages", [1, 1]), "pages")
+    # Sans section [categories] : toutes les catégories de l'application
+    sections = brut.get("categories", {nom: {} for nom in CATEGORIES})
+    if not sections:
+        raise ConfigInvalide("categories : aucune catégorie à scraper")
+    config["categories"] = {}
+    for nom, options in sections.items():
+        if not isinstance(options, dict):
+            raise ConfigInvalide(f"categories.{nom} : table attendue, ex. {{ pages = [1, 50] }}")
+        url = options.get("url", CATEGORIES.get(nom))
+        if url is None:
+            raise ConfigInvalide(f"categories.{nom} : catégorie inconnue, préciser url")
+        debut, fin = _plage(options["pages"], f"categories.{nom}") if "pages" in options else pages
+        config["categories"][nom] = (url, debut, fin)
+    return config
+
+
+def decouper(config):
+    """
+    Lots (catégorie, url, debut, fin) à répartir entre les processus : des tranches
+    de pages_par_lot pages, ou une catégorie entière en mode incrémental (la
+    pagination s'y arrête à la première page sans annonce nouvelle).
+    """
+    lots = []
+    for nom, (url, debut, fin) in config["categories"].items():
+        if config["incremental"]:
+            lots.append((nom, url, debut, fin))
+            continue
+        for premiere in range(debut, fin + 1, config["pages_par_lot"]):
+            lots.append((nom, url, premiere, min(premiere + config["pages_par_lot"] - 1, fin)))
+    return lots
+
+
+def _initialiser():
+    # La sortie standard est réservée au résumé JSON du processus principal
+    sys.stdout = sys.stderr
+
+
+def _crawler_lot(methode, lot, debit, cache_http, incremental=False, deja_vus=None, http_dir=CACHE_DIR):
+    """
+    Exécuté dans un processus du pool : scrape les pages debut..fin d'une catégorie.
+    Retourne (pages, rapport du FetchController, RunMetrics.snapshot()).
+    """
+    nom, url, debut, fin = lot
+    metrics = RunMetrics()
+    if methode == "beautifulsoup":
+        from scrapers.beautifulsoup_scraper import iter_categories
+        from scrapers.fetcher import PageFetcher
+
+        controller = FetchController(rate=debit)
+        cache = HttpCache(http_dir) if cache_http else None
+        try:
+            with PageFetcher(cache=cache, controller=controller, metrics=metrics) as fetcher:
+                pages = list(iter_categories({nom: url}, fin, fetcher, incremental=incremental,
+                                             deja_vus=deja_vus, metrics=metrics, premiere_page=debut))
+        finally:
+            if cache is not None:
+                cache.close()
+    else:
+        from scrapers.driver_pool import DriverPool
+        from scrapers.selenium_scraper import iter_categories_selenium
+
+        controller = FetchController(rate=debit, target_latency=15.0)
+        with DriverPool(size=min(2, fin - debut + 1)) as pool:
+            pages = list(iter_categories_selenium({nom: url}, fin, pool, incremental=incremental,
+                                                  deja_vus=deja_vus, controller=controller,
+                                                  metrics=metrics, premiere_page=debut))
+    return pages, controller.report(), metrics.snapshot()
+
+
+def crawler(config, job_id, db_path=None, processus=None, export_dir=EXPORT_DIR, snapshot_dir=SNAPSHOT_DIR,
+            cache_dir=None):
+    """
+    Répartit les lots de config sur un pool de processus et écrit leurs pages au fil
+    des lots terminés. Retourne le résumé du run ; JobAnnule est levée si l'annulation
+    du job est demandée (les lots déjà démarrés se terminent, les autres sont abandonnés).
+    """
+    processus = processus or config["processus"]
+    # cache_dir : dossier des caches (http/, images/), ceux de l'application par défaut
+    http_dir = os.path.join(cache_dir, "http") if cache_dir else CACHE_DIR
+    image_dir = os.path.join(cache_dir, "images") if cache_dir else IMAGE_DIR
+    lots = decouper(config)
+    metrics = RunMetrics()
+
+    def on_page(categorie, page, nb_annonces):
+        metrics.add("pages")
+        if enregistrer_page(job_id, categorie, page, nb_annonces, db_path):
+            raise JobAnnule()
+
+    os.makedirs(export_dir, exist_ok=True)
+    resume = {"export": os.path.join(export_dir, f"job_{job_id}.csv"), "lots": len(lots), "lots_en_echec": []}
+    rapports = []
+    images = ImagePrefetcher(ImageCache(image_dir), metrics=metrics) if config["images"] else None
+    # Chaque processus démarre à neuf (spawn) : pas de threads ni de connexions hérités
+    executor = ProcessPoolExecutor(max_workers=min(processus, len(lots)),
+                                   mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_initialiser)
+    try:
+        with BatchWriter(db_path, metrics=metrics) as writer, images or nullcontext():
+            deja_vus = writer.known_ids() if config["incremental"] else None
+            # Le débit configuré vaut pour tout le crawl : chaque processus en prend sa part
+            debit = config["debit"] / min(processus, len(lots))
+            futures = {
+                executor.submit(_crawler_lot, config["methode"], lot, debit, config["cache_http"],
+                                config["incremental"], deja_vus, http_dir): lot
+                for lot in lots
+            }
+            restants = set(futures)
+            while restants:
+                finis, restants = wait(restants, timeout=HEARTBEAT, return_when=FIRST_COMPLETED)
+                if not finis and pouls(job_id, db_path):
+                    raise JobAnnule()
+                for future in finis:
+                    nom, _, debut, fin = futures[future]
+                    try:
+                        pages, rapport, snapshot = future.result()
+                    except Exception as e:
+                        print(f"Lot {nom} pages {debut}-{fin} en échec : {e!r}", file=sys.stderr)
+                        resume["lots_en_echec"].append({"categorie": nom, "pages": [debut, fin], "erreur": repr(e)})
+                        continue
+                    rapports.append(rapport)
+                    metrics.merge(snapshot)
+                    _consommer(pages, writer, on_page, resume["export"], images)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        resume["requetes"] = merge_reports(rapports)
+        if images is not None:
+            resume["images"] = dict(images.summary(), cache=images.cache.summary())
+            images.cache.close()
+    resume["annonces"] = writer.rows_written
+    resume.update(apres_run(metrics, db_path, snapshot_dir))
+    resume["metriques"] = metrics.snapshot()
+    return resume
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scraping CoinAfrique sans interface (cron).")
+    parser.add_argument("--config", required=True, help="fichier TOML, voir crawl.example.toml")
+    parser.add_argument("--db", default=None, help="base SQLite (défaut : celle de l'application)")
+    parser.add_argument("--exports", default=None,
+                        help="dossier de l'export CSV (défaut : exports/ à côté de --db)")
+    parser.add_argument("--snapshots", default=None,
+                        help="dossier de l'instantané Parquet (défaut : snapshots/ à côté de --db)")
+    parser.add_argument("--cache", default=None,
+                        help="dossier des caches HTTP et des miniatures (défaut : cache/ à côté de --db)")
+    parser.add_argument("--processus", type=int, default=None, help="remplace processus de la configuration")
+    parser.add_argument("--sortie", default=None, help="écrit aussi le résumé JSON dans ce fichier")
+    args = parser.parse_args(argv)
+
+    def publier(resultat, code):
+        texte = json.dumps(resultat, indent=2, ensure_ascii=False)
+        print(texte)
+        if args.sortie:
+            with open(args.sortie, "w", encoding="utf-8") as f:
+                f.write(texte + "\n")
+        return code
+
+    try:
+        config = lire_config(args.config)
+        if args.processus is not None and args.processus < 1:
+            raise ConfigInvalide("--processus : entier positif attendu")
+    except ConfigInvalide as e:
+        return publier({"statut": "config_invalide", "erreur": str(e)}, SORTIE_CONFIG)
+
+    # Une base donnée en --db garde son export, son instantané et ses caches à côté d'elle
+    base = os.path.dirname(os.path.abspath(args.db)) if args.db else None
+    export_dir = args.exports or (os.path.join(base, "exports") if base else EXPORT_DIR)
+    snapshot_dir = args.snapshots or (os.path.join(base, "snapshots") if base else SNAPSHOT_DIR)
+    cache_dir = args.cache or (os.path.join(base, "cache") if base else None)
+
+    create_table(args.db)
+    # Job d'un worker ou d'un cron arrêté brutalement : en échec, pour ne pas bloquer ce run
+    recuperer_orphelins(db_path=args.db)
+    max_pages = max(fin for _, _, fin in config["categories"].values())
+    job_id, nouveau = soumettre_job(config["methode"], max_pages, config["incremental"], config["images"],
+                                    en_cours=True, db_path=args.db)
+    if not nouveau:
+        return publier({"statut": "occupe", "job_actif": job_id}, SORTIE_OCCUPE)
+
+    resultat = {"job": job_id, "methode": config["methode"]}
+    try:
+        # print() des scrapers et du processus principal : vers la sortie d'erreur
+        with redirect_stdout(sys.stderr):
+            resume = crawler(config, job_id, args.db, args.processus, export_dir, snapshot_dir, cache_dir)
+    except JobAnnule:
+        terminer_job(job_id, "cancelled", db_path=args.db)
+        return publier(dict(resultat, statut="annule"), SORTIE_ECHEC)
+    except Exception as e:
+        traceback.print_exc()
+        terminer_job(job_id, "failed", erreur=str(e), db_path=args.db)
+        return publier(dict(resultat, statut="echec", erreur=str(e)), SORTIE_ECHEC)
+
+    # Run partiel : lots en échec ou pages abandonnées après la file de reprise
+    partiel = bool(resume["lots_en_echec"]) or resume["requetes"]["dropped"] > 0
+    erreur = f"{len(resume['lots_en_echec'])} lot(s) en échec" if resume["lots_en_echec"] else None
+    terminer_job(job_id, "done", erreur=erreur, resume=resume, db_path=args.db)
+    resultat.update(statut="partiel" if partiel else "ok", duree=round(resume["metriques"]["elapsed"], 2),
+                    pages=resume["metriques"]["counters"].get("pages", 0), **resume)
+    return publier(resultat, SORTIE_ECHEC if partiel else SORTIE_OK)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
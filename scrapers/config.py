@@ -0,0 +1,13 @@
+import os
+
+# Catégories CoinAfrique scrapées par l'application (libellé -> URL de la catégorie).
+# COINAFRIQUE_URL remplace le site, ex. par le serveur local des benchmarks :
+#   COINAFRIQUE_URL=http://127.0.0.1:8000 streamlit run app.py   (python -m benchmarks.fake_server --port 8000)
+BASE_URL = os.environ.get("COINAFRIQUE_URL", "https://sn.coinafrique.com").rstrip("/")
+
+CATEGORIES = {
+    "Chiens": f"{BASE_URL}/categorie/chiens",
+    "Moutons": f"{BASE_URL}/categorie/moutons",
+    "Poules / Lapins / Pigeons": f"{BASE_URL}/categorie/poules-lapins-et-pigeons",
+    "Autres animaux": f"{BASE_URL}/categorie/autres-animaux"
+}
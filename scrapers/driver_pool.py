@@ -0,0 +1,139 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+from scrapers.fetch_control import TransientError
+
+
+@lru_cache(maxsize=None)
+def chromedriver_path():
+    """Chemin du binaire chromedriver, résolu une seule fois par processus."""
+    return ChromeDriverManager().install()
+
+
+def new_driver():
+    """Chrome headless configuré pour le scraping."""
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    return webdriver.Chrome(service=Service(chromedriver_path()), options=options)
+
+
+class DriverPool:
+    """
+    Pool de navigateurs réutilisables.
+    Les size navigateurs sont démarrés une fois (en parallèle) puis prêtés
+    aux workers via acquire(). Un navigateur est recyclé (quit + nouveau)
+    après max_pages pages, ou tout de suite si une erreur survient pendant
+    son utilisation, pour éviter les fuites mémoire de Chrome.
+    Un navigateur qui ne démarre pas laisse sa place vide : le démarrage est
+    retenté au prêt suivant de cette place, et acquire() lève TransientError
+    (la page est retentée par le FetchController) au lieu de bloquer le job.
+    """
+
+    def __init__(self, size=2, max_pages=50, factory=new_driver, timeout=300):
+        self.size = size
+        self.max_pages = max_pages
+        self.factory = factory
+        self.timeout = timeout  # attente maximale d'une place libre dans acquire()
+        self._idle = queue.Queue()  # navigateurs libres, ou None pour une place à (re)démarrer
+        self._drivers = {}  # id(driver) -> driver, prêtés ou libres (fermés par close())
+        self._pages = {}    # id(driver) -> pages servies
+        self._lock = threading.Lock()
+        self._closed = False
+
+        def demarrer(_):
+            try:
+                return self.factory()
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            resultats = list(executor.map(demarrer, range(size)))
+        erreurs = [r for r in resultats if isinstance(r, Exception)]
+        if len(erreurs) == size:
+            raise erreurs[0]
+        for resultat in resultats:
+            if isinstance(resultat, Exception):
+                print(f"Démarrage du navigateur impossible : {resultat}")
+                self._idle.put(None)
+            else:
+                self._register(resultat)
+                self._idle.put(resultat)
+
+    def _register(self, driver):
+        with self._lock:
+            self._drivers[id(driver)] = driver
+            self._pages[id(driver)] = 0
+
+    def _quit(self, driver):
+        with self._lock:
+            self._drivers.pop(id(driver), None)
+            self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Fermeture du navigateur impossible : {e}")
+
+    def _recycle(self, driver):
+        self._quit(driver)
+        if not self._closed:
+            self._idle.put(None)  # redémarré au prochain prêt de cette place
+
+    def _take(self):
+        try:
+            driver = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TransientError(f"aucun navigateur libre après {self.timeout}s") from None
+        if driver is not None:
+            return driver
+        try:
+            driver = self.factory()
+        except Exception as e:
+            self._idle.put(None)
+            raise TransientError(f"démarrage du navigateur impossible : {e}") from e
+        self._register(driver)
+        return driver
+
+    @contextmanager
+    def acquire(self):
+        """
+        Prête un navigateur pour une page ; attend au plus timeout secondes qu'une place
+        se libère. Lève TransientError si aucune place ne se libère ou si le navigateur
+        ne démarre pas.
+        """
+        driver = self._take()
+        try:
+            yield driver
+        except Exception:
+            self._recycle(driver)
+            raise
+        with self._lock:
+            pages = self._pages.get(id(driver), 0) + 1
+            self._pages[id(driver)] = pages
+        if pages >= self.max_pages:
+            self._recycle(driver)
+        else:
+            self._idle.put(driver)
+
+    def close(self):
+        """Ferme tous les navigateurs, y compris ceux encore prêtés."""
+        self._closed = True
+        with self._lock:
+            drivers = list(self._drivers.values())
+        for driver in drivers:
+            self._quit(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
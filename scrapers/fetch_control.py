@@ -0,0 +1,324 @@
+"""
+Contrôle des téléchargements, commun aux deux scrapers (PageFetcher et pool Selenium).
+
+Pour chaque hôte :
+- un seau à jetons (TokenBucket) limite le débit de requêtes ; le débit baisse
+  de moitié sur un 429, d'un quart sur un 5xx ou une erreur réseau, d'un
+  dixième si la page met plus de target_latency secondes à arriver, et remonte
+  doucement après chaque succès rapide ;
+- un disjoncteur (CircuitBreaker) s'ouvre après breaker_threshold échecs
+  consécutifs : plus aucune requête vers l'hôte pendant breaker_pause secondes,
+  puis une seule requête d'essai décide de sa fermeture.
+
+Une requête en échec transitoire est retentée jusqu'à retries fois, avec un
+backoff exponentiel à jitter complet (Retry-After respecté). Une page encore en
+échec part dans la file de reprise de run_all(), qui la retente lors de passes
+suivantes ; au-delà de requeue passes, elle est abandonnée. report() résume le run :
+pages obtenues, retentées et abandonnées.
+
+    controller = FetchController(rate=5)
+    for url, result, error in controller.run_all(executor, urls, task):
+        ...
+    controller.report()
+"""
+import random
+import threading
+import time
+from concurrent.futures import as_completed
+from urllib.parse import urlsplit
+
+
+class TransientError(Exception):
+    """Échec qui vaut d'être retenté (réseau, 429, 5xx...) ; status vaut None pour une erreur réseau."""
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitOpen(Exception):
+    """Le disjoncteur de l'hôte est ouvert : la requête n'a pas été envoyée."""
+
+
+class TokenBucket:
+    """
+    Seau à jetons à débit adaptatif (rate requêtes/s, burst requêtes d'avance).
+    reserve() réserve un jeton et retourne l'attente avant de pouvoir l'utiliser ;
+    le solde peut devenir négatif, les appelants suivants attendent d'autant plus.
+    """
+
+    def __init__(self, rate, burst=1, min_rate=0.2, max_rate=None):
+        self.rate = rate
+        self.initial_rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate * 2
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            return max(wait, self._paused_until - now)
+
+    def pause(self, seconds):
+        """Aucun départ avant seconds secondes (Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def slow_down(self, factor):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * factor)
+
+    def speed_up(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.initial_rate / 10)
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur d'un hôte : "closed" (requêtes normales), "open" (refusées
+    pendant pause secondes après threshold échecs consécutifs), puis "half-open" :
+    une requête d'essai passe, les autres attendent son verdict.
+    """
+
+    def __init__(self, threshold=5, pause=30.0):
+        self.threshold = threshold
+        self.pause = pause
+        self.state = "closed"
+        self.trips = 0
+        self._failures = 0
+        self._reopen_at = 0.0
+        self._probing = False
+        self._cond = threading.Condition()
+
+    def allow(self):
+        """True si une requête peut partir ; en demi-ouverture, bloque pendant l'essai en cours."""
+        with self._cond:
+            while True:
+                if self.state == "closed":
+                    return True
+                if self.state == "open":
+                    if time.monotonic() < self._reopen_at:
+                        return False
+                    self.state = "half-open"
+                    self._probing = False
+                if not self._probing:
+                    self._probing = True
+                    return True
+                self._cond.wait()
+
+    def remaining(self):
+        """Secondes avant la prochaine requête d'essai (0 si le disjoncteur n'est pas ouvert)."""
+        with self._cond:
+            if self.state != "open":
+                return 0.0
+            return max(0.0, self._reopen_at - time.monotonic())
+
+    def success(self):
+        with self._cond:
+            self.state = "closed"
+            self._failures = 0
+            self._probing = False
+            self._cond.notify_all()
+
+    def failure(self):
+        with self._cond:
+            self._failures += 1
+            if self.state == "half-open" or (self.state == "closed" and self._failures >= self.threshold):
+                self.state = "open"
+                self.trips += 1
+                self._reopen_at = time.monotonic() + self.pause
+            self._probing = False
+            self._cond.notify_all()
+
+
+class FetchController:
+    """
+    Seau à jetons et disjoncteur par hôte, retries avec backoff et file de reprise.
+    rate : débit initial par hôte (requêtes/s) ; None pour ne pas limiter le débit
+    target_latency : au-delà (secondes), une réponse fait baisser le débit
+    retries / backoff / max_backoff : retries immédiats d'une requête, backoff exponentiel à jitter
+    requeue : passes de reprise des pages en échec dans run_all()
+    breaker_threshold / breaker_pause : voir CircuitBreaker
+    """
+
+    def __init__(self, rate=5.0, burst=2, min_rate=0.2, max_rate=None, target_latency=3.0,
+                 retries=3, backoff=0.5, max_backoff=30.0, requeue=2,
+                 breaker_threshold=5, breaker_pause=30.0):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.requeue = requeue
+        self.breaker_threshold = breaker_threshold
+        self.breaker_pause = breaker_pause
+
+        self.stats = {"fetched": 0, "requests": 0, "retries": 0, "requeued": 0, "dropped": 0, "errors": {}}
+        self._retried = set()  # urls ayant demandé plus d'une tentative
+        self._hosts = {}       # hôte -> (TokenBucket ou None, CircuitBreaker)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def _host(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                bucket = None if self.rate is None else TokenBucket(
+                    self.rate, self.burst, self.min_rate, self.max_rate
+                )
+                self._hosts[host] = (bucket, CircuitBreaker(self.breaker_threshold, self.breaker_pause))
+            return self._hosts[host]
+
+    def _count(self, name, url=None):
+        with self._lock:
+            self.stats[name] += 1
+            if url is not None:
+                self._retried.add(url)
+
+    def _count_error(self, error):
+        key = str(error.status) if error.status is not None else "network"
+        with self._lock:
+            self.stats["errors"][key] = self.stats["errors"].get(key, 0) + 1
+
+    def _sleep(self, seconds):
+        """Attend seconds secondes (moins si stop()) ; retourne le temps réellement attendu."""
+        if seconds <= 0:
+            return 0.0
+        start = time.perf_counter()
+        self._stopped.wait(seconds)
+        return time.perf_counter() - start
+
+    def _backoff(self, attempt, retry_after=None):
+        # Jitter complet : attente uniforme entre 0 et le plafond exponentiel
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        return max(delay, retry_after or 0)
+
+    def run(self, url, attempt, metrics=None):
+        """
+        Exécute attempt() (une tentative de requête vers url) sous le contrôle de l'hôte.
+        attempt lève TransientError pour un échec à retenter ; toute autre exception remonte.
+        Lève TransientError une fois les retries épuisés, CircuitOpen si l'hôte est coupé.
+        metrics : RunMetrics optionnel ; le temps passé à attendre le seau à jetons et le
+        backoff y est noté comme étape "attente", à part du téléchargement.
+        """
+        bucket, breaker = self._host(url)
+        attente = 0.0
+        try:
+            for n in range(self.retries + 1):
+                if self._stopped.is_set():
+                    raise TransientError(f"{url} : téléchargements interrompus")
+                if not breaker.allow():
+                    raise CircuitOpen(f"{url} : disjoncteur ouvert pour {urlsplit(url).netloc}")
+                if bucket is not None:
+                    attente += self._sleep(bucket.reserve())
+                self._count("requests")
+                start = time.monotonic()
+                try:
+                    result = attempt()
+                except TransientError as e:
+                    breaker.failure()
+                    self._count_error(e)
+                    if bucket is not None:
+                        bucket.slow_down(0.5 if e.status == 429 else 0.75)
+                        if e.retry_after:
+                            bucket.pause(e.retry_after)
+                    if n == self.retries:
+                        raise
+                    self._count("retries", url)
+                    attente += self._sleep(self._backoff(n, e.retry_after))
+                    continue
+                except Exception:
+                    breaker.success()  # l'hôte a répondu : l'erreur n'est pas de son fait
+                    raise
+                breaker.success()
+                if bucket is not None:
+                    if time.monotonic() - start > self.target_latency:
+                        bucket.slow_down(0.9)
+                    else:
+                        bucket.speed_up()
+                return result
+        finally:
+            if metrics is not None:
+                metrics.observe("attente", attente)
+
+    def run_all(self, executor, urls, task):
+        """
+        Soumet task(url) pour chaque url à executor et génère des triplets
+        (url, résultat, erreur) dans l'ordre d'arrivée. task passe par run() pour
+        ses requêtes ; une url dont task lève TransientError ou CircuitOpen est mise
+        en file de reprise et resoumise après la passe (une fois le disjoncteur de
+        son hôte prêt pour un essai), au plus requeue fois, puis générée avec
+        résultat None et l'erreur.
+        """
+        pending, passes = list(urls), 0
+        while pending:
+            futures = {executor.submit(task, url): url for url in pending}
+            pending = []
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    result = future.result()
+                except (TransientError, CircuitOpen) as e:
+                    if passes < self.requeue and not self._stopped.is_set():
+                        self._count("requeued", url)
+                        pending.append((url, e))
+                        continue
+                    self._count("dropped")
+                    print(f"{url} abandonnée : {e}")
+                    yield url, None, e
+                    continue
+                self._count("fetched")
+                yield url, result, None
+            if pending:
+                passes += 1
+                # Laisser aux disjoncteurs ouverts le temps de passer en demi-ouverture
+                self._sleep(max(self._host(url)[1].remaining() for url, _ in pending))
+                self._sleep(self._backoff(passes))
+                pending = [url for url, _ in pending]
+
+    def stop(self):
+        """Interrompt les attentes en cours et fait échouer les requêtes suivantes (ex. job annulé)."""
+        self._stopped.set()
+
+    def report(self):
+        """Résumé du run (dict sérialisable) : pages obtenues, retentées, abandonnées, état des hôtes."""
+        with self._lock:
+            hosts = dict(self._hosts)
+            report = dict(self.stats, errors=dict(self.stats["errors"]), retried=len(self._retried))
+        report["hosts"] = {
+            host: {"rate": None if bucket is None else round(bucket.rate, 2),
+                   "breaker": breaker.state, "trips": breaker.trips}
+            for host, (bucket, breaker) in hosts.items()
+        }
+        return report
+
+
+def merge_reports(reports):
+    """Somme de plusieurs report() (ex. un par processus) ; pour chaque hôte, le débit le plus bas."""
+    total = {"fetched": 0, "requests": 0, "retries": 0, "requeued": 0, "dropped": 0, "retried": 0,
+             "errors": {}, "hosts": {}}
+    for report in reports:
+        for key in ("fetched", "requests", "retries", "requeued", "dropped", "retried"):
+            total[key] += report[key]
+        for code, n in report["errors"].items():
+            total["errors"][code] = total["errors"].get(code, 0) + n
+        for host, etat in report["hosts"].items():
+            cumul = total["hosts"].setdefault(host, dict(etat, trips=0))
+            cumul["trips"] += etat["trips"]
+            if etat["rate"] is not None and (cumul["rate"] is None or etat["rate"] < cumul["rate"]):
+                cumul["rate"] = etat["rate"]
+            if etat["breaker"] != "closed":
+                cumul["breaker"] = etat["breaker"]
+    return total
@@ -0,0 +1,159 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scrapers.fetch_control import CircuitOpen, FetchController, TransientError
+
+USER_AGENT = "Mozilla/5.0 (compatible; scraping-coinafrique)"
+TRANSIENT_STATUS = (429, 500, 502, 503, 504)
+
+
+def _retry_after(response):
+    """Délai Retry-After en secondes (nombre ou date HTTP), ou None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class PageFetcher:
+    """
+    Téléchargement concurrent des pages avec une session requests partagée.
+    - pool de connexions keep-alive (HTTPAdapter), réutilisé par tous les threads
+    - au plus per_host requêtes simultanées par hôte
+    - débit, retries et file de reprise confiés à un FetchController
+      (scrapers/fetch_control.py) : seau à jetons adaptatif par hôte, backoff
+      exponentiel à jitter sur erreurs réseau, 429 et 5xx (Retry-After respecté),
+      disjoncteur par hôte ; controller.report() résume le run
+    - sans controller, un FetchController est créé avec un débit de
+      1 / min_interval requêtes/s par hôte (sans limite si min_interval vaut 0)
+    - cache HTTP optionnel (HttpCache) : entrées fraîches servies sans réseau,
+      sinon requêtes conditionnelles ETag / Last-Modified
+    - metrics optionnel (RunMetrics, scrapers/metrics.py) : étape fetch par page
+      téléchargée, compteur bytes
+    """
+
+    def __init__(self, max_workers=8, per_host=4, min_interval=0.2,
+                 retries=3, backoff=0.5, timeout=15, cache=None, controller=None, metrics=None):
+        self.cache = cache  # HttpCache optionnel
+        self.metrics = metrics
+        self.per_host = per_host
+        self.timeout = timeout
+        self._owns_controller = controller is None
+        self.controller = controller or FetchController(
+            rate=1 / min_interval if min_interval else None, retries=retries, backoff=backoff
+        )
+
+        # Pas de retries dans l'adapter : le controller s'en charge
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers, max_retries=0)
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._host_slots = {}   # hôte -> Semaphore(per_host)
+
+    def _slots(self, host):
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_slots[host]
+
+    def _get(self, url, headers):
+        """Une tentative de requête ; lève TransientError pour une erreur réseau, un 429 ou un 5xx."""
+        with self._slots(urlsplit(url).netloc):
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, timeout=self.timeout, headers=headers)
+            except requests.RequestException as e:
+                raise TransientError(f"{url} inaccessible : {e}") from e
+            finally:
+                # Requête seule : l'attente du débit est notée à part par le controller
+                if self.metrics is not None:
+                    self.metrics.observe("fetch", time.perf_counter() - start)
+        if response.status_code in TRANSIENT_STATUS:
+            raise TransientError(f"{url} inaccessible, code {response.status_code}",
+                                 response.status_code, _retry_after(response))
+        return response
+
+    def _fetch(self, url):
+        """
+        Retourne (html, inchangee) : html vaut None si la page n'existe pas (4xx) ;
+        inchangee est vrai si le cache sait que la page n'a pas changé depuis le dernier passage.
+        Lève TransientError ou CircuitOpen si la page reste inaccessible.
+        """
+        entry = self.cache.get(url) if self.cache else None
+        if entry and self.cache.is_fresh(entry):
+            self.cache.count("hits")
+            self.cache.count("unchanged")
+            return entry["body"], True
+
+        headers = self.cache.conditional_headers(entry) if self.cache else None
+        response = self.controller.run(url, lambda: self._get(url, headers), self.metrics)
+        if self.metrics is not None:
+            self.metrics.add("bytes", len(response.content))
+
+        if response.status_code == 304 and entry:
+            self.cache.revalidate(url)
+            self.cache.count("revalidated")
+            self.cache.count("unchanged")
+            return entry["body"], True
+        if response.status_code != 200:
+            print(f"{url} inaccessible, code {response.status_code}")
+            return None, False
+        if self.cache is None:
+            return response.text, False
+
+        self.cache.count("misses")
+        inchangee = self.cache.store(url, response, entry)
+        if inchangee:
+            self.cache.count("unchanged")
+        return response.text, inchangee
+
+    def fetch(self, url):
+        """Retourne le HTML de la page, ou None si elle est inaccessible."""
+        try:
+            return self._fetch(url)[0]
+        except (TransientError, CircuitOpen) as e:
+            print(e)
+            return None
+
+    def fetch_many(self, urls):
+        """
+        Télécharge toutes les urls en parallèle et génère des triplets
+        (url, html, inchangee) dans l'ordre d'arrivée (html vaut None pour une
+        page inaccessible, inchangee est vrai si le cache a reconnu la page).
+        Les pages en échec passent par la file de reprise du controller avant
+        d'être abandonnées.
+        """
+        for url, result, error in self.controller.run_all(self._executor, urls, self._fetch):
+            html, inchangee = result if error is None else (None, False)
+            yield url, html, inchangee
+
+    def close(self):
+        # Les pages pas encore démarrées sont abandonnées (ex. job annulé)
+        if self._owns_controller:
+            self.controller.stop()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
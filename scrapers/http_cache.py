@@ -0,0 +1,123 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, "cache", "http")
+
+
+class HttpCache:
+    """
+    Cache disque des pages de listing (SQLite dans CACHE_DIR/pages.db).
+    Pour chaque URL : corps de la page, ETag, Last-Modified et empreinte sha256.
+    - une entrée de moins de ttl secondes est servie sans requête réseau
+    - au-delà, la requête est conditionnelle (If-None-Match / If-Modified-Since)
+      et un 304 revalide l'entrée
+    - si le total dépasse max_bytes, les entrées les moins récemment lues sont évincées (LRU)
+    L'empreinte permet de savoir si une page est identique au dernier passage,
+    auquel cas le scraper peut sauter le parsing et l'écriture en base.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=300, max_bytes=50 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "unchanged": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, "pages.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                body TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                sha256 TEXT,
+                size INTEGER,
+                stored_at REAL,
+                accessed_at REAL
+            )
+        """)
+        self.conn.commit()
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(self, url):
+        """Entrée du cache pour url (dict), ou None ; met à jour la date d'accès LRU."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT body, etag, last_modified, sha256, stored_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            with self.conn:
+                self.conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), url))
+        body, etag, last_modified, sha256, stored_at = row
+        return {"body": body, "etag": etag, "last_modified": last_modified,
+                "sha256": sha256, "stored_at": stored_at}
+
+    def is_fresh(self, entry):
+        return time.time() - entry["stored_at"] < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def revalidate(self, url):
+        """Réponse 304 : l'entrée redevient fraîche pour ttl secondes."""
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE pages SET stored_at = ? WHERE url = ?", (time.time(), url))
+
+    def store(self, url, response, previous=None):
+        """
+        Enregistre une réponse 200. Retourne True si le contenu est identique
+        à l'entrée précédente (même empreinte sha256).
+        """
+        body = response.text
+        sha256 = hashlib.sha256(body.encode("utf-8")).hexdigest()
+        now = time.time()
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, body, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                     sha256, len(body.encode("utf-8")), now, now)
+                )
+            self._evict()
+        return previous is not None and previous["sha256"] == sha256
+
+    def _evict(self):
+        # Appelé sous self._lock
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        with self.conn:
+            for url, size in self.conn.execute(
+                "SELECT url, size FROM pages ORDER BY accessed_at"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                total -= size
+                self.stats["evictions"] += 1
+
+    def summary(self):
+        """Compteurs du run et occupation du cache."""
+        with self._lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+            ).fetchone()
+            return dict(self.stats, entries=entries, size_bytes=size)
+
+    def close(self):
+        self.conn.close()
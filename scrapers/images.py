@@ -0,0 +1,281 @@
+"""
+Miniatures des annonces : téléchargement anticipé et cache disque local.
+
+ImageCache range chaque image sous son empreinte sha256 (cache/images/ab/abcd...) :
+deux liens qui servent le même fichier ne l'enregistrent qu'une fois. Un index
+SQLite (index.db) relie chaque lien à son contenu et garde pour chaque contenu
+sa taille et sa date d'accès : au-delà de max_bytes, les contenus les moins
+récemment lus sont évincés (LRU).
+
+ImagePrefetcher télécharge les miniatures en parallèle (pool borné, débit
+réglé par un FetchController) sans bloquer le flux de pages : voir
+pipeline.precharger_images. L'interface lit ensuite les miniatures dans le
+cache (images_locales) au lieu de les redemander au CDN.
+"""
+import base64
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import pathname2url
+
+import requests
+
+from database.scraping_db import BASE_DIR
+from scrapers.fetch_control import CircuitOpen, FetchController, TransientError
+from scrapers.fetcher import TRANSIENT_STATUS, USER_AGENT
+
+IMAGE_DIR = os.path.join(BASE_DIR, "cache", "images")
+
+
+class ImageCache:
+    """
+    Cache disque des miniatures, adressé par contenu (voir le module).
+    Thread-safe : une connexion à l'index partagée sous verrou.
+    """
+
+    def __init__(self, directory=IMAGE_DIR, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = {"stored": 0, "deduplicated": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS contenus (
+                sha256 TEXT PRIMARY KEY,
+                mime TEXT,
+                size INTEGER,
+                accessed_at REAL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS liens (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL REFERENCES contenus (sha256)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_liens_sha256 ON liens (sha256)")
+        self.conn.commit()
+
+    def _chemin(self, sha256):
+        return os.path.join(self.directory, sha256[:2], sha256)
+
+    def contient(self, url):
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM liens WHERE url = ?", (url,)).fetchone() is not None
+
+    def lire(self, url):
+        """(contenu, mime) de l'image de url, ou None ; met à jour la date d'accès LRU."""
+        with self._lock:
+            row = self.conn.execute("""
+                SELECT c.sha256, c.mime FROM liens l JOIN contenus c ON c.sha256 = l.sha256 WHERE l.url = ?
+            """, (url,)).fetchone()
+            if row is None:
+                return None
+            with self.conn:
+                self.conn.execute("UPDATE contenus SET accessed_at = ? WHERE sha256 = ?", (time.time(), row[0]))
+        try:
+            with open(self._chemin(row[0]), "rb") as f:
+                return f.read(), row[1]
+        except FileNotFoundError:  # évincé entre-temps par un autre processus
+            return None
+
+    def data_uri(self, url):
+        """Image de url en data URI (affichable telle quelle par le navigateur), ou None."""
+        image = self.lire(url)
+        if image is None:
+            return None
+        contenu, mime = image
+        return f"data:{mime};base64,{base64.b64encode(contenu).decode('ascii')}"
+
+    def store(self, url, contenu, mime):
+        """Enregistre l'image de url ; retourne son sha256."""
+        sha256 = hashlib.sha256(contenu).hexdigest()
+        with self._lock:
+            existe = self.conn.execute("SELECT 1 FROM contenus WHERE sha256 = ?", (sha256,)).fetchone()
+            if existe:
+                self.stats["deduplicated"] += 1
+            else:
+                chemin = self._chemin(sha256)
+                os.makedirs(os.path.dirname(chemin), exist_ok=True)
+                # Écriture atomique : un lecteur ne voit jamais de fichier partiel
+                with open(chemin + ".tmp", "wb") as f:
+                    f.write(contenu)
+                os.replace(chemin + ".tmp", chemin)
+                self.stats["stored"] += 1
+            with self.conn:
+                self.conn.execute("""
+                    INSERT INTO contenus (sha256, mime, size, accessed_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (sha256) DO UPDATE SET accessed_at = excluded.accessed_at
+                """, (sha256, mime, len(contenu), time.time()))
+                self.conn.execute("INSERT OR REPLACE INTO liens (url, sha256) VALUES (?, ?)", (url, sha256))
+            self._evict()
+        return sha256
+
+    def _evict(self):
+        # Appelé sous self._lock
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM contenus").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        with self.conn:
+            for sha256, size in self.conn.execute(
+                "SELECT sha256, size FROM contenus ORDER BY accessed_at"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM liens WHERE sha256 = ?", (sha256,))
+                self.conn.execute("DELETE FROM contenus WHERE sha256 = ?", (sha256,))
+                try:
+                    os.remove(self._chemin(sha256))
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.stats["evictions"] += 1
+
+    def summary(self):
+        """Compteurs et occupation du cache."""
+        with self._lock:
+            contenus, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM contenus"
+            ).fetchone()
+            liens = self.conn.execute("SELECT COUNT(*) FROM liens").fetchone()[0]
+            return dict(self.stats, images=contenus, links=liens, size_bytes=size)
+
+    def close(self):
+        self.conn.close()
+
+
+class ImagePrefetcher:
+    """
+    Téléchargement des miniatures en arrière-plan vers un ImageCache.
+    submit() rend la main tout de suite, sauf si max_pending téléchargements
+    sont déjà en attente (le flux de pages ralentit plutôt que d'accumuler).
+    Les liens déjà en cache ou déjà soumis sont ignorés.
+    controller : FetchController (débit par hôte du CDN, retries) ; dédié si absent
+    metrics : RunMetrics optionnel (scrapers/metrics.py) : étape image, compteur image_bytes
+    """
+
+    def __init__(self, cache, max_workers=4, max_pending=64, timeout=10, controller=None, metrics=None):
+        self.cache = cache
+        self.timeout = timeout
+        self.metrics = metrics
+        self.controller = controller or FetchController(rate=10.0, retries=2, requeue=0)
+        self.stats = {"submitted": 0, "cached": 0, "downloaded": 0, "failed": 0, "bytes": 0}
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.stats[name] += n
+
+    def _get(self, url):
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise TransientError(f"{url} inaccessible : {e}") from e
+        if response.status_code in TRANSIENT_STATUS:
+            raise TransientError(f"{url} inaccessible, code {response.status_code}", response.status_code)
+        return response
+
+    def _download(self, url):
+        try:
+            start = time.perf_counter()
+            response = self.controller.run(url, lambda: self._get(url))
+            mime = response.headers.get("Content-Type", "").split(";")[0]
+            if response.status_code != 200 or not mime.startswith("image/"):
+                self._count("failed")
+                return
+            self.cache.store(url, response.content, mime)
+            self._count("downloaded")
+            self._count("bytes", len(response.content))
+            if self.metrics is not None:
+                self.metrics.observe("image", time.perf_counter() - start)
+                self.metrics.add("image_bytes", len(response.content))
+        except (TransientError, CircuitOpen) as e:
+            print(f"Miniature non téléchargée : {e}")
+            self._count("failed")
+        finally:
+            self._pending.release()
+
+    def submit(self, url):
+        with self._lock:
+            if url in self._seen:
+                return
+            self._seen.add(url)
+        self._count("submitted")
+        if self.cache.contient(url):
+            self._count("cached")
+            return
+        self._pending.acquire()
+        self._executor.submit(self._download, url)
+
+    def summary(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self, wait=True):
+        """Attend les téléchargements en cours (wait=False : abandonne ceux pas encore démarrés)."""
+        if not wait:
+            self.controller.stop()
+        self._executor.shutdown(wait=True, cancel_futures=not wait)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Run interrompu (ex. job annulé) : inutile de finir les téléchargements
+        self.close(wait=exc_type is None)
+        return False
+
+
+def images_locales(urls, directory=IMAGE_DIR):
+    """
+    Data URI de chaque url présente dans le cache, sinon l'url d'origine (None et "N/A" inchangés).
+    L'index est lu en lecture seule ; les dates d'accès LRU des images servies sont mises
+    à jour en une seule requête, sans attendre si un téléchargement écrit au même moment.
+    """
+    urls = list(urls)
+    index = os.path.join(directory, "index.db")
+    if not os.path.exists(index):
+        return urls  # aucune miniature téléchargée
+    # Une page du tableau : quelques dizaines de liens, une seule requête
+    cherchees = list({url for url in urls if url and url != "N/A"})
+    conn = sqlite3.connect(f"file:{pathname2url(index)}?mode=ro", uri=True)
+    try:
+        trouvees = {url: (sha256, mime) for url, sha256, mime in conn.execute(f"""
+            SELECT l.url, c.sha256, c.mime FROM liens l JOIN contenus c ON c.sha256 = l.sha256
+            WHERE l.url IN ({", ".join("?" * len(cherchees))})
+        """, cherchees)}
+    finally:
+        conn.close()
+
+    data_uris = {}
+    for url, (sha256, mime) in trouvees.items():
+        try:
+            with open(os.path.join(directory, sha256[:2], sha256), "rb") as f:
+                data_uris[url] = f"data:{mime};base64,{base64.b64encode(f.read()).decode('ascii')}"
+        except FileNotFoundError:  # évincé entre-temps
+            pass
+
+    servies = list({trouvees[url][0] for url in data_uris})
+    if servies:
+        conn = sqlite3.connect(index, timeout=0)
+        try:
+            with conn:
+                conn.execute(f"UPDATE contenus SET accessed_at = ? WHERE sha256 IN ({', '.join('?' * len(servies))})",
+                             [time.time()] + servies)
+        except sqlite3.OperationalError:
+            pass  # index verrouillé : l'ordre LRU attendra le prochain affichage
+        finally:
+            conn.close()
+    return [data_uris.get(url, url) for url in urls]
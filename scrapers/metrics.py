@@ -0,0 +1,140 @@
+"""
+Mesures d'un run de scraping, étape par étape.
+
+RunMetrics est passé aux composants (PageFetcher, extract_cards,
+scrape_page_selenium, BatchWriter...) qui chronomètrent leurs étapes :
+- fetch : une requête de téléchargement (chaque retry compte pour une requête)
+- attente : attente d'une page imposée par le débit de l'hôte et le backoff (FetchController)
+- parse : extraction des cartes d'une page ; prix : normalisation des prix de la page
+- db    : écriture d'un paquet de lignes (BatchWriter.flush)
+- doublons, snapshot, agregats : traitements après le run
+Chaque étape alimente un histogramme de latences (bornes BUCKETS, cumulées à la
+Prometheus) ; les compteurs notent octets téléchargés, pages, cartes et lignes.
+snapshot() donne un dict sérialisable (gardé dans le résumé du job),
+prometheus() le même contenu au format texte d'exposition Prometheus.
+
+    metrics = RunMetrics()
+    with metrics.timer("parse"):
+        ...
+    metrics.add("cards", 24)
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# Bornes des histogrammes de latence (secondes) ; la dernière classe est +Inf
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Débits dérivés : nom -> (compteur, étape dont le temps cumulé sert de dénominateur)
+RATES = {
+    "cards_per_s": ("cards", "parse"),
+    "rows_per_s": ("rows", "db"),
+    "bytes_per_s": ("bytes", "fetch")
+}
+
+PREFIX = "coinafrique_scraping"
+
+
+class RunMetrics:
+    """Histogrammes de latence par étape et compteurs d'un run (thread-safe)."""
+
+    def __init__(self):
+        self._start = time.monotonic()
+        self._stages = {}    # étape -> {"count", "sum", "max", "buckets": [n par classe]}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage, seconds):
+        # Classe de la durée : première borne qui la contient, sinon +Inf
+        index = next((i for i, borne in enumerate(BUCKETS) if seconds <= borne), len(BUCKETS))
+        with self._lock:
+            s = self._stages.get(stage)
+            if s is None:
+                s = self._stages[stage] = {"count": 0, "sum": 0.0, "max": 0.0,
+                                           "buckets": [0] * (len(BUCKETS) + 1)}
+            s["count"] += 1
+            s["sum"] += seconds
+            s["max"] = max(s["max"], seconds)
+            s["buckets"][index] += 1
+
+    def add(self, counter, n=1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + n
+
+    def merge(self, snapshot):
+        """Ajoute les mesures d'un autre run (ex. un processus du crawl en ligne de commande)."""
+        with self._lock:
+            for name, autre in snapshot["stages"].items():
+                s = self._stages.get(name)
+                if s is None:
+                    self._stages[name] = dict(autre, buckets=list(autre["buckets"]))
+                    continue
+                s["count"] += autre["count"]
+                s["sum"] += autre["sum"]
+                s["max"] = max(s["max"], autre["max"])
+                s["buckets"] = [a + b for a, b in zip(s["buckets"], autre["buckets"])]
+            for counter, n in snapshot["counters"].items():
+                self._counters[counter] = self._counters.get(counter, 0) + n
+
+    def snapshot(self):
+        """État courant (dict sérialisable en JSON)."""
+        with self._lock:
+            stages = {name: dict(s, buckets=list(s["buckets"])) for name, s in self._stages.items()}
+            counters = dict(self._counters)
+        rates = {}
+        for name, (counter, stage) in RATES.items():
+            if counters.get(counter) and stages.get(stage, {}).get("sum"):
+                rates[name] = counters[counter] / stages[stage]["sum"]
+        return {"elapsed": time.monotonic() - self._start, "stages": stages,
+                "counters": counters, "rates": rates}
+
+
+def quantile(stage, q):
+    """Quantile approché d'une étape (snapshot) : borne haute de la classe qui l'atteint."""
+    if not stage["count"]:
+        return None
+    rang, cumul = q * stage["count"], 0
+    for borne, n in zip(BUCKETS + (stage["max"],), stage["buckets"]):
+        cumul += n
+        if cumul >= rang:
+            return min(borne, stage["max"])
+    return stage["max"]
+
+
+def _labels(labels):
+    return ",".join(f'{k}="{v}"' for k, v in labels.items())
+
+
+def prometheus(snapshot, labels=None):
+    """Snapshot au format texte d'exposition Prometheus ; labels : ex. {"job": 12}."""
+    labels = labels or {}
+    base = _labels(labels)
+    lignes = [
+        f"# HELP {PREFIX}_stage_seconds Durée des étapes du scraping.",
+        f"# TYPE {PREFIX}_stage_seconds histogram"
+    ]
+    for stage, s in sorted(snapshot["stages"].items()):
+        etiquettes = _labels(dict(labels, stage=stage))
+        cumul = 0
+        for borne, n in zip(BUCKETS + ("+Inf",), s["buckets"]):
+            cumul += n
+            lignes.append(f'{PREFIX}_stage_seconds_bucket{{{etiquettes},le="{borne}"}} {cumul}')
+        lignes.append(f"{PREFIX}_stage_seconds_sum{{{etiquettes}}} {s['sum']}")
+        lignes.append(f"{PREFIX}_stage_seconds_count{{{etiquettes}}} {s['count']}")
+    for counter, n in sorted(snapshot["counters"].items()):
+        lignes.append(f"# TYPE {PREFIX}_{counter}_total counter")
+        lignes.append(f"{PREFIX}_{counter}_total{{{base}}} {n}")
+    for rate, valeur in sorted(snapshot["rates"].items()):
+        lignes.append(f"# TYPE {PREFIX}_{rate} gauge")
+        lignes.append(f"{PREFIX}_{rate}{{{base}}} {valeur}")
+    lignes.append(f"# TYPE {PREFIX}_elapsed_seconds gauge")
+    lignes.append(f"{PREFIX}_elapsed_seconds{{{base}}} {snapshot['elapsed']}")
+    return "\n".join(lignes) + "\n"
@@ -0,0 +1,134 @@
+"""
+Extraction des annonces d'une page de catégorie CoinAfrique.
+
+Trois backends interchangeables produisent les mêmes champs bruts par carte
+(titre, localisation, prix, src de l'image) :
+  - "html.parser" : BeautifulSoup + parser pur Python (toujours disponible)
+  - "lxml"        : lxml.html + XPath
+  - "selectolax"  : selectolax (moteur Lexbor)
+extract_cards() les range dans un lot scrapers.annonces.Annonces (prix
+normalisés, liens d'images absolus), pour les deux scrapers.
+"""
+from bs4 import BeautifulSoup
+from scrapers.annonces import Annonces
+from scrapers.config import BASE_URL
+from scrapers.prix import nettoyer_prix
+
+try:
+    import lxml.html
+except ImportError:  # backend optionnel
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # backend optionnel
+    LexborHTMLParser = None
+
+CARD_CLASS = "col s6 m4 l3"
+
+
+def lien_image(src):
+    """Rend absolu le lien d'une image (//... ou /...)."""
+    if src.startswith("//"):
+        return "https:" + src
+    elif src.startswith("/"):
+        return BASE_URL + src
+    return src
+
+
+def _cards_html_parser(html):
+    soup = BeautifulSoup(html, "html.parser")
+    for ann in soup.find_all("div", class_=CARD_CLASS):
+        a_tag = ann.find("a")
+        loc_tag = ann.find("p", class_="ad__card-location")
+        prix_tag = ann.find("p", class_="ad__card-price")
+        img_tag = ann.find("img")
+        yield (
+            a_tag.get("title") if a_tag else None,
+            loc_tag.span.text if loc_tag and loc_tag.span else None,
+            prix_tag.text if prix_tag else None,
+            img_tag.get("src", "") if img_tag else None,
+        )
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_XPATH_CARDS = f'//div[@class="{CARD_CLASS}"]'
+_XPATH_LOCATION = f"(.//p[{_has_class('ad__card-location')}])[1]//span"
+_XPATH_PRIX = f"(.//p[{_has_class('ad__card-price')}])[1]"
+
+
+def _cards_lxml(html):
+    tree = lxml.html.fromstring(html)
+    for ann in tree.xpath(_XPATH_CARDS):
+        a_tag = ann.find(".//a")
+        loc_tags = ann.xpath(_XPATH_LOCATION)
+        prix_tags = ann.xpath(_XPATH_PRIX)
+        img_tag = ann.find(".//img")
+        yield (
+            a_tag.get("title") if a_tag is not None else None,
+            loc_tags[0].text_content() if loc_tags else None,
+            prix_tags[0].text_content() if prix_tags else None,
+            img_tag.get("src", "") if img_tag is not None else None,
+        )
+
+
+def _cards_selectolax(html):
+    tree = LexborHTMLParser(html)
+    for ann in tree.css(f'div[class="{CARD_CLASS}"]'):
+        a_tag = ann.css_first("a")
+        loc_tag = ann.css_first("p.ad__card-location")
+        loc_span = loc_tag.css_first("span") if loc_tag is not None else None
+        prix_tag = ann.css_first("p.ad__card-price")
+        img_tag = ann.css_first("img")
+        yield (
+            a_tag.attributes.get("title") if a_tag is not None else None,
+            loc_span.text() if loc_span is not None else None,
+            prix_tag.text() if prix_tag is not None else None,
+            img_tag.attributes.get("src") or "" if img_tag is not None else None,
+        )
+
+
+BACKENDS = {"html.parser": _cards_html_parser}
+if lxml is not None:
+    BACKENDS["lxml"] = _cards_lxml
+if LexborHTMLParser is not None:
+    BACKENDS["selectolax"] = _cards_selectolax
+
+# Le backend installé le plus rapide (cf. benchmarks/bench_parsing.py)
+DEFAULT_BACKEND = next(b for b in ("lxml", "selectolax", "html.parser") if b in BACKENDS)
+
+
+def extract_cards(html, backend=None, metrics=None):
+    """
+    Extrait les annonces d'une page HTML.
+    backend : "html.parser", "lxml" ou "selectolax" (défaut : DEFAULT_BACKEND)
+    metrics : RunMetrics optionnel (scrapers/metrics.py) : étapes parse et prix, compteur cards
+    Retourne un lot Annonces (scrapers/annonces.py).
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"backend de parsing indisponible : {backend!r} (installés : {list(BACKENDS)})")
+    if metrics is None:
+        return _annonces(BACKENDS[backend](html))
+
+    with metrics.timer("parse"):
+        cartes = list(BACKENDS[backend](html))
+    with metrics.timer("prix"):
+        data = _annonces(cartes)
+    metrics.add("cards", len(data))
+    return data
+
+
+def _annonces(cartes):
+    data = Annonces()
+    for titre, location, prix_raw, src in cartes:
+        data.ajouter(
+            titre if titre is not None else "N/A",
+            nettoyer_prix(prix_raw.strip() if prix_raw is not None else "N/A"),
+            location.strip() if location is not None else "N/A",
+            lien_image(src) if src is not None else "N/A"
+        )
+    return data
@@ -0,0 +1,167 @@
+"""
+Flux d'annonces commun aux deux scrapers.
+
+flux() répartit les pages à charger et génère une Page (catégorie, numéro,
+annonces : lot scrapers.annonces.Annonces) dès qu'elle est extraite ; en mode incrémental il arrête la
+pagination d'une catégorie dès qu'une page ne contient plus que des annonces
+déjà connues. Les consommateurs se branchent sur le flux par étapes
+chaînables qui laissent passer les pages :
+
+    pages = iter_categories(categories, max_pages)      # ou iter_categories_selenium
+    pages = sauvegarder(pages, writer)
+    pages = exporter_csv(pages, "annonces.csv")
+    pages = precharger_images(pages, prefetcher)       # optionnel : miniatures en cache local
+    for page in pages:
+        ...
+
+regrouper() est l'étape finale qui reconstruit le dict {catégorie: Annonces}
+avec la médiane de la catégorie à la place des prix manquants ;
+remplir_mediane_courante() en est la version en flux.
+"""
+import bisect
+import csv
+import math
+import os
+from collections import namedtuple
+
+from database.doublons import cle_doublon
+from database.scraping_db import annonce_id
+from scrapers.annonces import COLONNES, Annonces
+
+Page = namedtuple("Page", "categorie page annonces")
+
+
+def flux(categories, max_pages, charger, incremental=False, deja_vus=None, premiere_page=1):
+    """
+    categories : dict {nom de catégorie: url de base}
+    max_pages / premiere_page : pages premiere_page..max_pages de chaque catégorie
+    charger : fonction qui reçoit une liste de (catégorie, page, url) et génère des
+              ((catégorie, page), annonces) dans n'importe quel ordre ; annonces est un
+              lot Annonces, ou None pour une page inchangée depuis le dernier passage
+              (déjà en base)
+    incremental : si False, toutes les pages de toutes les catégories sont
+                  chargées d'un coup ; si True, une page par catégorie à la fois,
+                  et la catégorie s'arrête à la première page sans annonce nouvelle
+                  (identifiants comparés à deja_vus et à ceux déjà vus pendant le run)
+    Génère des Page dans l'ordre d'arrivée ; une page inchangée est générée vide.
+    """
+    deja_vus = set(deja_vus or ())
+
+    if incremental:
+        taches = [(categorie, premiere_page) for categorie in categories]
+    else:
+        taches = [(categorie, page) for categorie in categories for page in range(premiere_page, max_pages + 1)]
+
+    while taches:
+        suivantes = []
+        urls = [(categorie, page, f"{categories[categorie]}?page={page}") for categorie, page in taches]
+        for (categorie, page), annonces in charger(urls):
+            # Une page inchangée (annonces None) est générée vide : rien de nouveau,
+            # la catégorie s'arrête là en mode incrémental
+            yield Page(categorie, page, annonces if annonces is not None else Annonces())
+
+            if incremental and annonces:
+                ids = {annonce_id(image) for image in annonces.images}
+                nouvelles = {aid for aid in ids if aid is not None and aid not in deja_vus}
+                deja_vus.update(nouvelles)
+                if nouvelles and page < max_pages:
+                    suivantes.append((categorie, page + 1))
+        taches = suivantes
+
+
+# -----------------------------
+# ÉTAPES DU FLUX
+# -----------------------------
+def sauvegarder(pages, writer):
+    """
+    Écrit chaque page dans la base (BatchWriter, upsert sur l'identifiant), avec
+    la clé de bloc des quasi-doublons ; database.doublons.marquer_doublons()
+    regroupe ensuite les blocs touchés, y compris avec les annonces des runs précédents.
+    """
+    for p in pages:
+        for nom, prix, adresse, image in p.annonces:
+            prix = None if _manquant(prix) else prix
+            writer.add(p.categorie, nom, prix, adresse, image, annonce_id=annonce_id(image),
+                       cle_doublon=cle_doublon(p.categorie, nom, prix, adresse))
+        yield p
+
+
+def notifier(pages, on_page):
+    """Appelle on_page(categorie, page, nb_annonces) à chaque page."""
+    for p in pages:
+        on_page(p.categorie, p.page, len(p.annonces))
+        yield p
+
+
+def exporter_csv(pages, chemin):
+    """Ajoute les annonces de chaque page à un CSV (catégorie + COLONNES), page par page."""
+    nouveau = not os.path.exists(chemin)
+    with open(chemin, "a", newline="", encoding="utf-8") as f:
+        ecrivain = csv.writer(f)
+        if nouveau:
+            ecrivain.writerow(["Catégorie"] + COLONNES)
+        for p in pages:
+            ecrivain.writerows((p.categorie,) + ann for ann in p.annonces)
+            f.flush()
+            yield p
+
+
+def precharger_images(pages, prefetcher):
+    """
+    Confie les miniatures de chaque page à un ImagePrefetcher (scrapers/images.py),
+    qui les télécharge en arrière-plan ; la page passe sans attendre.
+    """
+    for p in pages:
+        for image in p.annonces.images:
+            if image and image != "N/A":
+                prefetcher.submit(image)
+        yield p
+
+
+def remplir_mediane_courante(pages):
+    """
+    Remplace les prix manquants par la médiane des prix déjà vus dans la catégorie
+    (tant qu'aucun prix n'a été vu, le prix reste manquant). Contrairement à
+    regrouper(), la médiane ne porte que sur les pages déjà passées.
+    """
+    prix_tries = {}  # catégorie -> prix connus, triés
+    for p in pages:
+        tries = prix_tries.setdefault(p.categorie, [])
+        for prix in p.annonces.prix:
+            if not _manquant(prix):
+                bisect.insort(tries, prix)
+        if tries:
+            milieu = len(tries) // 2
+            mediane = tries[milieu] if len(tries) % 2 else (tries[milieu - 1] + tries[milieu]) / 2
+            p = p._replace(annonces=p.annonces.remplir_prix(mediane))
+        yield p
+
+
+def _manquant(prix):
+    return prix is None or (isinstance(prix, float) and math.isnan(prix))
+
+
+def regrouper(pages, categories, remplir_nan=True):
+    """
+    Étape finale : retourne un dict {catégorie: Annonces}, chaque lot
+    dans l'ordre des pages et finalisé par finaliser().
+    """
+    par_categorie = {categorie: {} for categorie in categories}  # catégorie -> {page: annonces}
+    for p in pages:
+        par_categorie[p.categorie][p.page] = p.annonces
+    resultat = {}
+    for categorie, par_page in par_categorie.items():
+        lot = Annonces()
+        for page in sorted(par_page):
+            lot.etendre(par_page[page])
+        resultat[categorie] = finaliser(lot, remplir_nan)
+    return resultat
+
+
+def finaliser(data, remplir_nan=True):
+    """
+    Remplit les prix manquants du lot par la médiane de la catégorie si demandé.
+    Le lot reste en colonnes : data.to_frame() donne le DataFrame à afficher.
+    """
+    mediane = data.mediane() if remplir_nan else None
+    return data if mediane is None else data.remplir_prix(mediane)
@@ -0,0 +1,66 @@
+"""
+Normalisation des prix CoinAfrique ("350 000CFA", "1,500 CFA", "Prix sur demande", ...).
+
+- nettoyer_prix : une valeur à la fois (référence, utilisée carte par carte)
+- nettoyer_prix_series : toute une pd.Series en opérations vectorisées
+- nettoyer_prix_arrow : tout un tableau pyarrow avec pyarrow.compute
+Les trois donnent le même résultat : float, ou NaN / null si le prix est
+absent, "sur demande" ou sans chiffre exploitable. Seule différence : là où
+nettoyer_prix lève ValueError (plusieurs points, ex. "1.2.3"), les versions
+vectorisées retournent NaN / null.
+"""
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+PRIX_SUR_DEMANDE = "Prix sur demande"
+
+# Après suppression de tout sauf chiffres et points, seul un nombre décimal
+# simple est convertible en float (exclut "", "." ou "1.2.3")
+_NON_CHIFFRES = r"[^0-9.]+"  # "+" : un remplacement par plage, bien plus rapide
+_NOMBRE_VALIDE = r"^(?:[0-9]+\.?[0-9]*|\.[0-9]+)$"
+
+def nettoyer_prix(val):
+    """
+    Nettoie la valeur du prix : supprime espaces, virgules, texte non numérique et convertit en float.
+    Retourne np.nan si valeur invalide.
+    """
+    if pd.isna(val):
+        return np.nan
+    val = str(val).strip()
+    if PRIX_SUR_DEMANDE in val:
+        return np.nan
+    # Supprimer espaces et virgules
+    val = val.replace(' ', '').replace(',', '')
+    # Ne garder que les chiffres et éventuellement un point
+    chiffres = ''.join(c for c in val if c.isdigit() or c == '.')
+    if chiffres == '':
+        return np.nan
+    return float(chiffres)
+
+def nettoyer_prix_series(values):
+    """
+    Version vectorisée de nettoyer_prix pour une pd.Series (ou tout itérable).
+    Les valeurs sont converties en chaînes Arrow, nettoyées par regex puis
+    converties en float64 ; retourne une Series float64 de même index.
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    texte = s.astype("string[pyarrow]")
+    chiffres = texte.str.replace(_NON_CHIFFRES, "", regex=True)
+    valide = chiffres.str.match(_NOMBRE_VALIDE) & ~texte.str.contains(PRIX_SUR_DEMANDE, regex=False)
+    prix = chiffres.where(valide.fillna(False)).astype("float64[pyarrow]")
+    return prix.astype("float64")
+
+def nettoyer_prix_arrow(values):
+    """
+    Version pyarrow.compute de nettoyer_prix pour un pa.Array / pa.ChunkedArray.
+    Retourne un tableau float64 où les prix invalides sont null.
+    """
+    texte = pc.cast(values, pa.string())
+    chiffres = pc.replace_substring_regex(texte, _NON_CHIFFRES, "")
+    valide = pc.and_(
+        pc.match_substring_regex(chiffres, _NOMBRE_VALIDE),
+        pc.invert(pc.match_substring(texte, PRIX_SUR_DEMANDE))
+    )
+    return pc.cast(pc.if_else(valide, chiffres, pa.scalar(None, pa.string())), pa.float64())
@@ -0,0 +1,185 @@
+"""
+Worker de scraping en arrière-plan : un thread par processus qui prend les
+jobs de la file SQLite (database/jobs.py) un par un et les exécute, en
+dehors du thread de script Streamlit.
+"""
+import os
+import threading
+import traceback
+from contextlib import nullcontext
+
+from database.jobs import (
+    JobAnnule, enregistrer_page, prendre_job, recuperer_orphelins, terminer_job
+)
+from database.doublons import marquer_doublons
+from database.fusion import fusionner_base
+from database.historique import rafraichir_agregats
+from database.import_csv import importer_dossier
+from database.scraping_db import BASE_DIR, BatchWriter, clear_table
+from database.snapshots import SNAPSHOT_DIR, ecrire_snapshot
+from scrapers.config import CATEGORIES
+from scrapers.fetch_control import FetchController
+from scrapers.images import ImageCache, ImagePrefetcher
+from scrapers.metrics import RunMetrics
+from scrapers.pipeline import exporter_csv, notifier, precharger_images, remplir_mediane_courante, sauvegarder
+
+METHODES = ("beautifulsoup", "selenium")
+EXPORT_DIR = os.path.join(BASE_DIR, "exports")  # un CSV par job
+
+
+def _consommer(pages, writer, on_page, export, images=None):
+    """
+    Branche la base, l'export CSV, le téléchargement des miniatures (si images,
+    un ImagePrefetcher) et le suivi de progression sur le flux, puis le vide.
+    La base garde les prix manquants ; l'export CSV les remplace par la médiane
+    courante de la catégorie, comme les anciens exports des scrapers.
+    """
+    pages = sauvegarder(pages, writer)
+    pages = remplir_mediane_courante(pages)
+    pages = exporter_csv(pages, export)
+    if images is not None:
+        pages = precharger_images(pages, images)
+    pages = notifier(pages, on_page)
+    for _ in pages:
+        pass
+
+
+def _scraper(job, categories, writer, on_page, resume, metrics, images):
+    """Scraping du job avec la méthode demandée ; complète resume (cache HTTP, rapport des requêtes)."""
+    deja_vus = writer.known_ids() if job["incremental"] else None
+    if job["methode"] == "beautifulsoup":
+        from scrapers.beautifulsoup_scraper import iter_categories
+        from scrapers.fetcher import PageFetcher
+        from scrapers.http_cache import HttpCache
+
+        # Pages téléchargées en parallèle à travers le cache HTTP disque
+        cache = HttpCache()
+        controller = FetchController()
+        try:
+            with PageFetcher(cache=cache, controller=controller, metrics=metrics) as fetcher:
+                pages = iter_categories(categories, job["max_pages"], fetcher,
+                                        incremental=job["incremental"], deja_vus=deja_vus,
+                                        metrics=metrics)
+                _consommer(pages, writer, on_page, resume["export"], images)
+        finally:
+            controller.stop()
+            resume["cache"] = cache.summary()
+            resume["requetes"] = controller.report()
+            cache.close()
+    else:
+        from scrapers.driver_pool import DriverPool
+        from scrapers.selenium_scraper import iter_categories_selenium
+
+        # Un pool de navigateurs démarrés une seule fois se partage toutes les pages
+        controller = FetchController(rate=2.0, target_latency=15.0)
+        try:
+            with DriverPool(size=min(4, len(categories) * job["max_pages"])) as pool:
+                pages = iter_categories_selenium(categories, job["max_pages"], pool,
+                                                 incremental=job["incremental"], deja_vus=deja_vus,
+                                                 controller=controller, metrics=metrics)
+                _consommer(pages, writer, on_page, resume["export"], images)
+        finally:
+            controller.stop()
+            resume["requetes"] = controller.report()
+
+
+def executer_job(job, categories=CATEGORIES):
+    """
+    Lance le scraping décrit par job et retourne son résumé (dict sérialisable).
+    Les annonces sont traitées en flux, page par page : écrites en base, ajoutées
+    à l'export CSV du job, et la page est notée dans job_pages. JobAnnule est levée
+    dès que l'annulation est demandée. Le résumé comprend le rapport des
+    téléchargements (pages obtenues, retentées, abandonnées : FetchController.report())
+    et les mesures du run par étape (RunMetrics.snapshot(), page Performance de l'application) ;
+    si job["images"], les miniatures sont téléchargées dans le cache local (scrapers/images.py).
+    """
+    if job["methode"] not in METHODES:
+        raise ValueError(f"méthode de scraping inconnue : {job['methode']!r}")
+
+    metrics = RunMetrics()
+
+    def on_page(categorie, page, nb_annonces):
+        metrics.add("pages")
+        if enregistrer_page(job["id"], categorie, page, nb_annonces):
+            raise JobAnnule()
+
+    # Vider la table avant un scraping complet (le mode incrémental met à jour la base) ;
+    # les annonces de l'ancienne base et des exports CSV y sont remises tout de suite
+    if not job["incremental"]:
+        clear_table()
+        fusionner_base()
+        importer_dossier()
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    resume = {"export": os.path.join(EXPORT_DIR, f"job_{job['id']}.csv")}
+    # Miniatures téléchargées en arrière-plan pendant le scraping (option du job)
+    images = ImagePrefetcher(ImageCache(), metrics=metrics) if job["images"] else None
+    try:
+        with BatchWriter(metrics=metrics) as writer, images or nullcontext():
+            _scraper(job, categories, writer, on_page, resume, metrics, images)
+    finally:
+        if images is not None:
+            resume["images"] = dict(images.summary(), cache=images.cache.summary())
+            images.cache.close()
+    resume["annonces"] = writer.rows_written
+    resume.update(apres_run(metrics))
+    resume["metriques"] = metrics.snapshot()
+    return resume
+
+
+def apres_run(metrics, db_path=None, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Traitements d'après scraping, chronométrés dans metrics : quasi-doublons des blocs
+    touchés, instantané Parquet pour le dashboard, puis agrégats quotidiens des jours
+    observés (qui invalident le cache du dashboard). Retourne leur résumé.
+    """
+    resume = {}
+    with metrics.timer("doublons"):
+        resume["doublons"] = marquer_doublons(db_path)
+    with metrics.timer("snapshot"):
+        resume["snapshot"] = ecrire_snapshot(db_path, snapshot_dir)
+    with metrics.timer("agregats"):
+        resume["jours_agreges"] = rafraichir_agregats(db_path)
+    return resume
+
+
+class JobRunner(threading.Thread):
+    """Boucle du worker : attend un job, l'exécute, note son statut final."""
+
+    def __init__(self, poll_interval=1.0):
+        super().__init__(name="scraping-worker", daemon=True)
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        recuperer_orphelins()
+        while not self._stop_event.is_set():
+            job = prendre_job()
+            if job is None:
+                self._stop_event.wait(self.poll_interval)
+                continue
+            try:
+                resume = executer_job(job)
+                terminer_job(job["id"], "done", resume=resume)
+            except JobAnnule:
+                terminer_job(job["id"], "cancelled")
+            except Exception as e:
+                traceback.print_exc()
+                terminer_job(job["id"], "failed", erreur=str(e))
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def demarrer_runner():
+    """Démarre le worker du processus s'il ne tourne pas déjà, et le retourne."""
+    global _runner
+    with _runner_lock:
+        if _runner is None or not _runner.is_alive():
+            _runner = JobRunner()
+            _runner.start()
+        return _runner
@@ -1,109 +1,208 @@
 import time
-import pandas as pd
 import numpy as np
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
+from concurrent.futures import ThreadPoolExecutor
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
 from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
-from database.scraping_db import save_to_db
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from database.scraping_db import BatchWriter
+from scrapers.annonces import Annonces
+from scrapers.parsing import extract_cards, lien_image
+from scrapers.prix import nettoyer_prix
+from scrapers.pipeline import flux, notifier, regrouper, sauvegarder
+from scrapers.driver_pool import DriverPool
+from scrapers.fetch_control import FetchController, TransientError
 
-def nettoyer_prix(val):
+CARD_SELECTOR = "div.col.s6.m4.l3"  # adapter si nécessaire
+
+# Extrait toute la grille d'annonces en un seul aller-retour WebDriver :
+# une ligne [titre, localisation, prix, image] par carte (null si absent)
+SNAPSHOT_JS = """
+return Array.from(document.querySelectorAll(arguments[0])).map(function (card) {
+    var a = card.querySelector("a");
+    var loc = card.querySelector("p.ad__card-location span");
+    var prix = card.querySelector("p.ad__card-price");
+    var img = card.querySelector("img");
+    return [
+        a ? a.getAttribute("title") : null,
+        loc ? loc.innerText : null,
+        prix ? prix.innerText : null,
+        img ? img.src : null
+    ];
+});
+"""
+
+EXTRACTION_MODES = ("js", "source", "elements")
+
+def extraire_elements(driver):
+    """Extraction carte par carte via find_element (4 appels WebDriver par carte)."""
+    data = Annonces()
+    annonces = driver.find_elements(By.CSS_SELECTOR, CARD_SELECTOR)
+
+    for ann in annonces:
+        # Titre / nom
+        try:
+            a_tag = ann.find_element(By.TAG_NAME, "a")
+            titre = a_tag.get_attribute("title") if a_tag else "N/A"
+        except NoSuchElementException:
+            titre = "N/A"
+
+        # Localisation
+        try:
+            loc_tag = ann.find_element(By.CSS_SELECTOR, "p.ad__card-location span")
+            location = loc_tag.text.strip() if loc_tag else "N/A"
+        except NoSuchElementException:
+            location = "N/A"
+
+        # Prix
+        try:
+            prix_tag = ann.find_element(By.CSS_SELECTOR, "p.ad__card-price")
+            prix_raw = prix_tag.text.strip() if prix_tag else "N/A"
+            prix = nettoyer_prix(prix_raw)
+        except NoSuchElementException:
+            prix = np.nan
+
+        # Image
+        try:
+            img_tag = ann.find_element(By.TAG_NAME, "img")
+            src = img_tag.get_attribute("src") if img_tag else ""
+            image_lien = lien_image(src or "")
+        except NoSuchElementException:
+            image_lien = "N/A"
+
+        data.ajouter(titre, prix, location, image_lien)
+    return data
+
+def extraire_snapshot(driver):
+    """Extraction de toutes les cartes en un seul execute_script."""
+    data = Annonces()
+    for titre, location, prix_raw, src in driver.execute_script(SNAPSHOT_JS, CARD_SELECTOR):
+        data.ajouter(
+            titre if titre is not None else "N/A",
+            nettoyer_prix(prix_raw.strip()) if prix_raw is not None else np.nan,
+            location.strip() if location is not None else "N/A",
+            lien_image(src) if src is not None else "N/A"
+        )
+    return data
+
+def scrape_page_selenium(driver, url, timeout=10, mode="js", metrics=None):
     """
-    Nettoie la valeur du prix : supprime espaces, virgules, texte non numérique et convertit en float.
-    Retourne np.nan si valeur invalide.
+    Charge une page de catégorie et extrait ses annonces.
+    Attend explicitement l'apparition des cartes (au plus timeout secondes)
+    au lieu d'une pause fixe ; retourne un lot Annonces (vide si la page n'a pas de carte).
+    mode :
+      - "js"       : un seul execute_script qui renvoie toute la grille
+      - "source"   : driver.page_source parsé par scrapers.parsing.extract_cards
+      - "elements" : find_element carte par carte (ancien comportement)
+    metrics : RunMetrics optionnel (scrapers/metrics.py) : étapes fetch (chargement et
+              attente des cartes) et parse, compteur cards
     """
-    if pd.isna(val):
-        return np.nan
-    val = str(val).strip()
-    if 'Prix sur demande' in val:
-        return np.nan
-    # Supprimer espaces et virgules
-    val = val.replace(' ', '').replace(',', '')
-    # Ne garder que les chiffres et éventuellement un point
-    chiffres = ''.join(c for c in val if c.isdigit() or c == '.')
-    if chiffres == '':
-        return np.nan
-    return float(chiffres)
-
-def scrape_category_selenium(categorie, base_url, max_pages=1, remplir_nan=True):
+    if mode not in EXTRACTION_MODES:
+        raise ValueError(f"mode d'extraction inconnu : {mode!r} (attendu : {EXTRACTION_MODES})")
+
+    start = time.perf_counter()
+    driver.get(url)
+    try:
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, CARD_SELECTOR))
+        )
+    except TimeoutException:
+        print(f"Aucune annonce sur {url} après {timeout}s")
+        return Annonces()
+    finally:
+        if metrics is not None:
+            metrics.observe("fetch", time.perf_counter() - start)
+
+    if mode == "source":
+        return extract_cards(driver.page_source, metrics=metrics)
+    if metrics is None:
+        return extraire_snapshot(driver) if mode == "js" else extraire_elements(driver)
+    with metrics.timer("parse"):
+        data = extraire_snapshot(driver) if mode == "js" else extraire_elements(driver)
+    metrics.add("cards", len(data))
+    return data
+
+def iter_categories_selenium(categories, max_pages=1, pool=None, mode="js", incremental=False,
+                             deja_vus=None, controller=None, metrics=None, premiere_page=1):
     """
-    Scraper une catégorie sur CoinAfrique avec Selenium
-    et nettoyer automatiquement les prix.
+    Version en flux du scraping Selenium : génère une pipeline.Page par page extraite,
+    dès son arrivée. Chaque couple (catégorie, page) est confié à un navigateur du
+    DriverPool, jusqu'à pool.size pages en parallèle.
+    mode : mode d'extraction des cartes, voir scrape_page_selenium
+    incremental / deja_vus / premiere_page : voir pipeline.flux
+    controller : FetchController (scrapers/fetch_control.py) qui règle le débit par hôte,
+                 retente les chargements en erreur et abandonne les pages qui échouent
+                 encore après la file de reprise (générées vides) ; un controller dédié
+                 est créé si absent
+    metrics : RunMetrics optionnel (scrapers/metrics.py), voir scrape_page_selenium
+    Rien n'est écrit en base : brancher pipeline.sauvegarder sur le flux pour cela.
     """
-    data = []  # liste pour affichage / Streamlit
+    if pool is None:
+        with DriverPool() as pool:
+            yield from iter_categories_selenium(categories, max_pages, pool, mode, incremental, deja_vus,
+                                                controller, metrics, premiere_page)
+        return
+    if controller is None:
+        # Un chargement Chrome est plus lent qu'un GET : latence cible plus large
+        controller = FetchController(rate=2.0, target_latency=15.0)
 
-    # Configurer Chrome en mode headless
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    def attempt(url):
+        with pool.acquire() as driver:
+            try:
+                return scrape_page_selenium(driver, url, mode=mode, metrics=metrics)
+            except WebDriverException as e:
+                # Le navigateur est recyclé par le pool ; la page sera retentée
+                raise TransientError(f"{url} : {e.msg or type(e).__name__}") from e
 
-    try:
-        for page in range(1, max_pages + 1):
-            url = f"{base_url}?page={page}"
-            driver.get(url)
-            time.sleep(2)  # laisser le temps au JS de charger
-
-            annonces = driver.find_elements(By.CSS_SELECTOR, "div.col.s6.m4.l3")  # adapter si nécessaire
-
-            for ann in annonces:
-                # Titre / nom
-                try:
-                    a_tag = ann.find_element(By.TAG_NAME, "a")
-                    titre = a_tag.get_attribute("title") if a_tag else "N/A"
-                except:
-                    titre = "N/A"
-
-                # Localisation
-                try:
-                    loc_tag = ann.find_element(By.CSS_SELECTOR, "p.ad__card-location span")
-                    location = loc_tag.text.strip() if loc_tag else "N/A"
-                except:
-                    location = "N/A"
-
-                # Prix
-                try:
-                    prix_tag = ann.find_element(By.CSS_SELECTOR, "p.ad__card-price")
-                    prix_raw = prix_tag.text.strip() if prix_tag else "N/A"
-                    prix = nettoyer_prix(prix_raw)
-                except:
-                    prix = np.nan
-
-                # Image
-                try:
-                    img_tag = ann.find_element(By.TAG_NAME, "img")
-                    src = img_tag.get_attribute("src") if img_tag else ""
-                    if src.startswith("//"):
-                        image_lien = "https:" + src
-                    elif src.startswith("/"):
-                        image_lien = "https://sn.coinafrique.com" + src
-                    else:
-                        image_lien = src
-                except:
-                    image_lien = "N/A"
-
-                # Sauvegarde dans la DB
-                save_to_db(categorie, titre, prix, location, image_lien)
-
-                # Ajouter à la liste pour affichage
-                data.append({
-                    "Nom / Détails": titre,
-                    "Prix": prix,
-                    "Adresse": location,
-                    "Image": image_lien
-                })
+    def worker(url):
+        return controller.run(url, lambda: attempt(url), metrics)
 
+    executor = ThreadPoolExecutor(max_workers=pool.size)
+
+    def charger(taches):
+        pages = {url: (categorie, page) for categorie, page, url in taches}
+        for url, annonces, error in controller.run_all(executor, pages, worker):
+            yield pages[url], annonces if error is None else Annonces()
+
+    try:
+        yield from flux(categories, max_pages, charger, incremental, deja_vus, premiere_page)
     finally:
-        driver.quit()  # fermer le navigateur
+        # Les pages pas encore démarrées sont abandonnées (ex. job annulé)
+        executor.shutdown(wait=True, cancel_futures=True)
 
-    # Transformer en DataFrame pour traitement final
-    df = pd.DataFrame(data)
+def scrape_categories_selenium(categories, max_pages=1, remplir_nan=True, writer=None,
+                               pool=None, on_page=None, mode="js", incremental=False):
+    """
+    Scraper plusieurs catégories avec Selenium et sauvegarder les annonces au fil de l'eau
+    (iter_categories_selenium + pipeline.sauvegarder + pipeline.regrouper).
+    Les annonces sont sauvegardées dans le thread appelant (le writer n'est pas thread-safe).
+    on_page : callback optionnel on_page(categorie, page, nb_annonces)
+    mode : mode d'extraction des cartes, voir scrape_page_selenium
+    incremental : ne parcourir que les pages contenant des annonces nouvelles (voir pipeline.flux)
+    Retourne un dict {catégorie: Annonces}, chaque lot dans l'ordre des pages.
+    """
+    if writer is None:
+        with BatchWriter() as writer:
+            return scrape_categories_selenium(categories, max_pages, remplir_nan, writer, pool, on_page,
+                                              mode, incremental)
 
-    # Remplir les prix manquants par la médiane si demandé
-    if remplir_nan and not df.empty:
-        median_prix = df['Prix'].median()
-        df['Prix'] = df['Prix'].fillna(median_prix)
-        # print(f"Médiane du prix pour {categorie} : {median_prix:,.0f} FCFA")
+    deja_vus = writer.known_ids() if incremental else None
+    pages = sauvegarder(iter_categories_selenium(categories, max_pages, pool, mode, incremental, deja_vus),
+                        writer)
+    if on_page is not None:
+        pages = notifier(pages, on_page)
+    return regrouper(pages, categories, remplir_nan)
 
-    return df.to_dict(orient="records")  # retourne la liste de dicts pour Streamlit
\ No newline at end of file
+def scrape_category_selenium(categorie, base_url, max_pages=1, remplir_nan=True, writer=None, pool=None,
+                             mode="js", incremental=False):
+    """
+    Scraper une catégorie sur CoinAfrique avec Selenium
+    et nettoyer automatiquement les prix.
+    writer : BatchWriter partagé entre catégories ; si absent, un writer
+    dédié est ouvert puis fermé à la fin de la catégorie.
+    pool : DriverPool partagé ; si absent, un pool dédié est démarré puis fermé.
+    mode : mode d'extraction des cartes ("js", "source" ou "elements")
+    incremental : s'arrêter à la première page sans annonce nouvelle
+    """
+    return scrape_categories_selenium({categorie: base_url}, max_pages, remplir_nan, writer, pool,
+                                      mode=mode, incremental=incremental)[categorie]
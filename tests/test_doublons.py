@@ -0,0 +1,27 @@
+from database.doublons import ECART_MAX, cle_doublon, grouper
+
+
+def test_ecart_max_inclus():
+    assert grouper([1000, 1000 + ECART_MAX]) == {1000 + ECART_MAX: 1000}
+
+
+def test_au_dela_de_ecart_max_nouveau_groupe():
+    assert grouper([1000, 1000 + ECART_MAX + 1]) == {}
+
+
+def test_chainage_depuis_l_annonce_precedente():
+    # Chaque écart vaut ECART_MAX : tout le groupe remonte à la première annonce,
+    # même si la dernière en est bien plus loin
+    identifiants = [1000 + i * ECART_MAX for i in range(4)]
+    assert grouper(identifiants) == {aid: 1000 for aid in identifiants[1:]}
+
+
+def test_coupure_puis_nouvelle_originale():
+    identifiants = [1000, 1050, 1050 + ECART_MAX + 1, 1050 + ECART_MAX + 2]
+    assert grouper(identifiants) == {1050: 1000, 1050 + ECART_MAX + 2: 1050 + ECART_MAX + 1}
+
+
+def test_cle_insensible_aux_accents_et_a_la_ponctuation():
+    assert cle_doublon("Moutons", "Bélier LADOUM !", 350000.0, "Dakar, Sénégal") == \
+        cle_doublon("Moutons", "belier ladoum", 350000, "dakar senegal")
+    assert cle_doublon("Moutons", "Bélier", 350000.0, "Dakar") != cle_doublon("Moutons", "Bélier", 300000.0, "Dakar")
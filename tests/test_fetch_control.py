@@ -0,0 +1,98 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scrapers.fetch_control import CircuitBreaker, FetchController, TransientError
+
+
+def ouvrir(breaker):
+    """Amène breaker en demi-ouverture : ouvert par un échec, pause écoulée."""
+    breaker.failure()
+    time.sleep(breaker.pause + 0.01)
+
+
+def allow_en_fond(breaker):
+    resultat = []
+    thread = threading.Thread(target=lambda: resultat.append(breaker.allow()), daemon=True)
+    thread.start()
+    return thread, resultat
+
+
+def test_disjoncteur_s_ouvre_apres_threshold_echecs():
+    breaker = CircuitBreaker(threshold=2, pause=60)
+    breaker.failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.failure()
+    assert breaker.state == "open" and breaker.trips == 1
+    assert not breaker.allow()
+    assert breaker.remaining() > 0
+
+
+def test_succes_remet_le_compte_a_zero():
+    breaker = CircuitBreaker(threshold=2, pause=60)
+    breaker.failure()
+    breaker.success()
+    breaker.failure()
+    assert breaker.state == "closed"
+
+
+def test_demi_ouverture_un_seul_essai_les_autres_attendent():
+    breaker = CircuitBreaker(threshold=1, pause=0.05)
+    ouvrir(breaker)
+    assert breaker.allow()  # requête d'essai
+    assert breaker.state == "half-open"
+
+    thread, resultat = allow_en_fond(breaker)
+    thread.join(0.1)
+    assert thread.is_alive()  # bloquée pendant l'essai
+
+    breaker.success()
+    thread.join(1)
+    assert resultat == [True]
+    assert breaker.state == "closed"
+
+
+def test_essai_en_echec_rouvre_et_refuse_les_requetes_en_attente():
+    breaker = CircuitBreaker(threshold=1, pause=0.05)
+    ouvrir(breaker)
+    assert breaker.allow()
+
+    thread, resultat = allow_en_fond(breaker)
+    thread.join(0.1)
+    assert thread.is_alive()
+
+    breaker.failure()
+    thread.join(1)
+    assert resultat == [False]
+    assert breaker.state == "open" and breaker.trips == 2
+
+
+def test_run_all_reprend_puis_abandonne():
+    controller = FetchController(rate=None, retries=0, backoff=0, requeue=1, breaker_threshold=100)
+    appels = {}
+    verrou = threading.Lock()
+
+    def tentative(url):
+        with verrou:
+            appels[url] = appels.get(url, 0) + 1
+            n = appels[url]
+        if url.endswith("/ko") or (url.endswith("/instable") and n == 1):
+            raise TransientError(f"{url} : 503", 503)
+        return url
+
+    urls = ["http://h/ok", "http://h/instable", "http://h/ko"]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        resultats = {url: (resultat, erreur) for url, resultat, erreur in
+                     controller.run_all(executor, urls, lambda url: controller.run(url, lambda: tentative(url)))}
+
+    assert resultats["http://h/ok"] == ("http://h/ok", None)
+    assert resultats["http://h/instable"] == ("http://h/instable", None)
+    assert resultats["http://h/ko"][0] is None
+    assert isinstance(resultats["http://h/ko"][1], TransientError)
+    assert appels == {"http://h/ok": 1, "http://h/instable": 2, "http://h/ko": 2}
+
+    rapport = controller.report()
+    assert (rapport["fetched"], rapport["requeued"], rapport["dropped"]) == (2, 2, 1)
+    assert rapport["requests"] == 5
+    assert rapport["retried"] == 2
+    assert rapport["errors"] == {"503": 3}
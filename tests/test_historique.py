@@ -0,0 +1,51 @@
+import sqlite3
+
+import pytest
+
+from database.doublons import cle_doublon, marquer_doublons
+from database.historique import TOUTES_VILLES, rafraichir_agregats
+from database.scraping_db import BatchWriter, create_table
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    chemin = str(tmp_path / "annonces.db")
+    create_table(chemin)
+    return chemin
+
+
+def ajouter(db_path, annonce_id, adresse, prix=5000.0):
+    with BatchWriter(db_path) as writer:
+        writer.add("Chiens", "Berger allemand", prix, adresse,
+                   f"https://images.coinafrique.com/thumb_{annonce_id}_uploaded_image1.jpg",
+                   annonce_id=annonce_id, cle_doublon=cle_doublon("Chiens", "Berger allemand", prix, adresse))
+
+
+def agregats(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT jour, ville, annonces, mediane FROM prix_journaliers ORDER BY jour, ville").fetchall()
+    finally:
+        conn.close()
+
+
+def test_jour_sans_ville(db_path):
+    ajouter(db_path, 1000, "N/A")
+    assert rafraichir_agregats(db_path) == 1
+    [(_, ville, annonces, mediane)] = agregats(db_path)
+    assert (ville, annonces, mediane) == (TOUTES_VILLES, 1, 5000.0)
+
+
+def test_jour_vide_par_les_doublons(db_path):
+    ajouter(db_path, 1000, "Dakar, Sénégal")
+    ajouter(db_path, 1050, "Dakar, Sénégal")
+    assert marquer_doublons(db_path) == 1
+    # Seule la republication est observée ce jour-là : rien à agréger
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE observations SET observed_at = '2020-01-02 10:00:00' WHERE annonce_id = 1050")
+    conn.close()
+
+    assert rafraichir_agregats(db_path) == 2
+    jours = {jour for jour, *_ in agregats(db_path)}
+    assert "2020-01-02" not in jours and len(jours) == 1
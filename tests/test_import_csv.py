@@ -0,0 +1,25 @@
+import sqlite3
+
+from database.import_csv import importer_dossier
+from database.scraping_db import clear_table, create_table
+
+
+def compter(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM animals").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_reimport_apres_clear_table(tmp_path):
+    db_path = str(tmp_path / "annonces.db")
+    create_table(db_path)
+    importees = sum(importer_dossier(db_path=db_path).values())
+    assert importees > 0
+    assert sum(importer_dossier(db_path=db_path).values()) == 0  # déjà importés
+
+    clear_table(db_path)
+    assert compter(db_path) == 0
+    assert sum(importer_dossier(db_path=db_path).values()) == importees
+    assert compter(db_path) == importees
@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+from database.recherche import TRIS, Filtres, compter, rechercher
+from database.scraping_db import BatchWriter, create_table
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    chemin = str(tmp_path / "annonces.db")
+    create_table(chemin)
+    # Beaucoup d'égalités de prix (clé de tri), et des prix manquants
+    with BatchWriter(chemin) as writer:
+        for i in range(47):
+            prix = None if i % 7 == 0 else float(1000 * (i % 4))
+            writer.add("Chiens", f"Chien {i}", prix, "Dakar, Sénégal",
+                       f"https://images.coinafrique.com/thumb_{5000 + i}_uploaded_image1.jpg", annonce_id=5000 + i)
+    return chemin
+
+
+def parcourir(db_path, tri, limite):
+    images, curseur = [], None
+    while True:
+        page, curseur = rechercher(Filtres(categorie="Chiens"), tri, apres=curseur, limite=limite, db_path=db_path)
+        assert len(page) <= limite
+        images += list(page["Image"])
+        if curseur is None:
+            return images
+
+
+@pytest.mark.parametrize("tri", sorted(TRIS))
+@pytest.mark.parametrize("limite", [1, 5, 10, 50])
+def test_pagination_sans_trou_ni_doublon(db_path, tri, limite):
+    colonne, sens = TRIS[tri]
+    ordre = f"{colonne} {sens}, id {sens}" if colonne else f"id {sens}"
+    where = "WHERE prix IS NOT NULL" if colonne else ""
+    conn = sqlite3.connect(db_path)
+    attendu = [r[0] for r in conn.execute(f"SELECT image_lien FROM animals {where} ORDER BY {ordre}")]
+    conn.close()
+
+    images = parcourir(db_path, tri, limite)
+    assert images == attendu
+    assert len(images) == compter(Filtres(categorie="Chiens"), tri, db_path=db_path)
+
+
+def test_derniere_page_pleine_sans_curseur(db_path):
+    total = compter(Filtres(categorie="Chiens"), db_path=db_path)
+    page, curseur = rechercher(Filtres(categorie="Chiens"), limite=total, db_path=db_path)
+    assert len(page) == total and curseur is None